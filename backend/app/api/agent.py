@@ -1,9 +1,9 @@
 """API endpoints for AI agent content generation."""
 
-from fastapi import APIRouter, HTTPException, Depends, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse, Response
 from typing import Optional, List
-import asyncio
+import gzip
 import json
 import logging
 
@@ -47,7 +47,8 @@ async def start_content_generation(request: GenerationRequest):
             llm_provider=request.llm_provider.value,
             llm_model=request.llm_model,
             customization=request.customization.dict() if request.customization else None,
-            template_id=request.template_id
+            template_id=request.template_id,
+            use_batch_api=request.use_batch_api
         )
 
         return GenerationJobResponse(
@@ -90,30 +91,20 @@ async def stream_job_progress(job_id: str):
         """Generate SSE events for job progress."""
         last_status = None
 
-        # Stream updates until job is complete or failed
-        for _ in range(300):  # Max 5 minutes (300 * 1 second)
-            try:
-                status = content_generator_service.get_job_status(job_id)
-
-                if not status:
-                    yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
-                    break
-
+        # Updates are pushed by the generator service until the job completes or fails
+        try:
+            async for status in content_generator_service.stream_status(job_id):
                 # Only send if status changed
                 if status != last_status:
                     yield f"data: {json.dumps(status)}\n\n"
                     last_status = status
 
-                # Stop streaming if job is complete or failed
-                if status["status"] in ["completed", "failed"]:
-                    break
+            if last_status is None:
+                yield f"data: {json.dumps({'error': 'Job not found'})}\n\n"
 
-                await asyncio.sleep(1)  # Poll every second
-
-            except Exception as e:
-                logger.error(f"Error streaming job progress: {e}")
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
-                break
+        except Exception as e:
+            logger.error(f"Error streaming job progress: {e}")
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
 
         # Send final done event
         yield "data: {\"done\": true}\n\n"
@@ -131,14 +122,15 @@ async def stream_job_progress(job_id: str):
 @router.get("/content/{content_id}", response_model=GeneratedContentResponse)
 async def get_generated_content(
     content_id: int,
-    include_sources: bool = Query(default=True, description="Include source documents")
+    include_sources: bool = Query(default=True, description="Include source documents"),
+    inline_css: bool = Query(default=True, description="Embed styles instead of linking /static/generated-content.css")
 ):
     """
     Retrieve generated content by ID.
 
     Returns the full HTML content along with metadata and optionally source documents.
     """
-    content = content_generator_service.get_generated_content(content_id, include_sources)
+    content = content_generator_service.get_generated_content(content_id, include_sources, inline_css)
 
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
@@ -146,6 +138,33 @@ async def get_generated_content(
     return GeneratedContentResponse(**content)
 
 
+@router.get("/content/{content_id}/html")
+async def get_generated_content_html(content_id: int, request: Request):
+    """
+    Retrieve the stored HTML of generated content as a document.
+
+    The HTML is stored gzip-compressed and is sent without decompressing
+    when the client accepts gzip. It links the shared stylesheet under /static.
+    """
+    html_gz = content_generator_service.get_generated_content_html_gz(content_id)
+
+    if html_gz is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=html_gz,
+            media_type="text/html",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        )
+
+    return Response(
+        content=gzip.decompress(html_gz),
+        media_type="text/html",
+        headers={"Vary": "Accept-Encoding"}
+    )
+
+
 @router.get("/content", response_model=GeneratedContentList)
 async def list_generated_content(
     content_type: Optional[str] = Query(None, description="Filter by content type"),
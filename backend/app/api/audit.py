@@ -31,6 +31,8 @@ async def get_usage_history(
     Get detailed usage history with filtering and pagination.
 
     Returns a list of audit records with all tracked metrics.
+    Records are converted as they stream off the cursor rather than loaded
+    into an intermediate list first.
     """
     audit_service = get_audit_service()
     records = audit_service.get_usage_history(
@@ -27,7 +27,8 @@ async def create_evaluation(
             query=request.query,
             retrieved_doc_ids=request.retrieved_doc_ids,
             user_feedback=request.user_feedback,
-            expected_doc_ids=request.expected_doc_ids
+            expected_doc_ids=request.expected_doc_ids,
+            retrieved_scores=request.retrieved_scores
         )
 
         return evaluation
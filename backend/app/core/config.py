@@ -13,9 +13,14 @@ class Settings(BaseSettings):
     pinecone_api_key: str
     pinecone_environment: str = "us-west1-gcp"
     pinecone_index_name: str = "whale-knowledge"
+    pinecone_query_cache_size: int = 512  # Cached query responses
+    pinecone_query_cache_ttl: int = 60  # Seconds
 
     # Jina Reader
     jina_api_key: Optional[str] = None
+    jina_cache_size: int = 256  # Cached scrape results
+    jina_cache_ttl: int = 900  # Seconds
+    jina_max_content_bytes: int = 20 * 1024 * 1024  # Largest scraped page accepted
 
     # LLM API Keys
     anthropic_api_key: Optional[str] = None
@@ -26,10 +31,49 @@ class Settings(BaseSettings):
     default_llm_model: Optional[str] = None  # If None, use provider default
     anthropic_default_model: str = "claude-3-5-sonnet-20240620"
     openai_default_model: str = "gpt-4-turbo-preview"
+    # Cheaper models for short/simple steps (titles, summaries, conclusions)
+    anthropic_cheap_model: str = "claude-3-5-haiku-latest"
+    openai_cheap_model: str = "gpt-4o-mini"
+    # Client-side limits for synchronous LLM calls
+    llm_requests_per_minute: int = 50
+    llm_request_timeout: float = 60.0  # Seconds per request
+    llm_max_attempts: int = 3  # Attempts on rate-limit/timeout/5xx errors
+    llm_max_concurrency: int = 10  # In-flight LLM requests; also sizes each client's connection pool
+    llm_cache_max_temperature: float = 0.0  # Cache responses for calls at or below this temperature
+    llm_cache_size: int = 1000  # Cached LLM responses
+    llm_cache_ttl: int = 3600  # Seconds
+
+    # Content Generation
+    generation_section_concurrency: int = 3  # Sections generated in parallel per job
+    markdown_render_workers: Optional[int] = None  # Processes for markdown rendering (None = CPU count)
+    generation_context_cache_ttl: int = 3600  # Seconds to reuse retrieved document context
+    relevance_explanation_cache_ttl: int = 3600  # Seconds to reuse document relevance explanations
+    template_cache_ttl: int = 300  # Seconds to reuse templates read from the database
+
+    # Evaluation
+    metrics_cache_enabled: bool = True  # Cache aggregated evaluation metrics
+    metrics_cache_ttl_seconds: int = 60
 
     # Embedding Model
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
     embedding_dimension: int = 384
+    embedding_backend: str = "torch"  # 'torch' or 'onnx' (needs optimum[onnxruntime])
+    embedding_onnx_file: Optional[str] = None  # ONNX file in the model repo, e.g. 'onnx/model_qint8_avx512_vnni.onnx'
+    embedding_batch_size: Optional[int] = None  # Encode batch size (None = 128 on GPU, 64 on CPU)
+    embedding_torch_threads: Optional[int] = None  # CPU threads for PyTorch inference (None = half the cores)
+    embedding_cache_size: int = 2000  # Cached query embeddings
+    embedding_cache_ttl: int = 600  # Seconds
+
+    # Reranking
+    rerank_enabled: bool = False  # Rerank retrieved chunks with a cross-encoder
+    rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    rerank_fetch_multiplier: int = 4  # Candidates fetched from Pinecone per requested result
+
+    # PDF processing
+    pdf_backend: str = "pypdf2"  # 'pypdf2' or 'pdfium' (needs pypdfium2; changes content hashes)
+    pdf_cache_size: int = 32  # Cached extraction results, keyed by file hash
+    pdf_cache_ttl: int = 3600  # Seconds
+    pdf_extract_workers: Optional[int] = None  # Processes for parallel page extraction (None = CPU count)
 
     # Chunking
     chunk_size: int = 512
@@ -53,6 +97,12 @@ class Settings(BaseSettings):
     confluence_email: Optional[str] = Field(default=None, alias="CONFLUENCE_EMAIL")
     confluence_api_token: Optional[str] = Field(default=None, alias="CONFLUENCE_API_TOKEN")
     confluence_space_key: str = Field(default="DS", alias="CONFLUENCE_SPACE_KEY")
+    confluence_max_connections: int = 100  # Pooled REST connections
+    confluence_max_keepalive_connections: int = 50
+
+    # API usage audit logging
+    audit_flush_batch_size: int = 100  # Audit rows written per batch (1 = write each row immediately)
+    audit_flush_interval: float = 5.0  # Max seconds a queued audit row waits for its batch
 
     @property
     def cors_origins_list(self) -> list[str]:
@@ -67,6 +117,8 @@ class Settings(BaseSettings):
     # LLM Pricing (per 1M tokens)
     anthropic_claude_35_sonnet_input_cost: float = 3.00  # $3 per 1M input tokens
     anthropic_claude_35_sonnet_output_cost: float = 15.00  # $15 per 1M output tokens
+    anthropic_claude_35_haiku_input_cost: float = 0.80  # $0.80 per 1M input tokens
+    anthropic_claude_35_haiku_output_cost: float = 4.00  # $4 per 1M output tokens
     openai_gpt4o_input_cost: float = 2.50  # $2.50 per 1M input tokens
     openai_gpt4o_output_cost: float = 10.00  # $10 per 1M output tokens
     openai_gpt4o_mini_input_cost: float = 0.15  # $0.15 per 1M input tokens
@@ -1,9 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, JSON, Float, ForeignKey
+from sqlalchemy import create_engine, inspect, Column, Integer, String, Text, DateTime, Boolean, JSON, Float, ForeignKey, Computed, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, deferred
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.sql import func
 from datetime import datetime
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Iterator, List, Sequence, TypeVar
 import asyncpg
 
 from app.core.config import settings
@@ -14,8 +16,23 @@ SQLALCHEMY_DATABASE_URL = settings.database_url
 engine = create_engine(SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://"))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for queries made from async code paths
+async_engine = create_async_engine(SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+# Largest IN-list sent in a single query
+MAX_IN_LIST_SIZE = 999
+
+T = TypeVar("T")
+
+
+def chunked(values: Sequence[T], size: int = MAX_IN_LIST_SIZE) -> Iterator[Sequence[T]]:
+    """Split a sequence into consecutive slices of at most `size` items (for IN-lists)."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
 
 class Document(Base):
     """Document metadata stored in PostgreSQL."""
@@ -53,6 +70,12 @@ class Document(Base):
     refresh_interval_days = Column(Integer, default=30)
 
 
+# Document selection looks up completed documents by id, and prefetches the
+# most recently updated ones
+Index("ix_documents_status_id", Document.status, Document.id)
+Index("ix_documents_status_updated", Document.status, Document.updated_at.desc())
+
+
 class EvaluationResult(Base):
     """Evaluation results for retrieval quality."""
     __tablename__ = "evaluation_results"
@@ -92,24 +115,44 @@ class ProcessingJob(Base):
 
 
 class APIUsageAudit(Base):
-    """Track API usage for JINA and Pinecone services."""
+    """
+    Track API usage for JINA and Pinecone services.
+
+    Requires Postgres: jina_rate_limit_remaining is a generated column using
+    Postgres JSON and regex operators, and the autoincrement id is part of a
+    composite primary key, which SQLite cannot create.
+    """
     __tablename__ = "api_usage_audit"
+    # Same keys as migration 003, which range-partitions the table on created_at
+    # (Postgres requires the partition key in every unique constraint).
+    # create_all builds them on a plain, unpartitioned table.
+    __table_args__ = (UniqueConstraint("request_id", "created_at"),)
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
 
     # Service identification
     service = Column(String, nullable=False, index=True)  # 'jina', 'pinecone', 'anthropic', 'openai'
     operation = Column(String, nullable=False, index=True)  # 'scrape', 'query', 'upsert', 'delete', 'llm_generation'
 
     # Request details
-    request_id = Column(String, unique=True, index=True)  # UUID for tracking
+    request_id = Column(String, index=True)  # UUID for tracking
     endpoint = Column(String, nullable=True)  # API endpoint called
 
     # Usage metrics - JINA
     jina_input_chars = Column(Integer, nullable=True)
     jina_output_chars = Column(Integer, nullable=True)
     jina_estimated_tokens = Column(Integer, nullable=True)
-    jina_response_headers = Column(JSON, nullable=True)  # Store all headers
+    jina_response_headers = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)  # Rate-limit/usage headers
+    # Extracted from the headers by Postgres so aggregates never parse the JSON
+    jina_rate_limit_remaining = Column(
+        Integer,
+        Computed(
+            "CASE WHEN (jina_response_headers->>'x-ratelimit-remaining') ~ '^[0-9]+$' "
+            "THEN (jina_response_headers->>'x-ratelimit-remaining')::int END",
+            persisted=True
+        ),
+        nullable=True
+    )
 
     # Usage metrics - Pinecone
     pinecone_operation = Column(String, nullable=True)  # 'read', 'write', 'delete'
@@ -138,7 +181,7 @@ class APIUsageAudit(Base):
     duration_ms = Column(Integer, nullable=True)
 
     # Timestamps
-    created_at = Column(DateTime, server_default=func.now(), index=True)
+    created_at = Column(DateTime, primary_key=True, server_default=func.now(), index=True)
 
 
 class GeneratedContent(Base):
@@ -150,7 +193,10 @@ class GeneratedContent(Base):
     # Content details
     title = Column(String, nullable=False)
     content_type = Column(String, nullable=False, index=True)  # 'whitepaper', 'article', 'blog'
-    content_html = Column(Text, nullable=False)  # HTML formatted content
+    # HTML formatted content. New rows store it gzip-compressed in content_html_gz;
+    # content_html is only set on rows written before compression was added.
+    content_html = deferred(Column(Text, nullable=True))
+    content_html_gz = deferred(Column(LargeBinary, nullable=True))
     content_markdown = Column(Text, nullable=True)  # Markdown version (optional)
 
     # Generation details
@@ -172,6 +218,10 @@ class GeneratedContent(Base):
     source_documents = relationship("GenerationSourceDocument", back_populates="generated_content", cascade="all, delete-orphan")
 
 
+# Listing filters on content_type and pages by newest first
+Index("ix_generated_content_type_created", GeneratedContent.content_type, GeneratedContent.created_at.desc())
+
+
 class GenerationJob(Base):
     """Track async content generation jobs."""
     __tablename__ = "generation_jobs"
@@ -253,12 +303,34 @@ class GenerationSourceDocument(Base):
 
     # Relationships
     generated_content = relationship("GeneratedContent", back_populates="source_documents")
+    document = relationship("Document")
 
 
 # Database initialization
+def create_missing_tables(conn) -> List[str]:
+    """
+    Create the tables that don't exist yet.
+
+    Lists existing tables with one query instead of create_all's
+    existence check per table.
+
+    Args:
+        conn: Connection to create the tables on, inside a transaction
+
+    Returns:
+        Names of the tables created
+    """
+    existing = set(inspect(conn).get_table_names())
+    missing = [table for table in Base.metadata.sorted_tables if table.name not in existing]
+    if missing:
+        Base.metadata.create_all(bind=conn, tables=missing, checkfirst=False)
+    return [table.name for table in missing]
+
+
 def init_db():
     """Initialize database tables."""
-    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        create_missing_tables(conn)
 
 
 def get_db():
@@ -291,3 +363,4 @@ async def close_pool():
     if _pool:
         await _pool.close()
         _pool = None
+    await async_engine.dispose()
@@ -1,14 +1,22 @@
 from pinecone import Pinecone, ServerlessSpec
 from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
+import json
 import logging
 import time
+import numpy as np
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.services.audit_service import get_audit_service
 
 logger = logging.getLogger(__name__)
 
+# Most vector IDs Pinecone accepts in one delete request
+DELETE_BATCH_SIZE = 1000
+
 
 class PineconeClient:
     """Client for interacting with Pinecone vector database."""
@@ -18,6 +26,13 @@ class PineconeClient:
         self.index_name = settings.pinecone_index_name
         self.dimension = settings.embedding_dimension
         self._index = None
+        # Query responses for repeated searches; the generation is part of the key
+        # and is bumped on every write, so cached results never outlive an upsert/delete
+        self._query_cache = TTLCache(
+            maxsize=settings.pinecone_query_cache_size,
+            ttl=settings.pinecone_query_cache_ttl
+        )
+        self._generation = 0
 
     def initialize(self):
         """Initialize or get existing Pinecone index."""
@@ -56,13 +71,15 @@ class PineconeClient:
         vectors: List[tuple],  # [(id, embedding, metadata), ...]
         namespace: str = "",
         db: Optional[Session] = None,
+        document_id: Optional[int] = None,
         batch_size: int = 100
     ) -> Dict[str, Any]:
         """
         Upsert vectors to Pinecone.
 
         Args:
-            vectors: List of tuples (id, embedding, metadata)
+            vectors: List of tuples (id, embedding, metadata). Embeddings may
+                be lists or numpy arrays; arrays are converted one batch at a time.
             namespace: Optional namespace for multi-tenancy
             db: Database session for audit logging (optional)
             document_id: Document ID for tracking (optional)
@@ -71,7 +88,7 @@ class PineconeClient:
         Returns:
             Upsert response from Pinecone (last batch response)
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         audit_service = get_audit_service()
         status = "success"
         error_msg = None
@@ -81,32 +98,37 @@ class PineconeClient:
         try:
             # Process vectors in batches
             for i in range(0, vector_count, batch_size):
-                batch = vectors[i : i + batch_size]
+                batch = [
+                    (vector_id, embedding.tolist() if hasattr(embedding, "tolist") else embedding, metadata)
+                    for vector_id, embedding, metadata in vectors[i : i + batch_size]
+                ]
                 logger.info(f"Upserting batch {i // batch_size + 1}: {len(batch)} vectors")
                 
-                last_response = self.index.upsert(
+                # Blocking HTTP call; run it off the event loop so callers can overlap it
+                last_response = await asyncio.to_thread(
+                    self.index.upsert,
                     vectors=batch,
                     namespace=namespace
                 )
             
             logger.info(f"Successfully upserted {vector_count} vectors to Pinecone in batches")
+            self._invalidate_queries()
 
             # Log to audit table if db session provided
             if db:
-                duration_ms = int((time.time() - start_time) * 1000)
+                duration_ms = int((time.perf_counter() - start_time) * 1000)
                 # Calculate write units (1 write unit = 1 vector upserted)
                 write_units = vector_count
 
-                audit_service.log_api_usage(
+                audit_service.log_pinecone_usage(
                     db=db,
-                    service="pinecone",
                     operation="upsert",
                     status=status,
                     pinecone_operation="write",
-                    pinecone_vector_count=vector_count,
-                    pinecone_dimension=self.dimension,
-                    pinecone_namespace=namespace if namespace else "default",
-                    pinecone_write_units=write_units,
+                    vector_count=vector_count,
+                    dimension=self.dimension,
+                    namespace=namespace if namespace else "default",
+                    write_units=write_units,
                     document_id=document_id,
                     duration_ms=duration_ms
                 )
@@ -119,22 +141,48 @@ class PineconeClient:
 
             # Log failure to audit
             if db:
-                duration_ms = int((time.time() - start_time) * 1000)
-                audit_service.log_api_usage(
+                duration_ms = int((time.perf_counter() - start_time) * 1000)
+                audit_service.log_pinecone_usage(
                     db=db,
-                    service="pinecone",
                     operation="upsert",
                     status=status,
                     pinecone_operation="write",
-                    pinecone_vector_count=vector_count,
-                    pinecone_dimension=self.dimension,
-                    pinecone_namespace=namespace if namespace else "default",
+                    vector_count=vector_count,
+                    dimension=self.dimension,
+                    namespace=namespace if namespace else "default",
                     error_message=error_msg,
                     document_id=document_id,
                     duration_ms=duration_ms
                 )
             raise
 
+    async def upsert_columnar(
+        self,
+        ids: List[str],
+        embeddings: Any,
+        metadatas: List[Dict[str, Any]],
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Upsert vectors given as parallel columns.
+
+        Args:
+            ids: Vector IDs
+            embeddings: One embedding per ID (2-D numpy array or list of lists)
+            metadatas: One metadata dict per ID
+            **kwargs: Passed to upsert_vectors (namespace, db, document_id, batch_size)
+
+        Returns:
+            Upsert response from Pinecone (last batch response)
+        """
+        if not len(ids) == len(embeddings) == len(metadatas):
+            raise ValueError(
+                f"Column lengths differ: {len(ids)} ids, {len(embeddings)} embeddings, "
+                f"{len(metadatas)} metadatas"
+            )
+
+        return await self.upsert_vectors(list(zip(ids, embeddings, metadatas)), **kwargs)
+
     async def query(
         self,
         vector: List[float],
@@ -157,16 +205,29 @@ class PineconeClient:
             db: Database session for audit logging (optional)
             document_id: Document ID for tracking (optional)
 
+        Responses are cached for `pinecone_query_cache_ttl` seconds, keyed by
+        the vector and query parameters; any upsert or delete through this
+        client invalidates the cache. Cache hits are not audited. Every call
+        returns its own copy of the response and its matches, so callers may
+        modify them.
+
         Returns:
-            Query results from Pinecone
+            Query results from Pinecone, as a dict with a `matches` list
         """
-        start_time = time.time()
+        cache_key = self._query_cache_key(vector, top_k, filter, namespace, include_metadata)
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            return self._copy_response(cached)
+
+        start_time = time.perf_counter()
         audit_service = get_audit_service()
         status = "success"
         error_msg = None
 
         try:
-            response = self.index.query(
+            # Blocking HTTP call; run it off the event loop so callers can overlap it
+            response = await asyncio.to_thread(
+                self.index.query,
                 vector=vector,
                 top_k=top_k,
                 filter=filter,
@@ -174,29 +235,30 @@ class PineconeClient:
                 include_metadata=include_metadata,
                 include_values=False
             )
+            result = response.to_dict()
+            self._query_cache.set(cache_key, result)
 
             # Log to audit table if db session provided
             if db:
-                duration_ms = int((time.time() - start_time) * 1000)
+                duration_ms = int((time.perf_counter() - start_time) * 1000)
                 # Calculate read units (1 read unit = top_k vectors queried)
                 read_units = top_k
                 actual_results = len(response.matches) if hasattr(response, 'matches') else 0
 
-                audit_service.log_api_usage(
+                audit_service.log_pinecone_usage(
                     db=db,
-                    service="pinecone",
                     operation="query",
                     status=status,
                     pinecone_operation="read",
-                    pinecone_vector_count=actual_results,
-                    pinecone_dimension=self.dimension,
-                    pinecone_namespace=namespace if namespace else "default",
-                    pinecone_read_units=read_units,
+                    vector_count=actual_results,
+                    dimension=self.dimension,
+                    namespace=namespace if namespace else "default",
+                    read_units=read_units,
                     document_id=document_id,
                     duration_ms=duration_ms
                 )
 
-            return response
+            return self._copy_response(result)
         except Exception as e:
             status = "failed"
             error_msg = str(e)
@@ -204,15 +266,14 @@ class PineconeClient:
 
             # Log failure to audit
             if db:
-                duration_ms = int((time.time() - start_time) * 1000)
-                audit_service.log_api_usage(
+                duration_ms = int((time.perf_counter() - start_time) * 1000)
+                audit_service.log_pinecone_usage(
                     db=db,
-                    service="pinecone",
                     operation="query",
                     status=status,
                     pinecone_operation="read",
-                    pinecone_dimension=self.dimension,
-                    pinecone_namespace=namespace if namespace else "default",
+                    dimension=self.dimension,
+                    namespace=namespace if namespace else "default",
                     error_message=error_msg,
                     document_id=document_id,
                     duration_ms=duration_ms
@@ -227,24 +288,64 @@ class PineconeClient:
         """
         Delete vectors from Pinecone.
 
+        IDs are sent in requests of at most DELETE_BATCH_SIZE.
+
         Args:
             ids: List of vector IDs to delete
             namespace: Optional namespace
 
         Returns:
-            Delete response from Pinecone
+            Delete response from Pinecone (last batch response)
         """
         try:
-            response = self.index.delete(
-                ids=ids,
-                namespace=namespace
-            )
+            response = {}
+            for start in range(0, len(ids), DELETE_BATCH_SIZE):
+                # Blocking HTTP call; run it off the event loop like upsert and query
+                response = await asyncio.to_thread(
+                    self.index.delete,
+                    ids=ids[start:start + DELETE_BATCH_SIZE],
+                    namespace=namespace
+                )
             logger.info(f"Deleted {len(ids)} vectors from Pinecone")
+            self._invalidate_queries()
             return response
         except Exception as e:
             logger.error(f"Error deleting vectors: {e}")
             raise
 
+    @staticmethod
+    def _copy_response(response: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a cached query response down to its match dicts."""
+        return {**response, "matches": [{**match} for match in response.get("matches", [])]}
+
+    def _query_cache_key(
+        self,
+        vector: List[float],
+        top_k: int,
+        filter: Optional[Dict[str, Any]],
+        namespace: str,
+        include_metadata: bool
+    ) -> tuple:
+        """Build the query cache key from a digest of the float32 vector and the query parameters."""
+        vector_digest = hashlib.sha256(np.asarray(vector, dtype=np.float32).tobytes()).hexdigest()
+        return (
+            self._generation,
+            vector_digest,
+            top_k,
+            json.dumps(filter or {}, sort_keys=True, default=str),
+            namespace,
+            include_metadata,
+        )
+
+    def _invalidate_queries(self):
+        """Drop cached query responses after the index changed."""
+        self._generation += 1
+        self._query_cache.clear()
+
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """Get query cache statistics (size, hits, misses, hit_rate)."""
+        return self._query_cache.get_stats()
+
     async def get_stats(self) -> Dict[str, Any]:
         """Get index statistics."""
         try:
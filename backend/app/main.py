@@ -1,12 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
+from pathlib import Path
 import logging
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, close_pool
 from app.core.pinecone_client import pinecone_client
 from app.api import documents, query, evaluation, stats, audit, agent
 from app.services.template_service import template_service
+from app.services.content_generator import close_markdown_pool
+from app.services.pdf_processor import close_pdf_pool
+from app.services.document_selector import document_selector_service
+from app.services.jina_scraper import close_http_client
+from app.services.audit_service import get_audit_service
+from app.services.mcp_client import close_confluence_client
 
 # Configure logging
 logging.basicConfig(
@@ -20,7 +29,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Whale Knowledge Base API",
     description="RAG-based knowledge base with MCP server integration",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -40,6 +50,9 @@ app.include_router(stats.router)
 app.include_router(audit.router)
 app.include_router(agent.router)
 
+# Static assets (shared stylesheet for generated content)
+app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -54,6 +67,16 @@ async def startup_event():
     logger.info("Initializing Pinecone...")
     pinecone_client.initialize()
 
+    # Warm up the embedding model and Pinecone connection
+    logger.info("Warming up embedding model and vector search...")
+    try:
+        await document_selector_service.warmup()
+    except Exception as e:
+        logger.warning(f"Warmup failed, first requests may be slower: {e}")
+
+    # Write queued audit rows in the background
+    get_audit_service().start_flusher()
+
     # Initialize default content templates
     logger.info("Initializing default templates...")
     template_service.initialize_default_templates()
@@ -65,6 +88,12 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("Shutting down Whale Knowledge Base API")
+    close_markdown_pool()
+    close_pdf_pool()
+    await get_audit_service().close()
+    await close_pool()
+    await close_http_client()
+    await close_confluence_client()
 
 
 @app.get("/")
@@ -55,7 +55,9 @@ QUERY_KB_TOOL = Tool(
                 "properties": {
                     "industry": {"type": "string"},
                     "author": {"type": "string"},
-                    "source_type": {"type": "string"}
+                    "source_type": {"type": "string"},
+                    "date_from": {"type": "string", "description": "Earliest document date (ISO 8601)"},
+                    "date_to": {"type": "string", "description": "Latest document date (ISO 8601)"}
                 }
             }
         },
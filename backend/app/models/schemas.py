@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -101,6 +101,20 @@ class QueryRequest(BaseModel):
     filters: Optional[Dict[str, Any]] = None
     include_metadata: bool = True
 
+    @field_validator("filters")
+    @classmethod
+    def validate_date_filters(cls, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Reject date_from/date_to values that are neither ISO 8601 dates nor epoch seconds."""
+        for key in ("date_from", "date_to"):
+            value = (filters or {}).get(key)
+            if not value or (isinstance(value, (int, float)) and not isinstance(value, bool)):
+                continue
+            try:
+                datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be an ISO 8601 date or epoch seconds, got {value!r}")
+        return filters
+
 
 class QueryResult(BaseModel):
     """Schema for a single query result."""
@@ -125,6 +139,7 @@ class EvaluationCreate(BaseModel):
     retrieved_doc_ids: List[int]
     user_feedback: Optional[str] = None  # 'positive', 'negative'
     expected_doc_ids: Optional[List[int]] = None
+    retrieved_scores: Optional[List[float]] = None  # Scores from the original retrieval, if known
 
 
 class EvaluationResponse(BaseModel):
@@ -225,6 +240,7 @@ class APIUsageAuditResponse(BaseModel):
     jina_output_chars: Optional[int] = None
     jina_estimated_tokens: Optional[int] = None
     jina_response_headers: Optional[Dict[str, Any]] = None
+    jina_rate_limit_remaining: Optional[int] = None
 
     # Pinecone metrics
     pinecone_operation: Optional[str] = None
@@ -260,6 +276,7 @@ class UsageSummary(BaseModel):
     total_jina_tokens: Optional[int] = None
     total_jina_input_chars: Optional[int] = None
     total_jina_output_chars: Optional[int] = None
+    min_jina_rate_limit_remaining: Optional[int] = None
 
     # Pinecone totals
     total_pinecone_vectors: Optional[int] = None
@@ -343,6 +360,7 @@ class GenerationRequest(BaseModel):
     llm_model: Optional[str] = None  # If None, use default for provider
     customization: Optional[GenerationCustomization] = GenerationCustomization()
     template_id: Optional[int] = None  # Optional template to use
+    use_batch_api: bool = False  # Use the provider batch API (cheaper, slower)
 
 
 class GenerationJobResponse(BaseModel):
@@ -393,9 +411,22 @@ class GeneratedContentResponse(BaseModel):
         from_attributes = True
 
 
+class GeneratedContentSummary(BaseModel):
+    """Generated content as shown in listings (no HTML body)."""
+    id: int
+    title: str
+    content_type: str
+    topic: str
+    llm_provider: str
+    llm_model: str
+    status: str
+    cost_estimate: Optional[float]
+    created_at: datetime
+
+
 class GeneratedContentList(BaseModel):
     """Paginated list of generated content."""
-    content: List[GeneratedContentResponse]
+    content: List[GeneratedContentSummary]
     total: int
     page: int
     page_size: int
@@ -1,12 +1,15 @@
 """Service for tracking and analyzing API usage."""
+import asyncio
 import logging
+import threading
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Set
 from sqlalchemy.orm import Session
 from sqlalchemy import func, Integer
 
-from app.core.database import APIUsageAudit
+from app.core.database import APIUsageAudit, engine
 from app.core.config import settings
 from app.models.schemas import (
     APIUsageAuditResponse,
@@ -21,6 +24,15 @@ logger = logging.getLogger(__name__)
 class AuditService:
     """Service for logging and analyzing API usage."""
 
+    def __init__(self):
+        # Audit rows waiting to be written as one batch (see _buffer_row)
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_since: Optional[float] = None
+        self._pending_lock = threading.Lock()
+        # Batch writes running in the executor, and the periodic flush task
+        self._writes: Set[asyncio.Future] = set()
+        self._flusher: Optional[asyncio.Task] = None
+
     async def log_llm_usage(
         self,
         provider: str,
@@ -31,8 +43,9 @@ class AuditService:
         status: str = "success",
         generated_content_id: Optional[int] = None,
         error_message: Optional[str] = None,
-        duration_ms: Optional[int] = None
-    ) -> Optional[APIUsageAudit]:
+        duration_ms: Optional[int] = None,
+        batch: bool = False
+    ) -> Optional[str]:
         """
         Log LLM API usage (async version for use in services).
 
@@ -46,51 +59,44 @@ class AuditService:
             generated_content_id: ID of generated content (if applicable)
             error_message: Error message if failed
             duration_ms: Duration in milliseconds
+            batch: Whether the call went through the batch API (costed at the batch discount)
 
         Returns:
-            The created audit record or None if failed
+            The request_id of the logged row or None if failed
         """
-        from app.core.database import SessionLocal
-
-        db = SessionLocal()
         try:
             # Calculate cost estimate
             from app.services.llm_service import llm_service
             cost_estimate = llm_service.estimate_cost(
-                input_tokens, output_tokens, provider, model
+                input_tokens, output_tokens, provider, model, batch=batch
             )
 
-            audit_record = APIUsageAudit(
-                request_id=str(uuid.uuid4()),
-                service=provider,
-                operation=operation,
-                status=status,
+            row = {
+                "request_id": uuid.uuid4().hex,
+                "service": provider,
+                "operation": operation,
+                "status": status,
                 # LLM fields
-                llm_provider=provider,
-                llm_model=model,
-                llm_input_tokens=input_tokens,
-                llm_output_tokens=output_tokens,
-                llm_total_tokens=input_tokens + output_tokens,
-                llm_cost_estimate=cost_estimate,
+                "llm_provider": provider,
+                "llm_model": model,
+                "llm_input_tokens": input_tokens,
+                "llm_output_tokens": output_tokens,
+                "llm_total_tokens": input_tokens + output_tokens,
+                "llm_cost_estimate": cost_estimate,
                 # Common
-                generated_content_id=generated_content_id,
-                error_message=error_message,
-                duration_ms=duration_ms
-            )
+                "generated_content_id": generated_content_id,
+                "error_message": error_message,
+                "duration_ms": duration_ms,
+            }
 
-            db.add(audit_record)
-            db.commit()
-            db.refresh(audit_record)
+            self._buffer_row(engine, row)
 
             logger.info(f"Logged {provider} LLM usage: {input_tokens + output_tokens} tokens, ${cost_estimate:.4f}")
-            return audit_record
+            return row["request_id"]
 
         except Exception as e:
             logger.error(f"Failed to log LLM usage: {e}")
-            db.rollback()
             return None
-        finally:
-            db.close()
 
     def log_api_usage(
         self,
@@ -123,7 +129,7 @@ class AuditService:
         user_id: Optional[str] = None,
         error_message: Optional[str] = None,
         duration_ms: Optional[int] = None
-    ) -> APIUsageAudit:
+    ) -> Optional[str]:
         """
         Log an API usage event to the audit table.
 
@@ -135,55 +141,264 @@ class AuditService:
             ... (other fields as documented in APIUsageAudit model)
 
         Returns:
-            The created audit record
+            The request_id of the logged row, or None if logging failed
         """
-        try:
-            audit_record = APIUsageAudit(
-                request_id=str(uuid.uuid4()),
-                service=service,
-                operation=operation,
-                status=status,
-                endpoint=endpoint,
-                # JINA
-                jina_input_chars=jina_input_chars,
-                jina_output_chars=jina_output_chars,
-                jina_estimated_tokens=jina_estimated_tokens,
-                jina_response_headers=jina_response_headers,
-                # Pinecone
-                pinecone_operation=pinecone_operation,
-                pinecone_vector_count=pinecone_vector_count,
-                pinecone_dimension=pinecone_dimension,
-                pinecone_namespace=pinecone_namespace,
-                pinecone_read_units=pinecone_read_units,
-                pinecone_write_units=pinecone_write_units,
-                # LLM
-                llm_provider=llm_provider,
-                llm_model=llm_model,
-                llm_input_tokens=llm_input_tokens,
-                llm_output_tokens=llm_output_tokens,
-                llm_total_tokens=(llm_input_tokens + llm_output_tokens) if (llm_input_tokens and llm_output_tokens) else None,
-                llm_cost_estimate=llm_cost_estimate,
-                # Common
-                document_id=document_id,
-                generated_content_id=generated_content_id,
-                user_id=user_id,
-                error_message=error_message,
-                duration_ms=duration_ms
-            )
+        row = {
+            "request_id": uuid.uuid4().hex,
+            "service": service,
+            "operation": operation,
+            "status": status,
+            "endpoint": endpoint,
+            # JINA
+            "jina_input_chars": jina_input_chars,
+            "jina_output_chars": jina_output_chars,
+            "jina_estimated_tokens": jina_estimated_tokens,
+            "jina_response_headers": jina_response_headers,
+            # Pinecone
+            "pinecone_operation": pinecone_operation,
+            "pinecone_vector_count": pinecone_vector_count,
+            "pinecone_dimension": pinecone_dimension,
+            "pinecone_namespace": pinecone_namespace,
+            "pinecone_read_units": pinecone_read_units,
+            "pinecone_write_units": pinecone_write_units,
+            # LLM
+            "llm_provider": llm_provider,
+            "llm_model": llm_model,
+            "llm_input_tokens": llm_input_tokens,
+            "llm_output_tokens": llm_output_tokens,
+            "llm_total_tokens": (llm_input_tokens + llm_output_tokens) if (llm_input_tokens and llm_output_tokens) else None,
+            "llm_cost_estimate": llm_cost_estimate,
+            # Common
+            "document_id": document_id,
+            "generated_content_id": generated_content_id,
+            "user_id": user_id,
+            "error_message": error_message,
+            "duration_ms": duration_ms,
+        }
+
+        return self._log_row(db, row)
+
+    def log_jina_usage(
+        self,
+        db: Session,
+        operation: str,
+        status: str = "success",
+        endpoint: Optional[str] = None,
+        input_chars: Optional[int] = None,
+        output_chars: Optional[int] = None,
+        estimated_tokens: Optional[int] = None,
+        response_headers: Optional[Dict[str, Any]] = None,
+        document_id: Optional[int] = None,
+        user_id: Optional[str] = None,
+        error_message: Optional[str] = None,
+        duration_ms: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Log a JINA API call, writing only the JINA and common columns.
 
-            db.add(audit_record)
-            db.commit()
-            db.refresh(audit_record)
+        Returns:
+            The request_id of the logged row, or None if logging failed
+        """
+        return self._log_row(db, {
+            "request_id": uuid.uuid4().hex,
+            "service": "jina",
+            "operation": operation,
+            "status": status,
+            "endpoint": endpoint,
+            "jina_input_chars": input_chars,
+            "jina_output_chars": output_chars,
+            "jina_estimated_tokens": estimated_tokens,
+            "jina_response_headers": response_headers,
+            "document_id": document_id,
+            "user_id": user_id,
+            "error_message": error_message,
+            "duration_ms": duration_ms,
+        })
+
+    def log_pinecone_usage(
+        self,
+        db: Session,
+        operation: str,
+        pinecone_operation: str,
+        status: str = "success",
+        vector_count: Optional[int] = None,
+        dimension: Optional[int] = None,
+        namespace: Optional[str] = None,
+        read_units: Optional[int] = None,
+        write_units: Optional[int] = None,
+        document_id: Optional[int] = None,
+        user_id: Optional[str] = None,
+        error_message: Optional[str] = None,
+        duration_ms: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Log a Pinecone call, writing only the Pinecone and common columns.
+
+        Returns:
+            The request_id of the logged row, or None if logging failed
+        """
+        return self._log_row(db, {
+            "request_id": uuid.uuid4().hex,
+            "service": "pinecone",
+            "operation": operation,
+            "status": status,
+            "pinecone_operation": pinecone_operation,
+            "pinecone_vector_count": vector_count,
+            "pinecone_dimension": dimension,
+            "pinecone_namespace": namespace,
+            "pinecone_read_units": read_units,
+            "pinecone_write_units": write_units,
+            "document_id": document_id,
+            "user_id": user_id,
+            "error_message": error_message,
+            "duration_ms": duration_ms,
+        })
+
+    def _log_row(self, db: Session, row: Dict[str, Any]) -> Optional[str]:
+        """Queue a prepared audit row, swallowing and logging any failure."""
+        try:
+            # Write on a dedicated connection so a failed audit insert never
+            # rolls back the caller's pending work in `db`.
+            self._buffer_row(db.get_bind(), row)
 
-            logger.info(f"Logged {service} {operation} usage: request_id={audit_record.request_id}")
-            return audit_record
+            logger.info(f"Logged {row['service']} {row['operation']} usage: request_id={row['request_id']}")
+            return row["request_id"]
 
         except Exception as e:
             logger.error(f"Failed to log API usage: {e}")
-            db.rollback()
             # Don't raise - audit logging should not break the main flow
             return None
 
+    def _buffer_row(self, bind, row: Dict[str, Any]) -> None:
+        """
+        Queue an audit row and write the queue once it is due.
+
+        Rows are written together once `audit_flush_batch_size` are queued or
+        the oldest has waited `audit_flush_interval` seconds, whichever comes
+        first; a batch size of 1 writes every row immediately.
+
+        Args:
+            bind: Engine (or connectable) to write through
+            row: Column-name -> value dict
+        """
+        with self._pending_lock:
+            self._pending.append(row)
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+
+            due = (
+                len(self._pending) >= settings.audit_flush_batch_size
+                or time.monotonic() - self._pending_since >= settings.audit_flush_interval
+            )
+            if not due:
+                return
+
+            rows = self._take_pending()
+
+        self._dispatch_write(bind, rows)
+
+    def _dispatch_write(self, bind, rows: List[Dict[str, Any]]) -> None:
+        """Write rows in the default executor when on the event loop, else inline."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_rows(bind, rows)
+            return
+
+        # Fire-and-forget: callers on the loop (scrapes, Pinecone calls) never
+        # wait on the database. _write_rows logs its own failures.
+        future = loop.run_in_executor(None, self._write_rows, bind, rows)
+        self._writes.add(future)
+        future.add_done_callback(self._writes.discard)
+
+    def start_flusher(self) -> None:
+        """Start the background task that flushes queued rows every audit_flush_interval."""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        """Flush queued rows on a timer so quiet periods don't strand them."""
+        while True:
+            await asyncio.sleep(settings.audit_flush_interval)
+            await asyncio.to_thread(self.flush)
+
+    async def close(self) -> None:
+        """Stop the flusher, wait for in-flight batch writes and flush the rest."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+
+        if self._writes:
+            await asyncio.gather(*self._writes)
+        await asyncio.to_thread(self.flush)
+
+    def flush(self, bind=None) -> None:
+        """
+        Write all queued audit rows now.
+
+        Args:
+            bind: Engine (or connectable) to write through (default: app engine)
+        """
+        with self._pending_lock:
+            rows = self._take_pending()
+
+        if rows:
+            self._write_rows(bind if bind is not None else engine, rows)
+
+    def _take_pending(self) -> List[Dict[str, Any]]:
+        """Detach the queued rows. Caller must hold _pending_lock."""
+        rows = self._pending
+        self._pending = []
+        self._pending_since = None
+        return rows
+
+    def _write_rows(self, bind, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert rows with one executemany per distinct column set, logging failures.
+
+        If a group's batch insert fails, its rows are retried one at a time so
+        only the rows that fail on their own are lost.
+        """
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+
+        for group in groups.values():
+            try:
+                self._insert_rows(bind, group)
+                continue
+            except Exception as e:
+                if len(group) == 1:
+                    # Don't raise - audit logging should not break the main flow
+                    logger.error(f"Failed to write audit row {group[0].get('request_id')}: {e}")
+                    continue
+                logger.warning(f"Batch write of {len(group)} audit rows failed, retrying row by row: {e}")
+
+            for row in group:
+                try:
+                    self._insert_rows(bind, [row])
+                except Exception as e:
+                    logger.error(f"Failed to write audit row {row.get('request_id')}: {e}")
+
+    @staticmethod
+    def _insert_rows(bind, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert audit rows with a single Core INSERT (executemany for lists).
+
+        Audit rows are write-only, so this skips ORM object construction,
+        identity-map bookkeeping and the post-commit refresh.
+
+        Args:
+            bind: Engine (or connectable) to write through
+            rows: Column-name -> value dicts; all rows must share the same keys
+        """
+        with bind.begin() as conn:
+            conn.execute(APIUsageAudit.__table__.insert(), rows)
+
     def get_usage_history(
         self,
         db: Session,
@@ -195,10 +410,14 @@ class AuditService:
         end_date: Optional[datetime] = None,
         limit: int = 100,
         offset: int = 0
-    ) -> List[APIUsageAudit]:
+    ) -> Iterable[APIUsageAudit]:
         """
         Get detailed usage history with filters.
 
+        Rows are streamed from a server-side cursor in batches of 500, so the
+        result should be consumed while `db` is still open. Wrap it in
+        `list(...)` if the records are needed after that.
+
         Args:
             db: Database session
             service: Filter by service ('jina' or 'pinecone')
@@ -211,8 +430,10 @@ class AuditService:
             offset: Offset for pagination
 
         Returns:
-            List of audit records
+            Iterable of audit records
         """
+        self.flush(db.get_bind())
+
         query = db.query(APIUsageAudit)
 
         if service:
@@ -231,7 +452,7 @@ class AuditService:
         query = query.order_by(APIUsageAudit.created_at.desc())
         query = query.offset(offset).limit(limit)
 
-        return query.all()
+        return query.execution_options(stream_results=True).yield_per(500)
 
     def get_usage_summary(
         self,
@@ -252,6 +473,8 @@ class AuditService:
         Returns:
             Aggregated usage statistics
         """
+        self.flush(db.get_bind())
+
         query = db.query(APIUsageAudit)
 
         if service:
@@ -272,6 +495,7 @@ class AuditService:
             func.sum(APIUsageAudit.jina_estimated_tokens).label('total_jina_tokens'),
             func.sum(APIUsageAudit.jina_input_chars).label('total_jina_input_chars'),
             func.sum(APIUsageAudit.jina_output_chars).label('total_jina_output_chars'),
+            func.min(APIUsageAudit.jina_rate_limit_remaining).label('min_jina_rate_limit_remaining'),
             # Pinecone aggregations
             func.sum(APIUsageAudit.pinecone_vector_count).label('total_pinecone_vectors'),
             func.sum(APIUsageAudit.pinecone_read_units).label('total_read_units'),
@@ -309,6 +533,7 @@ class AuditService:
                 total_jina_tokens=row.total_jina_tokens,
                 total_jina_input_chars=row.total_jina_input_chars,
                 total_jina_output_chars=row.total_jina_output_chars,
+                min_jina_rate_limit_remaining=row.min_jina_rate_limit_remaining,
                 total_pinecone_vectors=row.total_pinecone_vectors,
                 total_read_units=row.total_read_units,
                 total_write_units=row.total_write_units,
@@ -356,6 +581,8 @@ class AuditService:
         Returns:
             Cost estimate breakdown
         """
+        self.flush(db.get_bind())
+
         # Default to last 30 days if no dates provided
         if not end_date:
             end_date = datetime.utcnow()
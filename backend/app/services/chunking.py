@@ -1,4 +1,5 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from dataclasses import dataclass, field, asdict
 import re
 import logging
 
@@ -6,6 +7,66 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Boundary patterns, compiled once at import
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+_PARAGRAPH_BOUNDARY = re.compile(r'\n\s*\n')
+
+
+@dataclass(slots=True)
+class Chunk:
+    """A piece of text produced by TextChunker."""
+    content: str
+    chunk_index: int
+    start_char: int = -1  # -1 when the method does not track offsets
+    end_char: int = -1
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dictionary."""
+        return asdict(self)
+
+
+def _compute_chunk_offsets(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int
+) -> List[Tuple[int, int]]:
+    """
+    Compute (start, end) offsets for fixed-size chunks with overlap.
+
+    Kept free of any per-chunk object construction so the loop is only
+    integer arithmetic plus a C-level `str.rfind` for the word boundary.
+
+    Args:
+        text: Input text
+        chunk_size: Target chunk size in characters
+        chunk_overlap: Characters shared between consecutive chunks
+
+    Returns:
+        List of (start, end) character offsets
+    """
+    offsets = []
+    append = offsets.append
+    rfind = text.rfind
+    start = 0
+    text_length = len(text)
+
+    while start < text_length:
+        end = start + chunk_size
+
+        # Try to break at word boundary within the last 50 characters
+        if end < text_length:
+            space_pos = rfind(' ', end - 50, end)
+            if space_pos != -1 and space_pos > start:
+                end = space_pos
+
+        append((start, end))
+
+        # Move start position with overlap
+        start = end - chunk_overlap
+
+    return offsets
+
 
 class TextChunker:
     """Chunk text into smaller pieces for embedding."""
@@ -23,7 +84,7 @@ class TextChunker:
         text: str,
         metadata: Dict[str, Any] = None,
         method: str = "fixed"
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Chunk]:
         """
         Chunk text into smaller pieces.
 
@@ -33,7 +94,7 @@ class TextChunker:
             method: Chunking method ('fixed', 'sentence', 'paragraph')
 
         Returns:
-            List of chunk dictionaries with content and metadata
+            List of Chunk objects with content and metadata
         """
         if method == "fixed":
             return self._chunk_fixed_size(text, metadata)
@@ -48,7 +109,7 @@ class TextChunker:
         self,
         text: str,
         metadata: Dict[str, Any] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Chunk]:
         """
         Chunk text into fixed-size pieces with overlap.
 
@@ -60,36 +121,24 @@ class TextChunker:
             List of chunks
         """
         chunks = []
-        start = 0
+        chunk_index = 0
+        chunk_metadata = metadata or {}
         text_length = len(text)
 
-        chunk_index = 0
-        while start < text_length:
-            end = start + self.chunk_size
-
-            # Try to break at word boundary
-            if end < text_length:
-                # Look for space within overlap window
-                space_pos = text.rfind(' ', end - 50, end)
-                if space_pos != -1 and space_pos > start:
-                    end = space_pos
-
-            chunk_text = text[start:end].strip()
-
-            if chunk_text:
-                chunk = {
-                    "content": chunk_text,
-                    "chunk_index": chunk_index,
-                    "start_char": start,
-                    "end_char": end,
-                    "metadata": metadata or {}
-                }
-                chunks.append(chunk)
+        for start, end in _compute_chunk_offsets(text, self.chunk_size, self.chunk_overlap):
+            # Trim surrounding whitespace on the indices so the chunk is
+            # sliced exactly once (same result as text[start:end].strip())
+            lo = start
+            hi = min(end, text_length)
+            while lo < hi and text[lo].isspace():
+                lo += 1
+            while hi > lo and text[hi - 1].isspace():
+                hi -= 1
+
+            if lo < hi:
+                chunks.append(Chunk(text[lo:hi], chunk_index, start, end, chunk_metadata))
                 chunk_index += 1
 
-            # Move start position with overlap
-            start = end - self.chunk_overlap
-
         logger.info(f"Created {len(chunks)} fixed-size chunks")
         return chunks
 
@@ -97,7 +146,7 @@ class TextChunker:
         self,
         text: str,
         metadata: Dict[str, Any] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Chunk]:
         """
         Chunk text by sentences, grouping to approximate chunk size.
 
@@ -109,9 +158,10 @@ class TextChunker:
             List of chunks
         """
         # Simple sentence splitting (can be improved with NLTK/spaCy)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        sentences = _SENTENCE_BOUNDARY.split(text)
 
         chunks = []
+        chunk_metadata = metadata or {}
         current_chunk = []
         current_length = 0
         chunk_index = 0
@@ -122,12 +172,7 @@ class TextChunker:
             if current_length + sentence_length > self.chunk_size and current_chunk:
                 # Create chunk from accumulated sentences
                 chunk_text = ' '.join(current_chunk)
-                chunk = {
-                    "content": chunk_text,
-                    "chunk_index": chunk_index,
-                    "metadata": metadata or {}
-                }
-                chunks.append(chunk)
+                chunks.append(Chunk(chunk_text, chunk_index, metadata=chunk_metadata))
                 chunk_index += 1
 
                 # Start new chunk with overlap (keep last sentence if overlap allows)
@@ -145,12 +190,7 @@ class TextChunker:
         # Add final chunk
         if current_chunk:
             chunk_text = ' '.join(current_chunk)
-            chunk = {
-                "content": chunk_text,
-                "chunk_index": chunk_index,
-                "metadata": metadata or {}
-            }
-            chunks.append(chunk)
+            chunks.append(Chunk(chunk_text, chunk_index, metadata=chunk_metadata))
 
         logger.info(f"Created {len(chunks)} sentence-based chunks")
         return chunks
@@ -159,7 +199,7 @@ class TextChunker:
         self,
         text: str,
         metadata: Dict[str, Any] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Chunk]:
         """
         Chunk text by paragraphs.
 
@@ -171,10 +211,11 @@ class TextChunker:
             List of chunks
         """
         # Split by double newlines or more
-        paragraphs = re.split(r'\n\s*\n', text)
+        paragraphs = _PARAGRAPH_BOUNDARY.split(text)
 
         chunks = []
         chunk_index = 0
+        chunk_metadata = metadata or {}
 
         for paragraph in paragraphs:
             paragraph = paragraph.strip()
@@ -183,18 +224,13 @@ class TextChunker:
 
             # If paragraph is too long, fall back to fixed-size chunking
             if len(paragraph) > self.chunk_size * 1.5:
-                sub_chunks = self._chunk_fixed_size(paragraph, metadata)
+                sub_chunks = self._chunk_fixed_size(paragraph, chunk_metadata)
                 for sub_chunk in sub_chunks:
-                    sub_chunk["chunk_index"] = chunk_index
+                    sub_chunk.chunk_index = chunk_index
                     chunks.append(sub_chunk)
                     chunk_index += 1
             else:
-                chunk = {
-                    "content": paragraph,
-                    "chunk_index": chunk_index,
-                    "metadata": metadata or {}
-                }
-                chunks.append(chunk)
+                chunks.append(Chunk(paragraph, chunk_index, metadata=chunk_metadata))
                 chunk_index += 1
 
         logger.info(f"Created {len(chunks)} paragraph-based chunks")
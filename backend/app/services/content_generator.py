@@ -1,14 +1,26 @@
 """Content generator service for creating white papers, articles, and blogs."""
 
+import os
+import gzip
 import uuid
 import asyncio
+import statistics
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any, Optional, List, AsyncIterator
 from datetime import datetime
+from itertools import chain
+from pathlib import Path
 import logging
 import markdown
-from sqlalchemy import desc
-
-from app.core.database import SessionLocal, GeneratedContent, GenerationJob, GenerationSourceDocument, Document
+from jinja2 import Environment, FileSystemLoader
+from markupsafe import Markup
+from sqlalchemy import desc, func, insert, update
+from sqlalchemy.orm import selectinload, undefer
+
+from app.core.cache import TTLCache, make_key
+from app.core.config import settings
+from app.core.database import engine, SessionLocal, GeneratedContent, GenerationJob, GenerationSourceDocument
 from app.services.llm_service import llm_service
 from app.services.document_selector import document_selector_service
 from app.services.template_service import template_service
@@ -16,13 +28,96 @@ from app.services.audit_service import audit_service
 
 logger = logging.getLogger(__name__)
 
+# Characters of knowledge base context included in each section prompt
+MAX_CONTEXT_CHARS = 8000
+
+# Output token budget per section word: English averages ~1.3 tokens per word
+TOKENS_PER_WORD = 1.4
+TOKEN_BUDGET_PADDING = 32
+
+# Once a model has this many observed tokens-per-word ratios, the section budget
+# uses their 95th percentile (plus 5%) instead of TOKENS_PER_WORD. Padding is
+# kept on top so the cap cannot ratchet down on its own truncations.
+RATIO_MIN_SAMPLES = 100
+_output_token_ratios: Dict[str, deque] = defaultdict(lambda: deque(maxlen=500))
+
+# Chunks retrieved per document for the generation context
+CONTEXT_CHUNKS_PER_DOC = 10
+
+# Retrieved document context, keyed by (document_ids, topic, chunks per doc).
+# Generating several content types from the same sources reuses one search.
+_context_cache = TTLCache(maxsize=256, ttl=settings.generation_context_cache_ttl)
+
+
+def clear_context_cache() -> None:
+    """Drop cached document context; called when documents are re-embedded or deleted."""
+    _context_cache.clear()
+
+# Stylesheet for generated content, served from /static and stored by reference
+_STYLESHEET_URL = "/static/generated-content.css"
+_STYLESHEET_LINK = f'<link rel="stylesheet" href="{_STYLESHEET_URL}">'
+_HTML_STYLES = (
+    "<style>\n"
+    + (Path(__file__).resolve().parent.parent / "static" / "generated-content.css").read_text()
+    + "</style>"
+)
+
+# Compiled once at import; autoescape covers titles and section names, while
+# the stylesheet and rendered markdown are passed in as Markup
+_TEMPLATES = Environment(
+    loader=FileSystemLoader(Path(__file__).resolve().parent.parent / "templates"),
+    autoescape=True,
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True
+)
+_CONTENT_TEMPLATE = _TEMPLATES.get_template("generated_content.html")
+
+# Constructing Markdown loads the extensions and compiles their patterns, so
+# each markdown pool worker builds one on first use and reuses it. Workers run
+# one task at a time, so the instance is never shared between threads.
+_markdown: Optional[markdown.Markdown] = None
+
+
+def _md_to_html(text: str) -> str:
+    """Convert markdown to HTML (runs in a markdown pool worker)."""
+    global _markdown
+    if _markdown is None:
+        _markdown = markdown.Markdown(extensions=['extra', 'codehilite', 'tables'])
+    return _markdown.reset().convert(text)
+
+
+# Markdown rendering (Pygments highlighting in particular) is CPU-bound and
+# holds the GIL, so sections are rendered in worker processes
+_markdown_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_markdown_pool() -> ProcessPoolExecutor:
+    """Get or create the markdown rendering process pool."""
+    global _markdown_pool
+    if _markdown_pool is None:
+        _markdown_pool = ProcessPoolExecutor(
+            max_workers=settings.markdown_render_workers or os.cpu_count()
+        )
+    return _markdown_pool
+
+
+def close_markdown_pool() -> None:
+    """Shut down the markdown rendering process pool."""
+    global _markdown_pool
+    if _markdown_pool:
+        _markdown_pool.shutdown(cancel_futures=True)
+        _markdown_pool = None
+
 
 class ContentGeneratorService:
     """Service for generating content using LLM and knowledge base."""
 
     def __init__(self):
         """Initialize content generator service."""
-        self._active_jobs = {}  # job_id -> job status dict
+        self._active_jobs = {}  # job_id -> live status of running jobs
+        self._progress_channels: Dict[str, List[asyncio.Queue]] = {}  # job_id -> subscriber queues
+        self._job_pks: Dict[str, int] = {}  # job_id -> GenerationJob.id of running jobs
 
     async def start_generation(
         self,
@@ -32,7 +127,8 @@ class ContentGeneratorService:
         llm_provider: str = "anthropic",
         llm_model: Optional[str] = None,
         customization: Optional[Dict[str, Any]] = None,
-        template_id: Optional[int] = None
+        template_id: Optional[int] = None,
+        use_batch_api: bool = False
     ) -> str:
         """
         Start an async content generation job.
@@ -45,12 +141,14 @@ class ContentGeneratorService:
             llm_model: Optional model name
             customization: Customization options
             template_id: Optional template to use
+            use_batch_api: Generate sections through the provider's batch API
+                (cheaper, but can take minutes to complete)
 
         Returns:
             Job ID for tracking
         """
         # Validate documents
-        validation = document_selector_service.validate_document_ids(document_ids)
+        validation = await document_selector_service.validate_document_ids(document_ids)
         if not validation["valid"]:
             raise ValueError("No valid documents provided")
 
@@ -74,6 +172,9 @@ class ContentGeneratorService:
             db.add(job)
             db.commit()
 
+            # Later status writes update the row by primary key
+            self._job_pks[job_id] = job.id
+
             logger.info(f"Created generation job: {job_id}")
 
         finally:
@@ -82,7 +183,7 @@ class ContentGeneratorService:
         # Start generation in background
         asyncio.create_task(self._run_generation(
             job_id, topic, content_type, validation["valid"],
-            llm_provider, llm_model, customization, template_id
+            llm_provider, llm_model, customization, template_id, use_batch_api
         ))
 
         return job_id
@@ -96,7 +197,8 @@ class ContentGeneratorService:
         llm_provider: str,
         llm_model: Optional[str],
         customization: Optional[Dict[str, Any]],
-        template_id: Optional[int]
+        template_id: Optional[int],
+        use_batch_api: bool = False
     ) -> None:
         """
         Run the content generation process (background task).
@@ -107,9 +209,13 @@ class ContentGeneratorService:
 
             # Step 1: Gather context from documents (10%)
             self._update_job_status(job_id, "processing", 10, "Gathering context from documents...")
-            context = await document_selector_service.get_document_context(
-                document_ids, topic, max_chunks_per_doc=10
-            )
+            cache_key = make_key(sorted(document_ids), topic, CONTEXT_CHUNKS_PER_DOC)
+            context = _context_cache.get(cache_key)
+            if context is None:
+                context = await document_selector_service.get_document_context(
+                    document_ids, topic, max_chunks_per_doc=CONTEXT_CHUNKS_PER_DOC
+                )
+                _context_cache.set(cache_key, context)
 
             # Step 2: Load template (20%)
             self._update_job_status(job_id, "processing", 20, "Loading template...")
@@ -125,12 +231,12 @@ class ContentGeneratorService:
             self._update_job_status(job_id, "processing", 30, "Generating content...")
             content_data = await self._generate_content(
                 job_id, topic, content_type, context, template,
-                llm_provider, llm_model, customization
+                llm_provider, llm_model, customization, use_batch_api
             )
 
             # Step 4: Format as HTML (90%)
             self._update_job_status(job_id, "processing", 90, "Formatting content...")
-            html_content = self._format_as_html(
+            html_content = await self._format_as_html(
                 content_data, content_type, customization
             )
 
@@ -159,7 +265,8 @@ class ContentGeneratorService:
         template: Dict[str, Any],
         llm_provider: str,
         llm_model: Optional[str],
-        customization: Optional[Dict[str, Any]]
+        customization: Optional[Dict[str, Any]],
+        use_batch_api: bool = False
     ) -> Dict[str, Any]:
         """
         Generate content using LLM with the given context and template.
@@ -171,62 +278,195 @@ class ContentGeneratorService:
         template_structure = template["template_structure"]
         sections = template_structure.get("sections", [])
 
-        # Build context string from documents
-        context_text = self._build_context_text(context)
+        # Loop-invariant prompt pieces, built once per job
+        context_text = self._build_context_text(context, MAX_CONTEXT_CHARS)
+        system_prompt = self._build_system_prompt(content_type, customization)
 
-        # Generate title first
-        title = await self._generate_title(
-            topic, content_type, llm_provider, llm_model
+        # Generate title first (always on the cheap model)
+        title, title_usage, title_model = await self._generate_title(
+            topic, content_type, llm_provider
         )
 
-        # Generate each section
+        if use_batch_api:
+            generated_sections, total_tokens = await self._generate_sections_batch(
+                job_id, topic, sections, context_text, system_prompt,
+                llm_provider, llm_model
+            )
+        else:
+            generated_sections, total_tokens = await self._generate_sections(
+                job_id, topic, sections, context_text, system_prompt,
+                llm_provider, llm_model
+            )
+        self._add_usage(total_tokens, title_model, title_usage)
+
+        return {
+            "title": title,
+            "sections": generated_sections,
+            "token_usage": total_tokens,
+            "style": template_structure.get("style", "professional"),
+            "tone": template_structure.get("tone", "neutral"),
+        }
+
+    async def _generate_sections(
+        self,
+        job_id: str,
+        topic: str,
+        sections: List[Dict[str, Any]],
+        context_text: str,
+        system_prompt: str,
+        llm_provider: str,
+        llm_model: Optional[str]
+    ) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Generate sections through the synchronous LLM endpoint.
+
+        Returns:
+            Tuple of (generated_sections, token_totals)
+        """
+        # Generate sections in concurrent waves. Sections within a wave run in
+        # parallel; each wave sees the sections written by earlier waves.
         generated_sections = []
         total_sections = len(sections)
-        total_tokens = {"input": 0, "output": 0}
+        total_tokens = {"input": 0, "output": 0, "by_model": {}}
+        concurrency = max(1, settings.generation_section_concurrency)
+        completed = 0
+
+        async def generate(section_template, previous_context):
+            nonlocal completed
+            try:
+                result = await self._generate_section(
+                    topic, section_template, context_text, system_prompt,
+                    previous_context, llm_provider, llm_model
+                )
+            except Exception as e:
+                # Optional sections are dropped rather than failing the whole job
+                if section_template.get("required", False):
+                    raise
+                logger.warning(f"Skipping optional section {section_template['name']}: {str(e)}")
+                result = None
+
+            # Update progress (30-90%) as each section finishes
+            completed += 1
+            progress = 30 + int((completed / total_sections) * 60)
+            self._update_job_status(
+                job_id, "processing", progress,
+                f"Generated section: {section_template['name']}"
+            )
+            return result
+
+        for wave_start in range(0, total_sections, concurrency):
+            wave = sections[wave_start:wave_start + concurrency]
+            # Rendered once per wave and shared by its sections
+            previous_context = self._format_previous_sections(generated_sections[-2:])
+
+            results = await asyncio.gather(*[
+                generate(section_template, previous_context)
+                for section_template in wave
+            ])
+
+            for section_template, result in zip(wave, results):
+                if result is None:
+                    continue
 
+                section_content, usage, model = result
+                generated_sections.append({
+                    "name": section_template["name"],
+                    "content": section_content,
+                    "required": section_template.get("required", False)
+                })
+
+                # Track token usage
+                self._add_usage(total_tokens, model, usage)
+
+        return generated_sections, total_tokens
+
+    async def _generate_sections_batch(
+        self,
+        job_id: str,
+        topic: str,
+        sections: List[Dict[str, Any]],
+        context_text: str,
+        system_prompt: str,
+        llm_provider: str,
+        llm_model: Optional[str]
+    ) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Generate all sections in one provider batch request.
+
+        Sections are submitted together, so none of them sees previously
+        written sections as context.
+
+        Returns:
+            Tuple of (generated_sections, token_totals)
+        """
+        model = llm_model or llm_service.get_default_model(llm_provider)
+
+        requests = []
         for i, section_template in enumerate(sections):
-            # Update progress (30-90%)
-            progress = 30 + int((i / total_sections) * 60)
+            prompt = self._build_section_prompt(
+                topic, section_template, context_text, ""
+            )
+            requests.append({
+                "custom_id": f"section-{i}",
+                "prompt": prompt,
+                "system_prompt": system_prompt,
+                "temperature": 0.7,
+                "max_tokens": self._section_max_tokens(model, section_template),
+            })
+
+        def on_progress(completed: int, total: int) -> None:
+            progress = 30 + int((completed / max(total, 1)) * 60)
             self._update_job_status(
                 job_id, "processing", progress,
-                f"Generating section: {section_template['name']}..."
+                f"Batch generation: {completed}/{total} sections complete"
             )
 
-            # Generate section
-            section_content, usage = await self._generate_section(
-                topic, content_type, section_template, context_text,
-                generated_sections, llm_provider, llm_model, customization
-            )
+        results = await llm_service.generate_batch(
+            requests, provider=llm_provider, model=model, on_progress=on_progress
+        )
+
+        generated_sections = []
+        total_tokens = {"input": 0, "output": 0, "by_model": {}}
+
+        for request, section_template in zip(requests, sections):
+            result = results.get(request["custom_id"])
+            if result is None:
+                raise ValueError(f"Batch generation failed for section: {section_template['name']}")
+
+            self._record_output_ratio(model, section_template["name"], result)
 
             generated_sections.append({
                 "name": section_template["name"],
-                "content": section_content,
+                "content": result["content"],
                 "required": section_template.get("required", False)
             })
 
-            # Track token usage
-            total_tokens["input"] += usage["input_tokens"]
-            total_tokens["output"] += usage["output_tokens"]
+            self._add_usage(total_tokens, result["model"], result["usage"], batch=True)
 
-            # Add small delay to avoid rate limits
-            await asyncio.sleep(0.5)
+            await audit_service.log_llm_usage(
+                provider=llm_provider,
+                model=result["model"],
+                operation="content_generation_section_batch",
+                input_tokens=result["usage"]["input_tokens"],
+                output_tokens=result["usage"]["output_tokens"],
+                status="success",
+                batch=True
+            )
 
-        return {
-            "title": title,
-            "sections": generated_sections,
-            "token_usage": total_tokens,
-            "style": template_structure.get("style", "professional"),
-            "tone": template_structure.get("tone", "neutral"),
-        }
+        return generated_sections, total_tokens
 
     async def _generate_title(
         self,
         topic: str,
         content_type: str,
-        llm_provider: str,
-        llm_model: Optional[str]
-    ) -> str:
-        """Generate a title for the content."""
+        llm_provider: str
+    ) -> tuple[str, Dict[str, int], str]:
+        """
+        Generate a title for the content using the provider's cheap model.
+
+        Returns:
+            Tuple of (title, token_usage, model)
+        """
         prompt = f"""Generate a compelling, professional title for a {content_type} about the following topic:
 
 Topic: {topic}
@@ -239,43 +479,124 @@ Requirements:
 
 Return only the title, nothing else."""
 
-        result = await llm_service.generate(
+        result = await llm_service.generate_cheap(
             prompt=prompt,
             provider=llm_provider,
-            model=llm_model,
             temperature=0.7,
             max_tokens=100
         )
 
         title = result["content"].strip().strip('"\'')
-        return title
+        return title, result["usage"], result["model"]
 
     async def _generate_section(
         self,
         topic: str,
-        content_type: str,
         section_template: Dict[str, Any],
         context_text: str,
-        previous_sections: List[Dict[str, Any]],
+        system_prompt: str,
+        previous_context: str,
         llm_provider: str,
-        llm_model: Optional[str],
-        customization: Optional[Dict[str, Any]]
-    ) -> tuple[str, Dict[str, int]]:
+        llm_model: Optional[str]
+    ) -> tuple[str, Dict[str, int], str]:
         """
         Generate a single section.
 
+        Sections marked `"complexity": "simple"` in the template (summaries,
+        conclusions, reference lists) are routed to the provider's cheap model.
+
         Returns:
-            Tuple of (section_content, token_usage)
+            Tuple of (section_content, token_usage, model)
         """
-        # Normalize customization to avoid NoneType errors
-        customization = customization or {}
+        prompt = self._build_section_prompt(
+            topic, section_template, context_text, previous_context
+        )
 
-        section_name = section_template["name"]
-        section_prompt = section_template["prompt"]
+        if section_template.get("complexity", "normal") == "simple":
+            llm_model = llm_service.get_cheap_model(llm_provider)
+        else:
+            llm_model = llm_model or llm_service.get_default_model(llm_provider)
+
+        # Generate section
+        result = await llm_service.generate(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            provider=llm_provider,
+            model=llm_model,
+            temperature=0.7,
+            max_tokens=self._section_max_tokens(llm_model, section_template)
+        )
+        self._record_output_ratio(llm_model, section_template["name"], result)
+
+        # Track usage for audit
+        await audit_service.log_llm_usage(
+            provider=llm_provider,
+            model=result["model"],
+            operation="content_generation_section",
+            input_tokens=result["usage"]["input_tokens"],
+            output_tokens=result["usage"]["output_tokens"],
+            status="success"
+        )
+
+        return result["content"], result["usage"], result["model"]
+
+    @staticmethod
+    def _section_max_tokens(model: str, section_template: Dict[str, Any]) -> int:
+        """Output token budget for a section, tightened by the model's observed ratio."""
         max_words = section_template.get("max_words", 500)
 
-        # Build system prompt
-        system_prompt = f"""You are an expert content writer creating a {content_type}.
+        ratios = _output_token_ratios.get(model)
+        if ratios is not None and len(ratios) >= RATIO_MIN_SAMPLES:
+            p95 = statistics.quantiles(ratios, n=20)[-1]
+            return int(max_words * p95 * 1.05) + TOKEN_BUDGET_PADDING
+
+        return int(max_words * TOKENS_PER_WORD) + TOKEN_BUDGET_PADDING
+
+    @staticmethod
+    def _record_output_ratio(model: str, section_name: str, result: Dict[str, Any]) -> None:
+        """Record a section's output tokens per word, or warn if it was truncated."""
+        if result.get("stop_reason") in ("max_tokens", "length"):
+            # Truncated output would understate the ratio, so it is not recorded
+            logger.warning(
+                f"Section {section_name} hit the max_tokens limit on {model} "
+                f"({result['usage']['output_tokens']} tokens)"
+            )
+            return
+
+        words = len(result["content"].split())
+        if words:
+            _output_token_ratios[model].append(result["usage"]["output_tokens"] / words)
+
+    @staticmethod
+    def _add_usage(
+        total_tokens: Dict[str, Any],
+        model: str,
+        usage: Dict[str, int],
+        batch: bool = False
+    ) -> None:
+        """
+        Accumulate token usage overall and per model.
+
+        Batch API tokens are also counted under the model's batch_input and
+        batch_output, so they can be costed at the batch discount.
+        """
+        total_tokens["input"] += usage["input_tokens"]
+        total_tokens["output"] += usage["output_tokens"]
+
+        model_tokens = total_tokens["by_model"].setdefault(model, {"input": 0, "output": 0})
+        model_tokens["input"] += usage["input_tokens"]
+        model_tokens["output"] += usage["output_tokens"]
+        if batch:
+            model_tokens["batch_input"] = model_tokens.get("batch_input", 0) + usage["input_tokens"]
+            model_tokens["batch_output"] = model_tokens.get("batch_output", 0) + usage["output_tokens"]
+
+    @staticmethod
+    def _build_system_prompt(content_type: str, customization: Optional[Dict[str, Any]]) -> str:
+        """Build the system prompt shared by every section of a job."""
+        # Normalize customization to avoid NoneType errors
+        customization = customization or {}
+
+        return f"""You are an expert content writer creating a {content_type}.
 
 Style: {customization.get('style', 'professional')}
 Tone: {customization.get('tone', 'neutral')}
@@ -284,13 +605,39 @@ Target Audience: {customization.get('audience', 'general')}
 Use the provided context from knowledge base documents to create accurate, well-researched content.
 Cite sources naturally when using specific information."""
 
-        # Build section generation prompt
-        previous_context = ""
-        if previous_sections:
-            previous_context = "\n\nPreviously written sections:\n" + "\n".join([
-                f"**{s['name']}**\n{s['content'][:200]}..."
-                for s in previous_sections[-2:]  # Include last 2 sections for context
-            ])
+    @staticmethod
+    def _format_previous_sections(previous_sections: List[Dict[str, Any]]) -> str:
+        """Render the previously written sections passed to the next prompts."""
+        if not previous_sections:
+            return ""
+
+        return "\n\nPreviously written sections:\n" + "\n".join(
+            f"**{s['name']}**\n{s['content'][:200]}..."
+            for s in previous_sections
+        )
+
+    def _build_section_prompt(
+        self,
+        topic: str,
+        section_template: Dict[str, Any],
+        context_text: str,
+        previous_context: str
+    ) -> str:
+        """
+        Build the user prompt for a single section.
+
+        Args:
+            topic: Main topic
+            section_template: Section definition from the template
+            context_text: Knowledge base context, already truncated
+            previous_context: Output of _format_previous_sections()
+
+        Returns:
+            The section prompt
+        """
+        section_name = section_template["name"]
+        section_prompt = section_template["prompt"]
+        max_words = section_template.get("max_words", 500)
 
         prompt = f"""**Section:** {section_name}
 
@@ -301,49 +648,56 @@ Cite sources naturally when using specific information."""
 **Main Topic:** {topic}
 
 **Context from Knowledge Base:**
-{context_text[:8000]}  # Limit context to avoid token limits
+{context_text}  # Limit context to avoid token limits
 {previous_context}
 
 Now write the "{section_name}" section. Write in markdown format. Be specific, detailed, and use information from the context."""
 
-        # Generate section
-        result = await llm_service.generate(
-            prompt=prompt,
-            system_prompt=system_prompt,
-            provider=llm_provider,
-            model=llm_model,
-            temperature=0.7,
-            max_tokens=max_words * 2  # Rough estimate: 1 token ≈ 0.75 words
-        )
+        return prompt
 
-        # Track usage for audit
-        await audit_service.log_llm_usage(
-            provider=llm_provider,
-            model=result["model"],
-            operation="content_generation_section",
-            input_tokens=result["usage"]["input_tokens"],
-            output_tokens=result["usage"]["output_tokens"],
-            status="success"
-        )
+    def _build_context_text(
+        self,
+        context: Dict[int, List[str]],
+        max_chars: Optional[int] = None
+    ) -> str:
+        """
+        Build context text from document chunks.
+
+        Args:
+            context: Dict of document_id -> chunk texts
+            max_chars: Truncate the result to this many characters
 
-        return result["content"], result["usage"]
+        Returns:
+            Context text
+        """
+        parts = chain.from_iterable(
+            (
+                f"[Source Document {doc_id}]",
+                *(f"Chunk {i}: {chunk}\n" for i, chunk in enumerate(chunks, 1))
+            )
+            for doc_id, chunks in context.items()
+        )
 
-    def _build_context_text(self, context: Dict[int, List[str]]) -> str:
-        """Build context text from document chunks."""
-        context_parts = []
+        if max_chars is None:
+            return "\n\n".join(parts)
 
-        for doc_id, chunks in context.items():
-            context_parts.append(f"[Source Document {doc_id}]")
-            for i, chunk in enumerate(chunks):
-                context_parts.append(f"Chunk {i+1}: {chunk}\n")
+        # Stop formatting chunks once the limit is reached; they would be cut anyway
+        selected = []
+        length = 0
+        for part in parts:
+            length += len(part) + (2 if selected else 0)
+            selected.append(part)
+            if length >= max_chars:
+                break
 
-        return "\n\n".join(context_parts)
+        return "\n\n".join(selected)[:max_chars]
 
-    def _format_as_html(
+    async def _format_as_html(
         self,
         content_data: Dict[str, Any],
         content_type: str,
-        customization: Optional[Dict[str, Any]]
+        customization: Optional[Dict[str, Any]],
+        inline_css: bool = False
     ) -> str:
         """
         Format generated content as HTML.
@@ -352,6 +706,8 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
             content_data: Generated content with title and sections
             content_type: Type of content
             customization: Customization options
+            inline_css: Embed the stylesheet instead of linking to it, for
+                self-contained exports
 
         Returns:
             HTML string
@@ -359,187 +715,31 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
         # Normalize customization to avoid NoneType errors
         customization = customization or {}
 
-        html_parts = []
-
-        # Add CSS (will be extracted to separate file later)
-        html_parts.append(self._get_html_styles(content_type))
-
-        # Start content wrapper
-        html_parts.append('<div class="generated-content">')
-
-        # Add title
-        html_parts.append(f'<h1 class="content-title">{content_data["title"]}</h1>')
-
-        # Add metadata
-        html_parts.append(f'<div class="content-meta">')
-        html_parts.append(f'<span class="content-type">{content_type.capitalize()}</span>')
-        html_parts.append(f'<span class="content-date">{datetime.now().strftime("%B %d, %Y")}</span>')
-        html_parts.append('</div>')
-
-        # Add table of contents if requested
-        if customization.get("include_executive_summary"):
-            html_parts.append('<div class="toc">')
-            html_parts.append('<h2>Table of Contents</h2>')
-            html_parts.append('<ul>')
-            for section in content_data["sections"]:
-                section_id = section["name"].lower().replace(" ", "-")
-                html_parts.append(f'<li><a href="#{section_id}">{section["name"]}</a></li>')
-            html_parts.append('</ul>')
-            html_parts.append('</div>')
-
-        # Add sections
-        for section in content_data["sections"]:
-            section_id = section["name"].lower().replace(" ", "-")
-            html_parts.append(f'<section id="{section_id}" class="content-section">')
-            html_parts.append(f'<h2 class="section-title">{section["name"]}</h2>')
-
-            # Convert markdown to HTML
-            section_html = markdown.markdown(
-                section["content"],
-                extensions=['extra', 'codehilite', 'tables']
-            )
-            html_parts.append(f'<div class="section-content">{section_html}</div>')
-            html_parts.append('</section>')
-
-        # Close content wrapper
-        html_parts.append('</div>')
-
-        return "\n".join(html_parts)
-
-    def _get_html_styles(self, content_type: str) -> str:
-        """Get CSS styles for HTML content."""
-        # This is a basic style - will be enhanced with proper CSS files later
-        return """<style>
-.generated-content {
-    max-width: 900px;
-    margin: 0 auto;
-    padding: 40px 20px;
-    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-    line-height: 1.6;
-    color: #333;
-}
-
-.content-title {
-    font-size: 2.5rem;
-    font-weight: 700;
-    margin-bottom: 1rem;
-    color: #1a1a1a;
-    line-height: 1.2;
-}
-
-.content-meta {
-    display: flex;
-    gap: 1rem;
-    margin-bottom: 2rem;
-    padding-bottom: 1rem;
-    border-bottom: 2px solid #e0e0e0;
-    font-size: 0.9rem;
-    color: #666;
-}
-
-.content-type {
-    text-transform: uppercase;
-    font-weight: 600;
-    color: #0066cc;
-}
-
-.toc {
-    background: #f8f9fa;
-    padding: 1.5rem;
-    border-radius: 8px;
-    margin-bottom: 2rem;
-}
-
-.toc h2 {
-    margin-top: 0;
-    font-size: 1.3rem;
-}
-
-.toc ul {
-    list-style: none;
-    padding-left: 0;
-}
-
-.toc li {
-    margin: 0.5rem 0;
-}
-
-.toc a {
-    color: #0066cc;
-    text-decoration: none;
-}
-
-.toc a:hover {
-    text-decoration: underline;
-}
-
-.content-section {
-    margin-bottom: 3rem;
-}
-
-.section-title {
-    font-size: 1.8rem;
-    font-weight: 600;
-    margin-bottom: 1rem;
-    color: #2c3e50;
-    border-left: 4px solid #0066cc;
-    padding-left: 1rem;
-}
-
-.section-content {
-    font-size: 1.05rem;
-    line-height: 1.7;
-}
-
-.section-content p {
-    margin-bottom: 1rem;
-}
-
-.section-content ul, .section-content ol {
-    margin-bottom: 1rem;
-    padding-left: 2rem;
-}
-
-.section-content li {
-    margin-bottom: 0.5rem;
-}
-
-.section-content h3 {
-    font-size: 1.3rem;
-    margin-top: 1.5rem;
-    margin-bottom: 0.8rem;
-    color: #34495e;
-}
-
-.section-content code {
-    background: #f4f4f4;
-    padding: 0.2rem 0.4rem;
-    border-radius: 3px;
-    font-family: 'Courier New', monospace;
-    font-size: 0.9rem;
-}
-
-.section-content pre {
-    background: #f4f4f4;
-    padding: 1rem;
-    border-radius: 5px;
-    overflow-x: auto;
-}
-
-.section-content blockquote {
-    border-left: 4px solid #ddd;
-    padding-left: 1rem;
-    margin-left: 0;
-    font-style: italic;
-    color: #555;
-}
-
-@media print {
-    .generated-content {
-        max-width: 100%;
-    }
-}
-</style>"""
+        # Section anchors are shared by the table of contents and the sections
+        sections = [
+            {"name": section["name"], "id": section["name"].lower().replace(" ", "-")}
+            for section in content_data["sections"]
+        ]
+
+        # Convert markdown to HTML in the process pool, all sections at once
+        loop = asyncio.get_running_loop()
+        pool = get_markdown_pool()
+        sections_html = await asyncio.gather(*[
+            loop.run_in_executor(pool, _md_to_html, section["content"])
+            for section in content_data["sections"]
+        ])
+        for section, section_html in zip(sections, sections_html):
+            section["html"] = Markup(section_html)
+
+        return _CONTENT_TEMPLATE.render(
+            # Link the shared stylesheet rather than storing a copy per document
+            stylesheet=Markup(_HTML_STYLES if inline_css else _STYLESHEET_LINK),
+            title=content_data["title"],
+            content_type=content_type.capitalize(),
+            date=datetime.now().strftime("%B %d, %Y"),
+            include_toc=customization.get("include_executive_summary"),
+            sections=sections
+        )
 
     def _save_generated_content(
         self,
@@ -563,19 +763,26 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
             # Normalize customization to avoid NoneType errors
             customization = customization or {}
 
-            # Calculate cost
-            cost_estimate = llm_service.estimate_cost(
-                content_data["token_usage"]["input"],
-                content_data["token_usage"]["output"],
-                llm_provider,
-                llm_model
-            )
+            # Calculate cost per model, since cheap-routed steps bill differently,
+            # with batch API tokens at the batch discount
+            cost_estimate = 0.0
+            for model, tokens in content_data["token_usage"]["by_model"].items():
+                batch_input = tokens.get("batch_input", 0)
+                batch_output = tokens.get("batch_output", 0)
+                cost_estimate += llm_service.estimate_cost(
+                    tokens["input"] - batch_input, tokens["output"] - batch_output,
+                    llm_provider, model
+                )
+                if batch_input or batch_output:
+                    cost_estimate += llm_service.estimate_cost(
+                        batch_input, batch_output, llm_provider, model, batch=True
+                    )
 
             # Create generated content record
             content = GeneratedContent(
                 title=content_data["title"],
                 content_type=content_type,
-                content_html=html_content,
+                content_html_gz=gzip.compress(html_content.encode("utf-8")),
                 content_markdown=None,  # Could add markdown conversion later
                 topic=topic,
                 llm_provider=llm_provider,
@@ -594,17 +801,21 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
             if not content.id:
                 raise ValueError("Failed to get content ID after commit")
 
-            # Create source document links
-            for doc_id in document_ids:
-                source_link = GenerationSourceDocument(
-                    generation_id=content.id,
-                    document_id=doc_id,
-                    relevance_score=None,  # Could add relevance scores later
-                    chunks_used=None
+            # Create source document links in a single multi-row INSERT
+            if document_ids:
+                db.execute(
+                    insert(GenerationSourceDocument),
+                    [
+                        {
+                            "generation_id": content.id,
+                            "document_id": doc_id,
+                            "relevance_score": None,  # Could add relevance scores later
+                            "chunks_used": None
+                        }
+                        for doc_id in document_ids
+                    ]
                 )
-                db.add(source_link)
-
-            db.commit()
+                db.commit()
 
             logger.info(f"Saved generated content: {content.id}")
             return content.id
@@ -624,44 +835,75 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
         message: str,
         result_id: Optional[int] = None
     ) -> None:
-        """Update job status in database."""
-        db = SessionLocal()
-        try:
-            job = db.query(GenerationJob).filter(
-                GenerationJob.job_id == job_id
-            ).first()
+        """
+        Publish a job status update.
 
-            if job:
-                job.status = status
-                job.progress_percent = progress
-                job.current_step = message
+        Every update goes to the in-memory status and to any stream_status()
+        subscribers. Only the first update of a job and terminal states
+        (completed, failed) are written to the database.
+        """
+        update = {
+            "job_id": job_id,
+            "status": status,
+            "progress_percent": progress,
+            "current_step": message,
+            "result_id": result_id,
+            "error_message": message if status == "failed" else None,
+        }
 
-                if status == "processing" and job.started_at is None:
-                    job.started_at = datetime.now()
+        is_first = job_id not in self._active_jobs
+        is_terminal = status in ["completed", "failed"]
 
-                if status in ["completed", "failed"]:
-                    job.completed_at = datetime.now()
-                    if result_id:
-                        job.result_id = result_id
+        self._active_jobs[job_id] = update
+        for queue in self._progress_channels.get(job_id, []):
+            queue.put_nowait(update)
 
-                if status == "failed":
-                    job.error_message = message
+        if is_first or is_terminal:
+            self._persist_job_status(job_id, status, progress, message, result_id)
 
-                db.commit()
+        if is_terminal:
+            self._active_jobs.pop(job_id, None)
+
+    def _persist_job_status(
+        self,
+        job_id: str,
+        status: str,
+        progress: int,
+        message: str,
+        result_id: Optional[int] = None
+    ) -> None:
+        """Write job status to the database with a single UPDATE."""
+        values = {
+            "status": status,
+            "progress_percent": progress,
+            "current_step": message,
+        }
+
+        if status == "processing":
+            values["started_at"] = func.coalesce(GenerationJob.started_at, datetime.now())
+
+        if status in ["completed", "failed"]:
+            values["completed_at"] = datetime.now()
+            if result_id:
+                values["result_id"] = result_id
+
+        if status == "failed":
+            values["error_message"] = message
 
-                # Update in-memory cache for streaming
-                self._active_jobs[job_id] = {
-                    "status": status,
-                    "progress": progress,
-                    "message": message,
-                    "result_id": result_id
-                }
+        job_pk = self._job_pks.get(job_id)
+        if job_pk is not None:
+            statement = update(GenerationJob).where(GenerationJob.id == job_pk)
+        else:
+            statement = update(GenerationJob).where(GenerationJob.job_id == job_id)
 
+        try:
+            with engine.begin() as conn:
+                conn.execute(statement.values(**values))
         except Exception as e:
             logger.error(f"Failed to update job status: {e}")
-            db.rollback()
-        finally:
-            db.close()
+
+        if status in ["completed", "failed"]:
+            self._job_pks.pop(job_id, None)
 
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Get current status of a generation job."""
@@ -674,7 +916,7 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
             if not job:
                 return None
 
-            return {
+            status = {
                 "job_id": job.job_id,
                 "status": job.status,
                 "progress_percent": job.progress_percent,
@@ -689,22 +931,105 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
         finally:
             db.close()
 
-    def get_generated_content(self, content_id: int, include_sources: bool = True) -> Optional[Dict[str, Any]]:
-        """Get generated content by ID."""
+        # Progress of running jobs is only kept in memory
+        live = self._active_jobs.get(job_id)
+        if live:
+            status.update(live)
+
+        return status
+
+    async def stream_status(
+        self,
+        job_id: str,
+        refresh_interval: float = 15.0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream status updates for a job until it completes or fails.
+
+        Yields the current status first, then each update published by
+        _update_job_status. If nothing arrives within `refresh_interval`
+        seconds the status is re-read from the database, which also covers
+        jobs running in another worker process.
+
+        Args:
+            job_id: Job ID to follow
+            refresh_interval: Seconds to wait for an update before re-reading
+
+        Yields:
+            Status dicts shaped like get_job_status(); nothing if the job
+            does not exist
+        """
+        # Subscribe before reading the snapshot so no update is missed
+        queue: asyncio.Queue = asyncio.Queue()
+        self._progress_channels.setdefault(job_id, []).append(queue)
+
+        try:
+            status = self.get_job_status(job_id)
+            if status is None:
+                return
+
+            while True:
+                yield status
+                if status["status"] in ["completed", "failed"]:
+                    return
+
+                try:
+                    update = await asyncio.wait_for(queue.get(), timeout=refresh_interval)
+                    status = {**status, **update}
+                except asyncio.TimeoutError:
+                    status = self.get_job_status(job_id)
+                    if status is None:
+                        return
+
+        finally:
+            subscribers = self._progress_channels.get(job_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                self._progress_channels.pop(job_id, None)
+
+    def get_generated_content(
+        self,
+        content_id: int,
+        include_sources: bool = True,
+        inline_css: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get generated content by ID.
+
+        Args:
+            content_id: Generated content ID
+            include_sources: Include source document details
+            inline_css: Swap the stylesheet link for the embedded styles, so the
+                HTML renders outside the API origin (copy, download, export)
+        """
         db = SessionLocal()
         try:
-            content = db.query(GeneratedContent).filter(
-                GeneratedContent.id == content_id
-            ).first()
+            query = db.query(GeneratedContent).options(
+                undefer(GeneratedContent.content_html),
+                undefer(GeneratedContent.content_html_gz)
+            )
+            if include_sources:
+                # Source links and their documents load in one extra query
+                query = query.options(
+                    selectinload(GeneratedContent.source_documents)
+                    .joinedload(GenerationSourceDocument.document)
+                )
+
+            content = query.filter(GeneratedContent.id == content_id).first()
 
             if not content:
                 return None
 
+            content_html = self._stored_html(content)
+            if inline_css and content_html.startswith(_STYLESHEET_LINK):
+                content_html = _HTML_STYLES + content_html[len(_STYLESHEET_LINK):]
+
             result = {
                 "id": content.id,
                 "title": content.title,
                 "content_type": content.content_type,
-                "content_html": content.content_html,
+                "content_html": content_html,
                 "content_markdown": content.content_markdown,
                 "topic": content.topic,
                 "llm_provider": content.llm_provider,
@@ -718,22 +1043,15 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
             }
 
             if include_sources:
-                # Get source documents
-                source_links = db.query(GenerationSourceDocument).filter(
-                    GenerationSourceDocument.generation_id == content_id
-                ).all()
-
-                doc_ids = [link.document_id for link in source_links]
-                documents = db.query(Document).filter(Document.id.in_(doc_ids)).all()
-
                 result["source_documents"] = [
                     {
-                        "document_id": doc.id,
-                        "filename": doc.filename,
-                        "industry": doc.industry,
-                        "author": doc.author,
+                        "document_id": link.document.id,
+                        "filename": link.document.filename,
+                        "industry": link.document.industry,
+                        "author": link.document.author,
                     }
-                    for doc in documents
+                    for link in content.source_documents
+                    if link.document is not None
                 ]
 
             return result
@@ -741,6 +1059,41 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
         finally:
             db.close()
 
+    def get_generated_content_html_gz(self, content_id: int) -> Optional[bytes]:
+        """
+        Get the stored HTML of generated content, gzip-compressed.
+
+        Compressed rows are returned without being decompressed, so the API
+        can send them as-is with `Content-Encoding: gzip`.
+
+        Returns:
+            Gzip-compressed HTML, or None if the content does not exist
+        """
+        db = SessionLocal()
+        try:
+            row = db.query(
+                GeneratedContent.content_html_gz,
+                GeneratedContent.content_html
+            ).filter(GeneratedContent.id == content_id).first()
+
+            if not row:
+                return None
+
+            if row.content_html_gz is not None:
+                return row.content_html_gz
+
+            return gzip.compress((row.content_html or "").encode("utf-8"))
+
+        finally:
+            db.close()
+
+    @staticmethod
+    def _stored_html(content: GeneratedContent) -> str:
+        """Decode the HTML of a content row, compressed or not."""
+        if content.content_html_gz is not None:
+            return gzip.decompress(content.content_html_gz).decode("utf-8")
+        return content.content_html or ""
+
     def list_generated_content(
         self,
         content_type: Optional[str] = None,
@@ -750,17 +1103,36 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
         """List generated content with pagination."""
         db = SessionLocal()
         try:
-            query = db.query(GeneratedContent)
+            # Only the listed columns are selected, never the content blobs or JSON
+            # params; the total comes back with the page through COUNT(*) OVER ()
+            query = db.query(
+                GeneratedContent.id,
+                GeneratedContent.title,
+                GeneratedContent.content_type,
+                GeneratedContent.topic,
+                GeneratedContent.llm_provider,
+                GeneratedContent.llm_model,
+                GeneratedContent.status,
+                GeneratedContent.cost_estimate,
+                GeneratedContent.created_at,
+                func.count().over().label("total")
+            )
 
             if content_type:
                 query = query.filter(GeneratedContent.content_type == content_type)
 
-            total = query.count()
-
-            content_list = query.order_by(
+            rows = query.order_by(
                 desc(GeneratedContent.created_at)
             ).offset(offset).limit(limit).all()
 
+            if rows:
+                total = rows[0].total
+            elif offset:
+                # Page past the end: no row to carry the total
+                total = query.with_entities(func.count(GeneratedContent.id)).scalar()
+            else:
+                total = 0
+
             return {
                 "content": [
                     {
@@ -774,7 +1146,7 @@ Now write the "{section_name}" section. Write in markdown format. Be specific, d
                         "cost_estimate": c.cost_estimate,
                         "created_at": c.created_at.isoformat(),
                     }
-                    for c in content_list
+                    for c in rows
                 ],
                 "total": total,
                 "page": offset // limit + 1,
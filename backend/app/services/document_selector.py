@@ -1,16 +1,39 @@
 """Document selector service for AI-powered document suggestion."""
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import json
 import logging
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, select
 
-from app.core.database import SessionLocal, Document
+from app.core.cache import TTLCache, make_key
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Document, chunked
 from app.core.pinecone_client import pinecone_client
 from app.services.embeddings import get_embedding_generator
 from app.services.llm_service import llm_service
 
 logger = logging.getLogger(__name__)
 
+# User filters passed through to Pinecone as equality filters
+FILTER_FIELDS = ("industry", "author", "source_type")
+
+# Recently updated documents prefetched alongside each suggestion vector search
+PREFETCH_RECENT_DOCUMENTS = 50
+
+DEFAULT_RELEVANCE_EXPLANATION = "Relevant to the topic based on content similarity."
+
+# Document columns used by suggestions and rankings
+_DOCUMENT_COLUMNS = (
+    Document.id,
+    Document.filename,
+    Document.chunk_count,
+    Document.industry,
+    Document.author,
+    Document.source_type,
+    Document.document_date,
+)
+
 
 class DocumentSelectorService:
     """Service for selecting and suggesting documents for content generation."""
@@ -18,6 +41,11 @@ class DocumentSelectorService:
     def __init__(self):
         """Initialize document selector service."""
         self.embedding_generator = get_embedding_generator()
+        # (topic, content_type, document_id) -> LLM relevance explanation
+        self._explanation_cache = TTLCache(
+            maxsize=2000,
+            ttl=settings.relevance_explanation_cache_ttl
+        )
 
     async def suggest_documents(
         self,
@@ -40,97 +68,228 @@ class DocumentSelectorService:
         """
         logger.info(f"Suggesting documents for topic: {topic[:100]}")
 
-        # Step 1: Get semantically similar documents using vector search
-        query_embedding = await self.embedding_generator.embed(topic)
-
         # Build Pinecone filter if provided
         pinecone_filter = None
         if filters:
             pinecone_filter = self._build_pinecone_filter(filters)
 
-        # Query Pinecone for top matches (get more than max_documents for filtering)
-        pinecone_response = await pinecone_client.query(
-            vector=query_embedding,
-            top_k=max_documents * 3,  # Get 3x to have options after deduplication
-            filter=pinecone_filter,
-            include_metadata=True
+        # Step 1: Get semantically similar documents using vector search
+        # (get 3x max_documents to have options after deduplication)
+        pinecone_response, prefetched = await self._search_with_prefetch(
+            topic, max_documents * 3, pinecone_filter
         )
 
-        # Step 2: Extract unique documents and their relevance scores
-        doc_scores = {}  # document_id -> max_score
-        doc_chunks = {}  # document_id -> chunk_count
+        # Step 2: Group matches by document
+        grouped = self._group_matches(pinecone_response.get("matches", []))
 
-        for match in pinecone_response.get("matches", []):
-            try:
-                chunk_id = match["id"]
-                score = match["score"]
+        return await self._build_suggestions(topic, content_type, grouped, max_documents, prefetched)
 
-                # Extract document ID from chunk ID (format: doc_{doc_id}_chunk_{chunk_idx})
-                doc_id = int(chunk_id.split("_")[1])
+    async def _search_with_prefetch(
+        self,
+        topic: str,
+        top_k: int,
+        pinecone_filter: Optional[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], Dict[int, Any]]:
+        """
+        Vector-search a topic while prefetching recently updated documents.
 
-                # Track highest score for each document
-                if doc_id not in doc_scores or score > doc_scores[doc_id]:
-                    doc_scores[doc_id] = score
+        The prefetch runs concurrently with embedding and the Pinecone query,
+        so matches among recently updated documents need no database round
+        trip afterwards.
 
-                # Count chunks per document
-                doc_chunks[doc_id] = doc_chunks.get(doc_id, 0) + 1
+        Args:
+            topic: Text to embed and search for
+            top_k: Number of Pinecone matches to return
+            pinecone_filter: Optional Pinecone metadata filter
 
-            except (IndexError, ValueError) as e:
-                logger.warning(f"Invalid chunk ID format: {chunk_id}: {e}")
+        Returns:
+            Tuple of (Pinecone response, document_id -> prefetched row)
+        """
+        async def search():
+            query_embedding = await self.embedding_generator.embed(topic)
+            return await pinecone_client.query(
+                vector=query_embedding,
+                top_k=top_k,
+                filter=pinecone_filter,
+                include_metadata=True
+            )
+
+        async with asyncio.TaskGroup() as tg:
+            search_task = tg.create_task(search())
+            prefetch_task = tg.create_task(self._fetch_recent_documents())
+
+        return search_task.result(), prefetch_task.result()
+
+    @staticmethod
+    def _group_matches(matches: List[Dict[str, Any]]) -> Dict[int, List[Tuple[float, str]]]:
+        """
+        Group Pinecone matches by document in a single pass.
+
+        Args:
+            matches: Pinecone query matches, with metadata
+
+        Returns:
+            Dict mapping document_id to (score, chunk text) tuples in match order.
+            Documents are in order of first match, i.e. by best score.
+        """
+        grouped: Dict[int, List[Tuple[float, str]]] = {}
+
+        for match in matches:
+            metadata = match.get("metadata") or {}
+            try:
+                # Written as an int at ingest; Pinecone returns numbers as floats
+                doc_id = int(metadata["document_id"])
+            except KeyError:
+                logger.warning(f"Match without document_id metadata: {match['id']}")
                 continue
 
+            grouped.setdefault(doc_id, []).append(
+                (match["score"], metadata.get("text", ""))
+            )
+
+        return grouped
+
+    @staticmethod
+    def _score_groups(
+        grouped: Dict[int, List[Tuple[float, str]]]
+    ) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """
+        Compute each document's best match score and matched chunk count.
+
+        Args:
+            grouped: Output of _group_matches()
+
+        Returns:
+            Tuple of (document_id -> max score, document_id -> chunk count)
+        """
+        doc_scores = {}
+        doc_chunks = {}
+        for doc_id, chunks in grouped.items():
+            doc_scores[doc_id] = max(score for score, _ in chunks)
+            doc_chunks[doc_id] = len(chunks)
+        return doc_scores, doc_chunks
+
+    @staticmethod
+    def _context_from_groups(
+        grouped: Dict[int, List[Tuple[float, str]]],
+        max_chunks_per_doc: int
+    ) -> Dict[int, List[str]]:
+        """Take the highest-scoring chunk texts of each document."""
+        result = {}
+        for doc_id, chunks in grouped.items():
+            # Sort by score (descending) and limit per document
+            chunks = sorted(chunks, key=lambda x: x[0], reverse=True)[:max_chunks_per_doc]
+            result[doc_id] = [text for score, text in chunks]
+        return result
+
+    async def _build_suggestions(
+        self,
+        topic: str,
+        content_type: str,
+        grouped: Dict[int, List[Tuple[float, str]]],
+        max_documents: int,
+        prefetched: Optional[Dict[int, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Turn grouped matches into ranked, explained document suggestions.
+
+        Args:
+            topic: The topic for content generation
+            content_type: Type of content
+            grouped: Output of _group_matches()
+            max_documents: Maximum number of documents to suggest
+            prefetched: Completed document rows already fetched, by id
+
+        Returns:
+            List of suggested documents with relevance scores
+        """
+        doc_scores, doc_chunks = self._score_groups(grouped)
+
         # Step 3: Fetch document metadata from database
         if not doc_scores:
             logger.warning(f"No documents found for topic: {topic[:100]}")
             return []
 
-        db = SessionLocal()
-        try:
-            document_ids = list(doc_scores.keys())
-            documents = db.query(Document).filter(
-                Document.id.in_(document_ids),
-                Document.status == "completed"
-            ).all()
+        prefetched = prefetched or {}
+        documents_by_id = {doc_id: prefetched[doc_id] for doc_id in doc_scores if doc_id in prefetched}
+        missing_ids = [doc_id for doc_id in doc_scores if doc_id not in prefetched]
+        if missing_ids:
+            for doc in await self._fetch_completed_documents(missing_ids):
+                documents_by_id[doc.id] = doc
+
+        # Step 4: Build suggested documents list. Pinecone returns matches
+        # best-first, so grouped (and doc_scores) is already in relevance order.
+        suggested_docs = []
+        for doc_id, relevance_score in doc_scores.items():
+            # Limit to max_documents
+            if len(suggested_docs) >= max_documents:
+                break
 
-            # Step 4: Build suggested documents list
-            suggested_docs = []
-            for doc in documents:
-                relevance_score = doc_scores[doc.id]
-                chunks_found = doc_chunks[doc.id]
-
-                suggested_docs.append({
-                    "document_id": doc.id,
-                    "filename": doc.filename,
-                    "relevance_score": float(relevance_score),
-                    "chunk_count": chunks_found,
-                    "total_chunks": doc.chunk_count,
-                    "industry": doc.industry,
-                    "author": doc.author,
-                    "source_type": doc.source_type,
-                    "document_date": doc.document_date.isoformat() if doc.document_date else None,
-                })
-
-            # Sort by relevance score (descending)
-            suggested_docs.sort(key=lambda x: x["relevance_score"], reverse=True)
+            doc = documents_by_id.get(doc_id)
+            if doc is None:
+                continue
 
-            # Limit to max_documents
-            suggested_docs = suggested_docs[:max_documents]
+            suggested_docs.append({
+                "document_id": doc.id,
+                "filename": doc.filename,
+                "relevance_score": float(relevance_score),
+                "chunk_count": doc_chunks[doc.id],
+                "total_chunks": doc.chunk_count,
+                "industry": doc.industry,
+                "author": doc.author,
+                "source_type": doc.source_type,
+                "document_date": doc.document_date.isoformat() if doc.document_date else None,
+            })
+
+        # Step 5: Use LLM to add relevance explanations (optional but valuable)
+        if suggested_docs:
+            try:
+                suggested_docs = await self._add_relevance_explanations(
+                    topic, content_type, suggested_docs
+                )
+            except Exception as e:
+                logger.warning(f"Failed to add relevance explanations: {e}")
+                # Continue without explanations
 
-            # Step 5: Use LLM to add relevance explanations (optional but valuable)
-            if suggested_docs:
-                try:
-                    suggested_docs = await self._add_relevance_explanations(
-                        topic, content_type, suggested_docs
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to add relevance explanations: {e}")
-                    # Continue without explanations
+        logger.info(f"Suggested {len(suggested_docs)} documents for topic")
+        return suggested_docs
 
-            logger.info(f"Suggested {len(suggested_docs)} documents for topic")
-            return suggested_docs
+    async def _fetch_completed_documents(self, document_ids: List[int]) -> List[Any]:
+        """
+        Fetch the listing columns of completed documents.
 
-        finally:
-            db.close()
+        Only the columns used by suggestions and rankings are selected, and
+        the ids are sent in IN-lists of at most MAX_IN_LIST_SIZE.
+
+        Args:
+            document_ids: Document IDs to fetch
+
+        Returns:
+            Rows with id, filename, chunk_count, industry, author, source_type
+            and document_date
+        """
+        async with AsyncSessionLocal() as db:
+            documents = []
+            for batch in chunked(document_ids):
+                result = await db.execute(
+                    select(*_DOCUMENT_COLUMNS).where(
+                        Document.id.in_(batch),
+                        Document.status == "completed"
+                    )
+                )
+                documents.extend(result.all())
+            return documents
+
+    async def _fetch_recent_documents(self) -> Dict[int, Any]:
+        """Fetch the most recently updated completed documents, keyed by id."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(*_DOCUMENT_COLUMNS)
+                .where(Document.status == "completed")
+                .order_by(desc(Document.updated_at))
+                .limit(PREFETCH_RECENT_DOCUMENTS)
+            )
+            return {doc.id: doc for doc in result.all()}
 
     async def _add_relevance_explanations(
         self,
@@ -141,6 +300,9 @@ class DocumentSelectorService:
         """
         Use LLM to generate relevance explanations for suggested documents.
 
+        Explanations are cached per (topic, content type, document), so only
+        documents without a cached explanation are sent to the LLM.
+
         Args:
             topic: The generation topic
             content_type: Type of content
@@ -149,10 +311,56 @@ class DocumentSelectorService:
         Returns:
             Documents with added relevance_explanation field
         """
-        # Create a prompt for the LLM
+        cache_keys = {
+            doc["document_id"]: make_key(topic, content_type, doc["document_id"])
+            for doc in documents
+        }
+        explanations = {}
+        for doc_id, key in cache_keys.items():
+            cached = self._explanation_cache.get(key)
+            if cached is not None:
+                explanations[doc_id] = cached
+
+        missing = [doc for doc in documents if doc["document_id"] not in explanations]
+        if missing:
+            try:
+                generated = await self._generate_relevance_explanations(topic, content_type, missing)
+                for doc_id, text in generated.items():
+                    if doc_id in cache_keys:
+                        self._explanation_cache.set(cache_keys[doc_id], text)
+                        explanations[doc_id] = text
+            except Exception as e:
+                logger.error(f"Failed to generate relevance explanations: {e}")
+
+        for doc in documents:
+            doc["relevance_explanation"] = explanations.get(
+                doc["document_id"], DEFAULT_RELEVANCE_EXPLANATION
+            )
+
+        return documents
+
+    async def _generate_relevance_explanations(
+        self,
+        topic: str,
+        content_type: str,
+        documents: List[Dict[str, Any]]
+    ) -> Dict[int, str]:
+        """
+        Ask the LLM for one explanation per document, as JSON.
+
+        Args:
+            topic: The generation topic
+            content_type: Type of content
+            documents: Documents to explain
+
+        Returns:
+            Dict mapping document_id to explanation; documents the response
+            does not cover are left out
+        """
         doc_list = "\n".join([
-            f"{i+1}. {doc['filename']} (Score: {doc['relevance_score']:.3f}, Industry: {doc.get('industry', 'N/A')})"
-            for i, doc in enumerate(documents)
+            f"- document_id {doc['document_id']}: {doc['filename']} "
+            f"(Score: {doc['relevance_score']:.3f}, Industry: {doc.get('industry', 'N/A')})"
+            for doc in documents
         ])
 
         prompt = f"""You are helping select relevant documents for content generation.
@@ -164,47 +372,32 @@ Here are the suggested documents:
 {doc_list}
 
 For each document, provide a brief (1-2 sentence) explanation of why it's relevant to the topic.
-Format your response as a numbered list matching the documents above.
+Keep explanations concise and specific to how the document relates to the topic.
 
-Keep explanations concise and specific to how the document relates to the topic."""
+Respond with only a JSON object of this form, with one entry per document:
+{{"explanations": [{{"document_id": <id>, "text": "<explanation>"}}]}}"""
 
-        try:
-            result = await llm_service.generate(
-                prompt=prompt,
-                provider="anthropic",  # Use Claude for this analysis task
-                model=None,  # Use default
-                temperature=0.3,  # Lower temperature for more focused responses
-                max_tokens=500
-            )
-
-            explanations_text = result["content"]
-
-            # Parse explanations (simple line-by-line parsing)
-            explanation_lines = [
-                line.strip()
-                for line in explanations_text.split("\n")
-                if line.strip() and (line.strip()[0].isdigit() or line.strip().startswith("-"))
-            ]
+        result = await llm_service.generate(
+            prompt=prompt,
+            provider="anthropic",  # Use Claude for this analysis task
+            model=None,  # Use default
+            temperature=0.3,  # Lower temperature for more focused responses
+            max_tokens=500
+        )
 
-            # Add explanations to documents
-            for i, doc in enumerate(documents):
-                if i < len(explanation_lines):
-                    # Remove numbering prefix
-                    explanation = explanation_lines[i]
-                    explanation = explanation.lstrip("0123456789.-) ").strip()
-                    doc["relevance_explanation"] = explanation
-                else:
-                    doc["relevance_explanation"] = "Relevant to the topic based on content similarity."
-
-        except Exception as e:
-            logger.error(f"Failed to generate relevance explanations: {e}")
-            # Add default explanations
-            for doc in documents:
-                doc["relevance_explanation"] = "Relevant to the topic based on content similarity."
+        # Tolerate prose or code fences around the JSON object
+        content = result["content"]
+        payload = json.loads(content[content.index("{"):content.rindex("}") + 1])
 
-        return documents
+        explanations = {}
+        for entry in payload.get("explanations", []):
+            try:
+                explanations[int(entry["document_id"])] = str(entry["text"]).strip()
+            except (KeyError, TypeError, ValueError):
+                continue
+        return explanations
 
-    def validate_document_ids(self, document_ids: List[int]) -> Dict[str, Any]:
+    async def validate_document_ids(self, document_ids: List[int]) -> Dict[str, Any]:
         """
         Validate that document IDs exist and are ready for use.
 
@@ -224,20 +417,19 @@ Keep explanations concise and specific to how the document relates to the topic.
                 "documents": {}
             }
 
-        db = SessionLocal()
-        try:
-            # Query for all documents
-            documents = db.query(Document).filter(
-                Document.id.in_(document_ids)
-            ).all()
+        async with AsyncSessionLocal() as db:
+            # Query for all documents, MAX_IN_LIST_SIZE ids at a time
+            documents = []
+            for batch in chunked(document_ids):
+                result = await db.execute(
+                    select(Document).where(Document.id.in_(batch))
+                )
+                documents.extend(result.scalars().all())
 
-            found_ids = set()
             valid_docs = []
             doc_info = {}
 
             for doc in documents:
-                found_ids.add(doc.id)
-
                 # Only include completed documents
                 if doc.status == "completed" and doc.chunk_count > 0:
                     valid_docs.append(doc.id)
@@ -250,10 +442,10 @@ Keep explanations concise and specific to how the document relates to the topic.
                         "source_type": doc.source_type,
                     }
 
-            # Find invalid IDs (not found or not completed)
+            # Find invalid IDs (not found or not completed); doc_info is keyed by valid ID
             invalid_docs = [
                 doc_id for doc_id in document_ids
-                if doc_id not in valid_docs
+                if doc_id not in doc_info
             ]
 
             return {
@@ -262,9 +454,6 @@ Keep explanations concise and specific to how the document relates to the topic.
                 "documents": doc_info
             }
 
-        finally:
-            db.close()
-
     async def rank_by_relevance(
         self,
         topic: str,
@@ -286,67 +475,39 @@ Keep explanations concise and specific to how the document relates to the topic.
         # Get query embedding
         query_embedding = await self.embedding_generator.embed(topic)
 
-        # Query Pinecone for these specific documents
-        # We'll filter by document_id in metadata
-        doc_scores = {}
-        doc_chunks = {}
-
-        # Query multiple times with different filters (Pinecone limitation workaround)
-        # In practice, we query broadly and filter results
-        pinecone_response = await pinecone_client.query(
-            vector=query_embedding,
-            top_k=100,  # Get enough to cover all chunks from selected docs
-            include_metadata=True
+        # Query Pinecone for chunks of these specific documents only, while
+        # fetching their metadata from the database
+        pinecone_response, documents = await asyncio.gather(
+            pinecone_client.query(
+                vector=query_embedding,
+                top_k=100,  # Get enough to cover all chunks from selected docs
+                filter=self._document_ids_filter(document_ids),
+                include_metadata=True
+            ),
+            self._fetch_completed_documents(document_ids)
         )
 
-        for match in pinecone_response.get("matches", []):
-            try:
-                chunk_id = match["id"]
-                score = match["score"]
-                doc_id = int(chunk_id.split("_")[1])
-
-                # Only include scores for requested documents
-                if doc_id not in document_ids:
-                    continue
-
-                # Track highest score for each document
-                if doc_id not in doc_scores or score > doc_scores[doc_id]:
-                    doc_scores[doc_id] = score
-
-                doc_chunks[doc_id] = doc_chunks.get(doc_id, 0) + 1
-
-            except (IndexError, ValueError):
-                continue
-
-        # Fetch document metadata
-        db = SessionLocal()
-        try:
-            documents = db.query(Document).filter(
-                Document.id.in_(document_ids),
-                Document.status == "completed"
-            ).all()
-
-            ranked_docs = []
-            for doc in documents:
-                relevance_score = doc_scores.get(doc.id, 0.0)
+        grouped = self._group_matches(pinecone_response.get("matches", []))
+        doc_scores, doc_chunks = self._score_groups(grouped)
 
-                ranked_docs.append({
-                    "document_id": doc.id,
-                    "filename": doc.filename,
-                    "relevance_score": float(relevance_score),
-                    "chunk_count": doc_chunks.get(doc.id, 0),
-                    "total_chunks": doc.chunk_count,
-                    "industry": doc.industry,
-                    "author": doc.author,
-                })
+        ranked_docs = []
+        for doc in documents:
+            relevance_score = doc_scores.get(doc.id, 0.0)
 
-            # Sort by relevance score (descending)
-            ranked_docs.sort(key=lambda x: x["relevance_score"], reverse=True)
+            ranked_docs.append({
+                "document_id": doc.id,
+                "filename": doc.filename,
+                "relevance_score": float(relevance_score),
+                "chunk_count": doc_chunks.get(doc.id, 0),
+                "total_chunks": doc.chunk_count,
+                "industry": doc.industry,
+                "author": doc.author,
+            })
 
-            return ranked_docs
+        # Sort by relevance score (descending)
+        ranked_docs.sort(key=lambda x: x["relevance_score"], reverse=True)
 
-        finally:
-            db.close()
+        return ranked_docs
 
     async def get_document_context(
         self,
@@ -375,49 +536,31 @@ Keep explanations concise and specific to how the document relates to the topic.
         pinecone_response = await pinecone_client.query(
             vector=query_embedding,
             top_k=max_chunks_per_doc * len(document_ids),
+            filter=self._document_ids_filter(document_ids),
             include_metadata=True
         )
 
-        # Organize chunks by document
-        doc_chunks = {}  # document_id -> list of (score, text) tuples
+        # Organize chunks by document and keep the best per document
+        grouped = self._group_matches(pinecone_response.get("matches", []))
 
-        for match in pinecone_response.get("matches", []):
-            try:
-                chunk_id = match["id"]
-                score = match["score"]
-                metadata = match.get("metadata", {})
-                text = metadata.get("text", "")
-
-                # Extract document ID
-                doc_id = int(chunk_id.split("_")[1])
-
-                # Only include chunks from requested documents
-                if doc_id not in document_ids:
-                    continue
-
-                if doc_id not in doc_chunks:
-                    doc_chunks[doc_id] = []
-
-                doc_chunks[doc_id].append((score, text))
-
-            except (IndexError, ValueError):
-                continue
-
-        # Sort chunks by score and limit per document
-        result = {}
-        for doc_id, chunks in doc_chunks.items():
-            # Sort by score (descending)
-            chunks.sort(key=lambda x: x[0], reverse=True)
+        return self._context_from_groups(grouped, max_chunks_per_doc)
 
-            # Limit to max_chunks_per_doc
-            chunks = chunks[:max_chunks_per_doc]
+    async def warmup(self):
+        """
+        Warm the embedding model and the Pinecone connection.
 
-            # Extract just the text
-            result[doc_id] = [text for score, text in chunks]
+        Runs one embedding and a top-1 query so the first suggestion request
+        does not pay for model loading and connection setup.
+        """
+        query_embedding = await self.embedding_generator.embed("warmup")
+        await pinecone_client.query(vector=query_embedding, top_k=1, include_metadata=False)
 
-        return result
+    @staticmethod
+    def _document_ids_filter(document_ids: List[int]) -> Dict[str, Any]:
+        """Build a Pinecone metadata filter matching chunks of the given documents."""
+        return {"document_id": {"$in": [int(doc_id) for doc_id in document_ids]}}
 
-    def _build_pinecone_filter(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_pinecone_filter(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Build Pinecone metadata filter from user filters.
 
@@ -425,20 +568,14 @@ Keep explanations concise and specific to how the document relates to the topic.
             filters: User-provided filters
 
         Returns:
-            Pinecone filter dict
+            Pinecone filter dict, or None if no supported filter is set
         """
-        pinecone_filter = {}
-
-        if "industry" in filters and filters["industry"]:
-            pinecone_filter["industry"] = {"$eq": filters["industry"]}
-
-        if "author" in filters and filters["author"]:
-            pinecone_filter["author"] = {"$eq": filters["author"]}
-
-        if "source_type" in filters and filters["source_type"]:
-            pinecone_filter["source_type"] = {"$eq": filters["source_type"]}
-
-        return pinecone_filter if pinecone_filter else None
+        pinecone_filter = {
+            field: {"$eq": filters[field]}
+            for field in FILTER_FIELDS
+            if filters.get(field)
+        }
+        return pinecone_filter or None
 
 
 # Global instance
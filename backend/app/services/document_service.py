@@ -1,4 +1,6 @@
 from typing import List, Dict, Any, Optional
+import asyncio
+import calendar
 import logging
 import hashlib
 from pathlib import Path
@@ -16,6 +18,11 @@ from app.models.schemas import SourceType
 
 logger = logging.getLogger(__name__)
 
+# Chunks embedded per batch; each batch is upserted while the next is embedded
+EMBED_UPSERT_BATCH_SIZE = 64
+# Upsert batches allowed in flight before embedding waits
+MAX_INFLIGHT_UPSERTS = 4
+
 
 class DocumentService:
     """Service for document management and processing."""
@@ -169,10 +176,10 @@ class DocumentService:
                 logger.info(f"Document with hash {content_hash} already exists")
                 return existing
 
-            # Save as markdown
+            # Save the scraped content as markdown (written in a worker thread)
             markdown_path = self.storage_dir / f"{content_hash}.md"
-            await self.jina_scraper.scrape_and_save(
-                url=url,
+            await self.jina_scraper.save_markdown(
+                scrape_result,
                 output_path=str(markdown_path),
                 metadata=metadata
             )
@@ -286,41 +293,70 @@ class DocumentService:
                 db.commit()
                 return
 
-            # Generate embeddings for all chunks
-            chunk_texts = [chunk["content"] for chunk in chunks]
-            embeddings = await self.embedding_generator.embed_batch(chunk_texts)
-
-            # Prepare vectors for Pinecone
-            vectors = []
+            # Embed chunks in batches and upsert each batch while the next one is
+            # embedded; the semaphore bounds how many batches are held in memory
             vector_ids = []
+            upserts = []
+            inflight = asyncio.Semaphore(MAX_INFLIGHT_UPSERTS)
+
+            async def upsert_batch(ids: List[str], embeddings, metadatas: List[Dict[str, Any]]):
+                try:
+                    await pinecone_client.upsert_columnar(ids, embeddings, metadatas)
+                finally:
+                    inflight.release()
+
+            # Metadata shared by every chunk of the document. Pinecone rejects
+            # null values, so a missing date is stored as an empty string.
+            base_metadata = {
+                "document_id": document.id,
+                "filename": document.filename,
+                "source_type": document.source_type,
+                "document_date": document.document_date.isoformat() if document.document_date else "",
+            }
+            if document.industry:
+                base_metadata["industry"] = document.industry
+            if document.author:
+                base_metadata["author"] = document.author
+            if document.document_date:
+                # Numeric copy of the date (UTC epoch seconds) for range filters
+                base_metadata["document_timestamp"] = calendar.timegm(document.document_date.utctimetuple())
 
-            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                vector_id = f"doc_{document.id}_chunk_{idx}"
-                vector_ids.append(vector_id)
-
-                vector_metadata = {
-                    "text": chunk["content"],
-                    "chunk_index": idx,
-                    "document_id": document.id,
-                    "filename": document.filename,
-                    "source_type": document.source_type,
-                }
-
-                if document.industry:
-                    vector_metadata["industry"] = document.industry
-                if document.author:
-                    vector_metadata["author"] = document.author
-
-                vectors.append((vector_id, embedding, vector_metadata))
+            try:
+                for start in range(0, len(chunks), EMBED_UPSERT_BATCH_SIZE):
+                    batch = chunks[start:start + EMBED_UPSERT_BATCH_SIZE]
+                    embeddings = await self.embedding_generator.embed_batch(
+                        [chunk.content for chunk in batch]
+                    )
 
-            # Upsert to Pinecone
-            await pinecone_client.upsert_vectors(vectors)
+                    # Prepare vectors for Pinecone as parallel columns
+                    batch_ids = [
+                        f"doc_{document.id}_chunk_{idx}"
+                        for idx in range(start, start + len(batch))
+                    ]
+                    batch_metadatas = [
+                        {"text": chunk.content, "chunk_index": idx, **base_metadata}
+                        for idx, chunk in enumerate(batch, start=start)
+                    ]
+                    vector_ids.extend(batch_ids)
+
+                    await inflight.acquire()
+                    upserts.append(asyncio.create_task(
+                        upsert_batch(batch_ids, embeddings, batch_metadatas)
+                    ))
+
+                # Wait for the remaining upserts to Pinecone
+                await asyncio.gather(*upserts)
+            except BaseException:
+                for task in upserts:
+                    task.cancel()
+                raise
 
             # Update document record
             document.status = "completed"
             document.chunk_count = len(chunks)
             document.vector_ids = vector_ids
             db.commit()
+            self._clear_generation_context()
 
             logger.info(f"Embedded {len(chunks)} chunks for document {document.id}")
 
@@ -331,6 +367,13 @@ class DocumentService:
             db.commit()
             raise
 
+    @staticmethod
+    def _clear_generation_context() -> None:
+        """Drop content generation's cached context, which may hold this document's old chunks."""
+        # Imported here: content_generator pulls in the LLM stack at import
+        from app.services.content_generator import clear_context_cache
+        clear_context_cache()
+
     async def delete_document(self, db: Session, document_id: int):
         """
         Delete document and its vectors from knowledge base.
@@ -357,6 +400,7 @@ class DocumentService:
             # Delete document record
             db.delete(document)
             db.commit()
+            self._clear_generation_context()
 
             logger.info(f"Deleted document {document_id}")
             
@@ -1,9 +1,15 @@
-from sentence_transformers import SentenceTransformer
-from typing import List
+from sentence_transformers import CrossEncoder, SentenceTransformer
+from typing import List, Dict, Any, Optional
+import numpy as np
+import torch
+import hashlib
 import logging
+import os
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -15,66 +21,159 @@ class EmbeddingGenerator:
     def __init__(self, model_name: str = None):
         self.model_name = model_name or settings.embedding_model
         self._model = None
+        self._reranker = None
+        # Query embeddings, so repeated topics skip the forward pass
+        self._cache = TTLCache(
+            maxsize=settings.embedding_cache_size,
+            ttl=settings.embedding_cache_ttl
+        )
+        # Model inference runs on its own single thread so batch ingestion does not
+        # starve the default executor and torch's intra-op threads are not oversubscribed
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
         logger.info(f"Initializing embedding generator with model: {self.model_name}")
 
     @property
     def model(self):
         """Lazy load the model."""
         if self._model is None:
-            self._model = SentenceTransformer(self.model_name)
+            self._model = self._load_model()
             logger.info(f"Loaded embedding model: {self.model_name}")
         return self._model
 
+    def _load_model(self) -> SentenceTransformer:
+        """Load the model on the configured backend, falling back to PyTorch."""
+        if settings.embedding_backend == "onnx":
+            try:
+                model_kwargs = None
+                if settings.embedding_onnx_file:
+                    model_kwargs = {"file_name": settings.embedding_onnx_file}
+                return SentenceTransformer(self.model_name, backend="onnx", model_kwargs=model_kwargs)
+            except Exception as e:
+                logger.warning(f"ONNX embedding backend unavailable, using PyTorch: {e}")
+
+        model = SentenceTransformer(self.model_name)
+        model.eval()
+        if model.device.type == "cpu":
+            # Encoding is serialized on one thread, so give torch half the cores
+            # rather than letting intra-op threads contend with the rest of the app
+            torch.set_num_threads(
+                settings.embedding_torch_threads or max(1, (os.cpu_count() or 2) // 2)
+            )
+        return model
+
+    @property
+    def reranker(self) -> CrossEncoder:
+        """Lazy load the reranking cross-encoder."""
+        if self._reranker is None:
+            self._reranker = CrossEncoder(settings.rerank_model)
+            logger.info(f"Loaded reranking model: {settings.rerank_model}")
+        return self._reranker
+
+    def _encode(self, inputs, **kwargs) -> np.ndarray:
+        """Run model.encode without autograd tracking. Called on the embedding thread."""
+        with torch.inference_mode():
+            return self.model.encode(inputs, **kwargs)
+
     async def embed(self, text: str) -> List[float]:
         """
         Generate embedding for a single text.
 
+        Results are cached per model and text for `embedding_cache_ttl` seconds.
+
         Args:
             text: Input text to embed
 
         Returns:
             List of floats representing the embedding
         """
+        cache_key = hashlib.sha256(f"{self.model_name}|{text}".encode("utf-8")).hexdigest()
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         try:
-            # Run in thread pool to avoid blocking
+            # Run on the model thread to avoid blocking
             loop = asyncio.get_event_loop()
             embedding = await loop.run_in_executor(
-                None,
-                lambda: self.model.encode(text, convert_to_tensor=False)
+                self._executor,
+                lambda: self._encode(text, convert_to_numpy=True, normalize_embeddings=True)
             )
-            return embedding.tolist()
+            embedding = embedding.tolist()
+            self._cache.set(cache_key, embedding)
+            return list(embedding)
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             raise
 
-    async def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+    def _default_batch_size(self) -> int:
+        """Encode batch size: configured value, else larger on GPU than on CPU."""
+        if settings.embedding_batch_size:
+            return settings.embedding_batch_size
+        return 128 if self.model.device.type == "cuda" else 64
+
+    async def embed_batch(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
         """
         Generate embeddings for multiple texts.
 
+        Embeddings stay a float32 array; rows are converted to lists only
+        when they are sent to Pinecone.
+
         Args:
             texts: List of texts to embed
-            batch_size: Batch size for processing
+            batch_size: Batch size for processing (default: per device)
 
         Returns:
-            List of embeddings
+            float32 array of shape (len(texts), dimension)
         """
         try:
-            # Run in thread pool to avoid blocking
+            # Run on the model thread to avoid blocking
             loop = asyncio.get_event_loop()
             embeddings = await loop.run_in_executor(
-                None,
-                lambda: self.model.encode(
+                self._executor,
+                lambda: self._encode(
                     texts,
-                    batch_size=batch_size,
-                    convert_to_tensor=False,
+                    batch_size=batch_size or self._default_batch_size(),
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
                     show_progress_bar=len(texts) > 100
                 )
             )
-            return [emb.tolist() for emb in embeddings]
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
         except Exception as e:
             logger.error(f"Error generating batch embeddings: {e}")
             raise
 
+    async def rerank(self, query: str, texts: List[str]) -> np.ndarray:
+        """
+        Score texts against a query with the cross-encoder.
+
+        Args:
+            query: Query text
+            texts: Candidate texts to score
+
+        Returns:
+            Array of relevance scores, one per text (higher is more relevant)
+        """
+        try:
+            # Shares the model thread with embedding inference
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                lambda: self._predict([(query, text) for text in texts])
+            )
+        except Exception as e:
+            logger.error(f"Error reranking: {e}")
+            raise
+
+    def _predict(self, pairs) -> np.ndarray:
+        """Run reranker.predict without autograd tracking. Called on the embedding thread."""
+        with torch.inference_mode():
+            return self.reranker.predict(pairs, convert_to_numpy=True, show_progress_bar=False)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get query embedding cache statistics (size, hits, misses, hit_rate)."""
+        return self._cache.get_stats()
+
     def get_dimension(self) -> int:
         """Get the dimension of the embeddings."""
         return self.model.get_sentence_embedding_dimension()
@@ -1,14 +1,22 @@
 from typing import List, Dict, Any, Optional
 import logging
+from sqlalchemy import Float, Text, case, cast, func
 from sqlalchemy.orm import Session
 from datetime import datetime
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.database import EvaluationResult
 from app.services.embeddings import get_embedding_generator
 from app.services.retrieval import get_retrieval_service
 
 logger = logging.getLogger(__name__)
 
+_AGGREGATED_METRICS_KEY = "eval_agg"
+
+# Aggregated metrics, shared by all EvaluationService instances; cleared on every new evaluation
+_metrics_cache = TTLCache(maxsize=1, ttl=settings.metrics_cache_ttl_seconds)
+
 
 class EvaluationService:
     """Service for evaluating retrieval quality."""
@@ -23,7 +31,8 @@ class EvaluationService:
         query: str,
         retrieved_doc_ids: List[int],
         user_feedback: Optional[str] = None,
-        expected_doc_ids: Optional[List[int]] = None
+        expected_doc_ids: Optional[List[int]] = None,
+        retrieved_scores: Optional[List[float]] = None
     ) -> EvaluationResult:
         """
         Evaluate a query and store results.
@@ -34,6 +43,8 @@ class EvaluationService:
             retrieved_doc_ids: List of retrieved document IDs
             user_feedback: Optional user feedback ('positive' or 'negative')
             expected_doc_ids: Optional ground truth document IDs
+            retrieved_scores: Optional scores from the original retrieval; when
+                given, the query is not retrieved again to compute similarity
 
         Returns:
             EvaluationResult object
@@ -43,7 +54,7 @@ class EvaluationService:
             semantic_similarity = None
             if retrieved_doc_ids:
                 semantic_similarity = await self._calculate_semantic_similarity(
-                    query, retrieved_doc_ids
+                    query, retrieved_doc_ids, retrieved_scores
                 )
 
             # Calculate precision and recall if ground truth provided
@@ -68,6 +79,7 @@ class EvaluationService:
             db.add(evaluation)
             db.commit()
             db.refresh(evaluation)
+            _metrics_cache.delete(_AGGREGATED_METRICS_KEY)
 
             logger.info(f"Created evaluation for query: {query[:50]}...")
             return evaluation
@@ -79,33 +91,35 @@ class EvaluationService:
     async def _calculate_semantic_similarity(
         self,
         query: str,
-        doc_ids: List[int]
+        doc_ids: List[int],
+        retrieved_scores: Optional[List[float]] = None
     ) -> Dict[str, float]:
         """
         Calculate semantic similarity scores.
 
+        Uses the caller's retrieval scores when provided, and only re-runs the
+        query otherwise.
+
         Args:
             query: Query text
             doc_ids: Document IDs
+            retrieved_scores: Scores already returned for this query, if any
 
         Returns:
             Dictionary with similarity metrics
         """
+        if retrieved_scores:
+            return _score_summary(retrieved_scores)
+
         try:
             # For simplicity, return average score from retrieval
             # In production, this could be more sophisticated
             result = await self.retrieval_service.query(query, top_k=len(doc_ids))
 
-            scores = [r["score"] for r in result["results"]]
-
-            return {
-                "avg_score": sum(scores) / len(scores) if scores else 0.0,
-                "max_score": max(scores) if scores else 0.0,
-                "min_score": min(scores) if scores else 0.0,
-            }
+            return _score_summary([r["score"] for r in result["results"]])
         except Exception as e:
             logger.error(f"Error calculating semantic similarity: {e}")
-            return {"avg_score": 0.0, "max_score": 0.0, "min_score": 0.0}
+            return _score_summary([])
 
     def _calculate_precision_recall(
         self,
@@ -143,49 +157,72 @@ class EvaluationService:
         """
         Get aggregated evaluation metrics.
 
+        Computed in a single aggregate query, without loading evaluation rows,
+        and cached for `metrics_cache_ttl_seconds` (until the next evaluation).
+
         Args:
             db: Database session
 
         Returns:
             Dictionary with aggregated metrics
         """
-        evaluations = db.query(EvaluationResult).all()
-
-        if not evaluations:
-            return {
-                "total_queries": 0,
-                "avg_precision": None,
-                "avg_recall": None,
-                "avg_semantic_similarity": None,
-                "positive_feedback_rate": None,
-                "negative_feedback_rate": None,
-            }
-
-        # Calculate averages
-        precisions = [e.precision for e in evaluations if e.precision is not None]
-        recalls = [e.recall for e in evaluations if e.recall is not None]
-
-        semantic_scores = []
-        for e in evaluations:
-            if e.semantic_similarity and isinstance(e.semantic_similarity, dict):
-                avg = e.semantic_similarity.get("avg_score")
-                if avg is not None:
-                    semantic_scores.append(avg)
-
-        # User feedback
-        total_feedback = sum(1 for e in evaluations if e.user_feedback)
-        positive_feedback = sum(1 for e in evaluations if e.user_feedback == "positive")
-        negative_feedback = sum(1 for e in evaluations if e.user_feedback == "negative")
-
-        return {
-            "total_queries": len(evaluations),
-            "avg_precision": sum(precisions) / len(precisions) if precisions else None,
-            "avg_recall": sum(recalls) / len(recalls) if recalls else None,
-            "avg_semantic_similarity": sum(semantic_scores) / len(semantic_scores) if semantic_scores else None,
-            "positive_feedback_rate": positive_feedback / total_feedback if total_feedback else None,
-            "negative_feedback_rate": negative_feedback / total_feedback if total_feedback else None,
+        if settings.metrics_cache_enabled:
+            cached = _metrics_cache.get(_AGGREGATED_METRICS_KEY)
+            if cached is not None:
+                return dict(cached)
+
+        has_feedback = EvaluationResult.user_feedback != ""
+
+        row = db.query(
+            func.count().label("total_queries"),
+            func.avg(_json_number(EvaluationResult.precision)).label("avg_precision"),
+            func.avg(_json_number(EvaluationResult.recall)).label("avg_recall"),
+            func.avg(EvaluationResult.semantic_similarity["avg_score"].as_float()).label("avg_semantic_similarity"),
+            func.count().filter(has_feedback).label("total_feedback"),
+            func.count().filter(EvaluationResult.user_feedback == "positive").label("positive_feedback"),
+            func.count().filter(EvaluationResult.user_feedback == "negative").label("negative_feedback"),
+        ).one()
+
+        total_feedback = row.total_feedback
+
+        metrics = {
+            "total_queries": row.total_queries,
+            "avg_precision": _as_float(row.avg_precision),
+            "avg_recall": _as_float(row.avg_recall),
+            "avg_semantic_similarity": _as_float(row.avg_semantic_similarity),
+            "positive_feedback_rate": row.positive_feedback / total_feedback if total_feedback else None,
+            "negative_feedback_rate": row.negative_feedback / total_feedback if total_feedback else None,
         }
 
+        if settings.metrics_cache_enabled:
+            _metrics_cache.set(_AGGREGATED_METRICS_KEY, metrics)
+        return dict(metrics)
+
+
+def _score_summary(scores: List[float]) -> Dict[str, float]:
+    """Average, max and min of retrieval scores (all 0.0 when there are none)."""
+    if not scores:
+        return {"avg_score": 0.0, "max_score": 0.0, "min_score": 0.0}
+
+    return {
+        "avg_score": sum(scores) / len(scores),
+        "max_score": max(scores),
+        "min_score": min(scores),
+    }
+
+
+def _json_number(column):
+    """SQL expression for a JSON column holding a bare number, NULL for JSON null or other values."""
+    return case(
+        (func.json_typeof(column) == "number", cast(cast(column, Text), Float)),
+        else_=None
+    )
+
+
+def _as_float(value: Any) -> Optional[float]:
+    """Convert an aggregate result (float or Decimal) to float, keeping None."""
+    return float(value) if value is not None else None
+
 
 # Global evaluation service instance
 def get_evaluation_service() -> EvaluationService:
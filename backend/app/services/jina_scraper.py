@@ -1,16 +1,50 @@
+import asyncio
 import httpx
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 import logging
 import hashlib
 import time
 from pathlib import Path
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.services.audit_service import get_audit_service
 
 logger = logging.getLogger(__name__)
 
+# Characters of scraped text encoded and written at a time
+WRITE_CHUNK_CHARS = 1 << 16
+
+# Response header prefixes kept in the audit log (rate limits and usage)
+AUDIT_HEADER_PREFIXES = ("x-ratelimit", "x-tokens", "x-usage", "x-request")
+
+# Response content types accepted as scraped text
+TEXT_CONTENT_TYPES = ("text/", "application/json")
+
+# Shared HTTP client, so scrapes reuse pooled HTTP/2 connections to Jina Reader
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared Jina Reader HTTP client."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared Jina Reader HTTP client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 class JinaScraper:
     """Scrape web content using Jina Reader API."""
@@ -18,28 +52,42 @@ class JinaScraper:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or settings.jina_api_key
         self.base_url = "https://r.jina.ai"
+        # Recent scrape results by URL, so repeat scrapes skip the Jina call
+        self._cache = TTLCache(maxsize=settings.jina_cache_size, ttl=settings.jina_cache_ttl)
 
     async def scrape_url(
         self,
         url: str,
         db: Optional[Session] = None,
-        document_id: Optional[int] = None
+        document_id: Optional[int] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Scrape content from a URL using Jina Reader.
 
+        Successful results are cached for `jina_cache_ttl` seconds unless Jina
+        marks the response no-store/no-cache; cache hits are not audited.
+
         Args:
             url: URL to scrape
             db: Database session for audit logging (optional)
             document_id: Document ID for tracking (optional)
+            use_cache: Return a cached result for this URL if one is fresh
 
         Returns:
             Dictionary with scraped content and metadata
         """
-        start_time = time.time()
+        if use_cache:
+            cached = self._cache.get(url)
+            if cached is not None:
+                logger.info(f"Using cached scrape for URL: {url}")
+                return {**cached, "metadata": dict(cached["metadata"])}
+
+        start_time = time.perf_counter()
         audit_service = get_audit_service()
-        status = "success"
+        status = None
         error_msg = None
+        audit_fields: Dict[str, Any] = {}
         jina_url = f"{self.base_url}/{url}"
 
         try:
@@ -47,100 +95,203 @@ class JinaScraper:
             if self.api_key:
                 headers["Authorization"] = f"Bearer {self.api_key}"
 
-            # Jina Reader API endpoint
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(jina_url, headers=headers)
+            # Jina Reader API endpoint, over the shared connection pool
+            client = get_http_client()
+            async with client.stream("GET", jina_url, headers=headers) as response:
                 response.raise_for_status()
-
-                # Jina returns markdown-formatted text
-                content = response.text
-
-                # Calculate content hash
+                # Check type and declared size before downloading the body
+                self._check_response(response)
+                body = await self._read_body(response)
+
+            # Jina returns markdown-formatted text (decoded as httpx's .text would)
+            encoding = response.encoding or "utf-8"
+            content = body.decode(encoding, errors="replace")
+
+            # Calculate content hash. For UTF-8 responses (what Jina sends) the
+            # body bytes already are content.encode(), so hash them directly
+            if encoding.lower() in ("utf-8", "utf8"):
+                content_hash = hashlib.sha256(body).hexdigest()
+            else:
                 content_hash = hashlib.sha256(content.encode()).hexdigest()
 
-                # Extract metadata from headers if available
-                metadata = {
-                    "source_url": url,
-                    "content_type": response.headers.get("content-type", ""),
-                    "scraped_at": response.headers.get("date", ""),
-                }
-
-                result = {
-                    "text": content,
-                    "metadata": metadata,
-                    "content_hash": content_hash
-                }
-
-                # Calculate metrics for audit logging
-                input_chars = len(url)
-                output_chars = len(content)
-                estimated_tokens = (input_chars + output_chars) // 4  # Rough estimate
-
-                # Extract rate limit and usage headers
-                rate_limit_headers = {
-                    key: value for key, value in response.headers.items()
-                    if key.lower().startswith(('x-ratelimit', 'x-tokens', 'x-usage', 'x-request'))
-                }
-
-                logger.info(f"Successfully scraped URL: {url}")
-
-                # Log to audit table if db session provided
-                if db:
-                    duration_ms = int((time.time() - start_time) * 1000)
-                    audit_service.log_api_usage(
-                        db=db,
-                        service="jina",
-                        operation="scrape",
-                        status=status,
-                        endpoint=jina_url,
-                        jina_input_chars=input_chars,
-                        jina_output_chars=output_chars,
-                        jina_estimated_tokens=estimated_tokens,
-                        jina_response_headers=rate_limit_headers if rate_limit_headers else None,
-                        document_id=document_id,
-                        duration_ms=duration_ms
-                    )
-
-                return result
+            # Extract metadata from headers if available
+            metadata = {
+                "source_url": url,
+                "content_type": response.headers.get("content-type", ""),
+                "scraped_at": response.headers.get("date", ""),
+            }
+
+            result = {
+                "text": content,
+                "metadata": metadata,
+                "content_hash": content_hash
+            }
+
+            # Calculate metrics for audit logging
+            input_chars = len(url)
+            output_chars = len(content)
+            estimated_tokens = (input_chars + output_chars) // 4  # Rough estimate
+
+            # Extract rate limit and usage headers. httpx yields header names
+            # lowercased, so they can be prefix-matched as-is
+            rate_limit_headers = {
+                key: value for key, value in response.headers.items()
+                if key.startswith(AUDIT_HEADER_PREFIXES)
+            }
+
+            logger.info(f"Successfully scraped URL: {url}")
+
+            cache_control = response.headers.get("cache-control", "").lower()
+            if "no-store" not in cache_control and "no-cache" not in cache_control:
+                self._cache.set(url, {**result, "metadata": dict(metadata)})
+
+            status = "success"
+            audit_fields = {
+                "input_chars": input_chars,
+                "output_chars": output_chars,
+                "estimated_tokens": estimated_tokens,
+                "response_headers": rate_limit_headers if rate_limit_headers else None,
+            }
+            return result
 
         except httpx.HTTPStatusError as e:
             status = "failed"
             error_msg = f"HTTP error: {str(e)}"
             logger.error(f"HTTP error scraping {url}: {e}")
-
-            # Log failure to audit
-            if db:
-                duration_ms = int((time.time() - start_time) * 1000)
-                audit_service.log_api_usage(
-                    db=db,
-                    service="jina",
-                    operation="scrape",
-                    status=status,
-                    endpoint=jina_url,
-                    error_message=error_msg,
-                    document_id=document_id,
-                    duration_ms=duration_ms
-                )
             raise
         except Exception as e:
             status = "failed"
             error_msg = str(e)
             logger.error(f"Error scraping {url}: {e}")
-
-            # Log failure to audit
-            if db:
-                duration_ms = int((time.time() - start_time) * 1000)
-                audit_service.log_api_usage(
+            raise
+        finally:
+            # Log to audit table if db session provided (status stays None
+            # only if the scrape was cancelled)
+            if db and status:
+                audit_service.log_jina_usage(
                     db=db,
-                    service="jina",
                     operation="scrape",
                     status=status,
                     endpoint=jina_url,
                     error_message=error_msg,
                     document_id=document_id,
-                    duration_ms=duration_ms
+                    duration_ms=int((time.perf_counter() - start_time) * 1000),
+                    **audit_fields
                 )
-            raise
+
+    @staticmethod
+    def _check_response(response: httpx.Response):
+        """
+        Reject non-text responses and ones declared larger than the size limit.
+
+        Raises:
+            ValueError: If the content type or Content-Length is unacceptable
+        """
+        content_type = response.headers.get("content-type", "")
+        if content_type and not content_type.lower().startswith(TEXT_CONTENT_TYPES):
+            raise ValueError(f"Unsupported content type: {content_type}")
+
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.jina_max_content_bytes:
+            raise ValueError(
+                f"Response too large: {content_length} bytes "
+                f"(limit {settings.jina_max_content_bytes})"
+            )
+
+    @staticmethod
+    async def _read_body(response: httpx.Response) -> bytes:
+        """
+        Read a streamed response body, stopping as soon as it passes the size limit.
+
+        Covers responses without a Content-Length (e.g. chunked), which
+        _check_response cannot reject up front.
+
+        Raises:
+            ValueError: If the body is larger than the size limit
+        """
+        chunks = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > settings.jina_max_content_bytes:
+                raise ValueError(
+                    f"Response too large: more than {settings.jina_max_content_bytes} bytes"
+                )
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def scrape_urls(
+        self,
+        urls: List[str],
+        max_concurrency: int = 10,
+        db: Optional[Session] = None
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Scrape several URLs concurrently.
+
+        Requests share the pooled HTTP client; at most `max_concurrency` are
+        in flight at once.
+
+        Args:
+            urls: URLs to scrape
+            max_concurrency: Maximum concurrent requests
+            db: Database session for audit logging (optional)
+
+        Returns:
+            One entry per URL, in order: the scrape_url() result, or the
+            exception raised for that URL
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def scrape_one(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.scrape_url(url, db=db)
+
+        return await asyncio.gather(*(scrape_one(url) for url in urls), return_exceptions=True)
+
+    async def save_markdown(
+        self,
+        result: Dict[str, Any],
+        output_path: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Save a scrape_url() result as a markdown file with frontmatter.
+
+        The file is written in a worker thread, so callers can overlap it
+        with other work.
+
+        Args:
+            result: Result returned by scrape_url()
+            output_path: Path to save markdown file
+            metadata: Optional additional metadata
+
+        Returns:
+            Path to saved markdown file
+        """
+        # Merge metadata
+        all_metadata = {**result["metadata"], **(metadata or {})}
+
+        # Create markdown frontmatter
+        fields = "".join(f"{key}: {value}\n" for key, value in all_metadata.items() if value)
+        frontmatter = f"---\n{fields}---\n\n"
+
+        text = result["text"]
+        output_file = Path(output_path)
+
+        def write():
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            # Write the body in slices rather than joining it with the
+            # frontmatter, so large pages are never copied or encoded whole
+            with output_file.open("w", encoding="utf-8") as f:
+                f.write(frontmatter)
+                for start in range(0, len(text), WRITE_CHUNK_CHARS):
+                    f.write(text[start:start + WRITE_CHUNK_CHARS])
+
+        await asyncio.to_thread(write)
+
+        logger.info(f"Saved scraped content to: {output_path}")
+        return str(output_file)
 
     async def scrape_and_save(
         self,
@@ -166,29 +317,7 @@ class JinaScraper:
         try:
             # Scrape content (with audit logging)
             result = await self.scrape_url(url, db=db, document_id=document_id)
-
-            # Merge metadata
-            all_metadata = {**result["metadata"], **(metadata or {})}
-
-            # Save as markdown
-            output_file = Path(output_path)
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-
-            # Create markdown content with frontmatter
-            content_parts = ["---"]
-            for key, value in all_metadata.items():
-                if value:
-                    content_parts.append(f"{key}: {value}")
-            content_parts.append("---")
-            content_parts.append("")
-            content_parts.append(result["text"])
-
-            markdown_content = "\n".join(content_parts)
-            output_file.write_text(markdown_content, encoding="utf-8")
-
-            result["file_path"] = str(output_file)
-            logger.info(f"Saved scraped content to: {output_path}")
-
+            result["file_path"] = await self.save_markdown(result, output_path, metadata)
             return result
 
         except Exception as e:
@@ -197,6 +326,11 @@ class JinaScraper:
 
 
 # Global Jina scraper instance
+_jina_scraper = None
+
 def get_jina_scraper() -> JinaScraper:
-    """Get Jina scraper instance."""
-    return JinaScraper()
+    """Get or create the Jina scraper singleton, so all callers share its result cache."""
+    global _jina_scraper
+    if _jina_scraper is None:
+        _jina_scraper = JinaScraper()
+    return _jina_scraper
@@ -1,14 +1,27 @@
 """LLM service for content generation using Anthropic Claude and OpenAI."""
 
 import asyncio
-from typing import Optional, Dict, Any, AsyncIterator
+import json
+import httpx
+import random
+import time
+from typing import Optional, Dict, Any, AsyncIterator, List, Callable, Tuple, Union
 from enum import Enum
 import logging
 
+from app.core.cache import TTLCache, make_key
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Streamed text is coalesced into content events of at most this many
+# characters, flushed at least this often (seconds)
+STREAM_FLUSH_CHARS = 16 * 1024
+STREAM_FLUSH_INTERVAL = 0.05
+
+# Both providers bill batch API requests at half the synchronous price
+BATCH_PRICE_FACTOR = 0.5
+
 
 class LLMProvider(str, Enum):
     """Supported LLM providers."""
@@ -16,6 +29,97 @@ class LLMProvider(str, Enum):
     OPENAI = "openai"
 
 
+class AsyncRateLimiter:
+    """Token-bucket limiter allowing `max_rate` acquisitions per `time_period` seconds."""
+
+    def __init__(self, max_rate: int, time_period: float = 60.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request slot is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.max_rate,
+                    self._tokens + (now - self._last_refill) * self.max_rate / self.time_period
+                )
+                self._last_refill = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) * self.time_period / self.max_rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+async def _coalesce_content(
+    events: AsyncIterator[Dict[str, Any]],
+    max_chars: int = STREAM_FLUSH_CHARS,
+    max_interval: float = STREAM_FLUSH_INTERVAL
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Merge consecutive content events so consumers get fewer, larger chunks.
+
+    The first chunk is passed through immediately. After that, text is
+    buffered until `max_chars` accumulate or `max_interval` seconds have
+    passed since the last flush (checked as chunks arrive). Other events
+    flush the buffer and pass through unchanged.
+    """
+    buffer: List[str] = []
+    buffered = 0
+    last_flush = None
+
+    async for event in events:
+        if event["type"] != "content":
+            if buffer:
+                yield {"type": "content", "content": "".join(buffer)}
+                buffer, buffered = [], 0
+            yield event
+            continue
+
+        buffer.append(event["content"])
+        buffered += len(event["content"])
+
+        now = time.monotonic()
+        if last_flush is None or buffered >= max_chars or now - last_flush >= max_interval:
+            yield {"type": "content", "content": "".join(buffer)}
+            buffer, buffered = [], 0
+            last_flush = now
+
+    if buffer:
+        yield {"type": "content", "content": "".join(buffer)}
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an LLM error is transient (rate limit, timeout, connection, 5xx)."""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+
+    for module_name in ("anthropic", "openai"):
+        try:
+            sdk = __import__(module_name)
+        except ImportError:
+            continue
+        if isinstance(error, (sdk.RateLimitError, sdk.APIConnectionError)):
+            return True
+        if isinstance(error, sdk.APIStatusError) and error.status_code >= 500:
+            return True
+
+    return False
+
+
 class LLMService:
     """Service for interacting with LLM APIs."""
 
@@ -23,6 +127,21 @@ class LLMService:
         """Initialize LLM service."""
         self._anthropic_client = None
         self._openai_client = None
+        self._limiter = AsyncRateLimiter(settings.llm_requests_per_minute)
+        # Caps in-flight provider requests; client pools are sized to match
+        self._semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+        # (input, output) prices per (provider, model), resolved once by _pricing()
+        self._pricing_cache: Dict[Tuple[str, str], Optional[Tuple[float, float]]] = {}
+        # Responses to (near-)deterministic calls, keyed on every request parameter
+        self._cache = TTLCache(maxsize=settings.llm_cache_size, ttl=settings.llm_cache_ttl)
+
+    @staticmethod
+    def _http_limits() -> httpx.Limits:
+        """Connection pool limits for the provider clients, matching the concurrency cap."""
+        return httpx.Limits(
+            max_connections=settings.llm_max_concurrency,
+            max_keepalive_connections=settings.llm_max_concurrency
+        )
 
     def _get_anthropic_client(self):
         """Get or create Anthropic client."""
@@ -30,8 +149,11 @@ class LLMService:
             if not settings.anthropic_api_key:
                 raise ValueError("Anthropic API key not configured")
             try:
-                from anthropic import AsyncAnthropic
-                self._anthropic_client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+                from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+                self._anthropic_client = AsyncAnthropic(
+                    api_key=settings.anthropic_api_key,
+                    http_client=DefaultAsyncHttpxClient(limits=self._http_limits())
+                )
             except ImportError:
                 raise ImportError("anthropic package not installed. Install with: pip install anthropic")
         return self._anthropic_client
@@ -42,8 +164,11 @@ class LLMService:
             if not settings.openai_api_key:
                 raise ValueError("OpenAI API key not configured")
             try:
-                from openai import AsyncOpenAI
-                self._openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                self._openai_client = AsyncOpenAI(
+                    api_key=settings.openai_api_key,
+                    http_client=DefaultAsyncHttpxClient(limits=self._http_limits())
+                )
             except ImportError:
                 raise ImportError("openai package not installed. Install with: pip install openai")
         return self._openai_client
@@ -57,6 +182,32 @@ class LLMService:
         else:
             raise ValueError(f"Unknown provider: {provider}")
 
+    def get_cheap_model(self, provider: str) -> str:
+        """Get the low-cost model for a provider."""
+        if provider == LLMProvider.ANTHROPIC:
+            return settings.anthropic_cheap_model
+        elif provider == LLMProvider.OPENAI:
+            return settings.openai_cheap_model
+        else:
+            raise ValueError(f"Unknown provider: {provider}")
+
+    async def generate_cheap(
+        self,
+        prompt: str,
+        provider: str = "anthropic",
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Generate text with the provider's low-cost model.
+
+        Intended for short or simple outputs (titles, summaries) where the
+        configured primary model is not worth its price. Accepts the same
+        arguments as generate() except `model`.
+        """
+        return await self.generate(
+            prompt=prompt, provider=provider, model=self.get_cheap_model(provider), **kwargs
+        )
+
     async def generate(
         self,
         prompt: str,
@@ -70,6 +221,12 @@ class LLMService:
         """
         Generate text using specified LLM provider.
 
+        Calls are rate limited per process and retried with jittered backoff
+        on rate-limit, timeout, connection and 5xx errors. Calls with
+        temperature <= `llm_cache_max_temperature` are answered from an
+        in-process cache when an identical request was made within
+        `llm_cache_ttl` seconds; such results carry `cached: True`.
+
         Args:
             prompt: The prompt to send to the LLM
             provider: 'anthropic' or 'openai'
@@ -89,20 +246,62 @@ class LLMService:
         if model is None:
             model = self.get_default_model(provider)
 
-        try:
-            if provider == LLMProvider.ANTHROPIC:
-                return await self._generate_anthropic(
-                    prompt, model, system_prompt, temperature, max_tokens, **kwargs
-                )
-            elif provider == LLMProvider.OPENAI:
-                return await self._generate_openai(
-                    prompt, model, system_prompt, temperature, max_tokens, **kwargs
-                )
-            else:
-                raise ValueError(f"Unsupported provider: {provider}")
-        except Exception as e:
-            logger.error(f"LLM generation failed for {provider}/{model}: {str(e)}")
-            raise
+        cache_key = None
+        if temperature <= settings.llm_cache_max_temperature:
+            cache_key = make_key(
+                provider, model, system_prompt, prompt, temperature, max_tokens, sorted(kwargs.items())
+            )
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return {**cached, "usage": dict(cached["usage"]), "cached": True}
+
+        result = await self._generate_with_retries(
+            prompt, provider, model, system_prompt, temperature, max_tokens, **kwargs
+        )
+
+        if cache_key is not None:
+            self._cache.set(cache_key, result)
+        return result
+
+    async def _generate_with_retries(
+        self,
+        prompt: str,
+        provider: str,
+        model: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Dispatch a generate() call to its provider under the rate and concurrency limits, with retries."""
+        max_attempts = max(1, settings.llm_max_attempts)
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                async with self._semaphore, self._limiter:
+                    if provider == LLMProvider.ANTHROPIC:
+                        return await self._generate_anthropic(
+                            prompt, model, system_prompt, temperature, max_tokens, **kwargs
+                        )
+                    elif provider == LLMProvider.OPENAI:
+                        return await self._generate_openai(
+                            prompt, model, system_prompt, temperature, max_tokens, **kwargs
+                        )
+                    else:
+                        raise ValueError(f"Unsupported provider: {provider}")
+            except Exception as e:
+                if attempt < max_attempts and _is_retryable(e):
+                    # Full jitter exponential backoff, capped at 30s
+                    delay = random.uniform(0, min(30.0, 2 ** attempt))
+                    logger.warning(
+                        f"LLM generation attempt {attempt}/{max_attempts} failed for "
+                        f"{provider}/{model}: {str(e)}; retrying in {delay:.1f}s"
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+
+                logger.error(f"LLM generation failed for {provider}/{model}: {str(e)}")
+                raise
 
     async def _generate_anthropic(
         self,
@@ -114,8 +313,29 @@ class LLMService:
         **kwargs
     ) -> Dict[str, Any]:
         """Generate text using Anthropic Claude."""
-        client = self._get_anthropic_client()
+        # generate() owns the retry policy, so the SDK must not retry as well
+        client = self._get_anthropic_client().with_options(
+            max_retries=0, timeout=settings.llm_request_timeout
+        )
+
+        request_params = self._anthropic_params(
+            prompt, model, system_prompt, temperature, max_tokens, **kwargs
+        )
 
+        response = await client.messages.create(**request_params)
+
+        return self._anthropic_result(response)
+
+    def _anthropic_params(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build Anthropic Messages API request parameters."""
         messages = [{"role": "user", "content": prompt}]
 
         request_params = {
@@ -130,9 +350,10 @@ class LLMService:
 
         # Add any additional kwargs
         request_params.update(kwargs)
+        return request_params
 
-        response = await client.messages.create(**request_params)
-
+    def _anthropic_result(self, response) -> Dict[str, Any]:
+        """Normalize an Anthropic Message into the generate() result shape."""
         return {
             "content": response.content[0].text,
             "model": response.model,
@@ -155,8 +376,29 @@ class LLMService:
         **kwargs
     ) -> Dict[str, Any]:
         """Generate text using OpenAI."""
-        client = self._get_openai_client()
+        # generate() owns the retry policy, so the SDK must not retry as well
+        client = self._get_openai_client().with_options(
+            max_retries=0, timeout=settings.llm_request_timeout
+        )
+
+        request_params = self._openai_params(
+            prompt, model, system_prompt, temperature, max_tokens, **kwargs
+        )
 
+        response = await client.chat.completions.create(**request_params)
+
+        return self._openai_result(response)
+
+    def _openai_params(
+        self,
+        prompt: str,
+        model: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Build OpenAI Chat Completions request parameters."""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -171,9 +413,10 @@ class LLMService:
 
         # Add any additional kwargs
         request_params.update(kwargs)
+        return request_params
 
-        response = await client.chat.completions.create(**request_params)
-
+    def _openai_result(self, response) -> Dict[str, Any]:
+        """Normalize a ChatCompletion into the generate() result shape."""
         choice = response.choices[0]
 
         return {
@@ -188,6 +431,199 @@ class LLMService:
             "stop_reason": choice.finish_reason,
         }
 
+    async def generate_many(
+        self,
+        prompts: List[str],
+        max_concurrency: int = 10,
+        **kwargs
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Generate responses for several prompts concurrently.
+
+        Each prompt is its own generate() call, so the rate limiter, retries
+        and response cache still apply; at most `max_concurrency` are in
+        flight at once. For large jobs that can wait, generate_batch() is
+        cheaper.
+
+        Args:
+            prompts: Prompts to send
+            max_concurrency: Maximum concurrent requests
+            **kwargs: Arguments passed to generate() for every prompt
+
+        Returns:
+            One entry per prompt, in order: the generate() result, or the
+            exception raised for that prompt
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate_one(prompt: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.generate(prompt=prompt, **kwargs)
+
+        return await asyncio.gather(*(generate_one(p) for p in prompts), return_exceptions=True)
+
+    async def generate_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        provider: str = "anthropic",
+        model: Optional[str] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        poll_interval: float = 10.0,
+        max_poll_interval: float = 120.0
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run many generations through the provider's batch API.
+
+        Batch requests are billed at roughly half the synchronous price but
+        may take minutes to complete, so this is only suitable for
+        non-interactive work. Polls with exponential backoff until the batch
+        has finished.
+
+        Args:
+            requests: List of dicts with custom_id, prompt and optional
+                system_prompt, temperature, max_tokens
+            provider: 'anthropic' or 'openai'
+            model: Model name (if None, uses default for provider)
+            on_progress: Optional callback(completed, total) called on each poll
+            poll_interval: Initial seconds between status checks
+            max_poll_interval: Upper bound for the backoff interval
+
+        Returns:
+            Dict mapping custom_id to a generate()-style result. Requests that
+            failed inside the batch are omitted.
+        """
+        if model is None:
+            model = self.get_default_model(provider)
+
+        try:
+            if provider == LLMProvider.ANTHROPIC:
+                return await self._batch_anthropic(
+                    requests, model, on_progress, poll_interval, max_poll_interval
+                )
+            elif provider == LLMProvider.OPENAI:
+                return await self._batch_openai(
+                    requests, model, on_progress, poll_interval, max_poll_interval
+                )
+            else:
+                raise ValueError(f"Unsupported provider: {provider}")
+        except Exception as e:
+            logger.error(f"LLM batch generation failed for {provider}/{model}: {str(e)}")
+            raise
+
+    async def _batch_anthropic(
+        self,
+        requests: List[Dict[str, Any]],
+        model: str,
+        on_progress: Optional[Callable[[int, int], None]],
+        poll_interval: float,
+        max_poll_interval: float
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run a batch through Anthropic Message Batches."""
+        client = self._get_anthropic_client()
+
+        batch = await client.messages.batches.create(requests=[
+            {
+                "custom_id": request["custom_id"],
+                "params": self._anthropic_params(
+                    request["prompt"],
+                    model,
+                    request.get("system_prompt"),
+                    request.get("temperature", 0.7),
+                    request.get("max_tokens", 4096),
+                ),
+            }
+            for request in requests
+        ])
+        logger.info(f"Submitted Anthropic batch {batch.id} with {len(requests)} requests")
+
+        total = len(requests)
+        while batch.processing_status != "ended":
+            await asyncio.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+
+            batch = await client.messages.batches.retrieve(batch.id)
+            if on_progress:
+                on_progress(total - batch.request_counts.processing, total)
+
+        results = {}
+        async for entry in await client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = self._anthropic_result(entry.result.message)
+            else:
+                logger.warning(f"Batch request {entry.custom_id} did not succeed: {entry.result.type}")
+
+        return results
+
+    async def _batch_openai(
+        self,
+        requests: List[Dict[str, Any]],
+        model: str,
+        on_progress: Optional[Callable[[int, int], None]],
+        poll_interval: float,
+        max_poll_interval: float
+    ) -> Dict[str, Dict[str, Any]]:
+        """Run a batch through the OpenAI Batch API."""
+        client = self._get_openai_client()
+
+        lines = [
+            json.dumps({
+                "custom_id": request["custom_id"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._openai_params(
+                    request["prompt"],
+                    model,
+                    request.get("system_prompt"),
+                    request.get("temperature", 0.7),
+                    request.get("max_tokens", 4096),
+                ),
+            })
+            for request in requests
+        ]
+
+        input_file = await client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted OpenAI batch {batch.id} with {len(requests)} requests")
+
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+
+            batch = await client.batches.retrieve(batch.id)
+            if on_progress and batch.request_counts:
+                on_progress(
+                    batch.request_counts.completed + batch.request_counts.failed,
+                    batch.request_counts.total
+                )
+
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"OpenAI batch {batch.id} ended with status {batch.status}")
+
+        from openai.types.chat import ChatCompletion
+        output = await client.files.content(batch.output_file_id)
+
+        results = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response")
+            if response and response.get("status_code") == 200:
+                results[entry["custom_id"]] = self._openai_result(
+                    ChatCompletion.model_validate(response["body"])
+                )
+            else:
+                logger.warning(f"Batch request {entry['custom_id']} did not succeed: {entry.get('error')}")
+
+        return results
+
     async def stream_generate(
         self,
         prompt: str,
@@ -201,6 +637,9 @@ class LLMService:
         """
         Stream text generation using specified LLM provider.
 
+        Provider token deltas are coalesced (see _coalesce_content), so content
+        events carry the first token at once and then ~50ms of text each.
+
         Args:
             Same as generate()
 
@@ -214,22 +653,27 @@ class LLMService:
         if model is None:
             model = self.get_default_model(provider)
 
-        try:
-            if provider == LLMProvider.ANTHROPIC:
-                async for chunk in self._stream_anthropic(
-                    prompt, model, system_prompt, temperature, max_tokens, **kwargs
-                ):
-                    yield chunk
-            elif provider == LLMProvider.OPENAI:
-                async for chunk in self._stream_openai(
-                    prompt, model, system_prompt, temperature, max_tokens, **kwargs
-                ):
+        # The concurrency slot is held for the whole stream
+        async with self._semaphore:
+            await self._limiter.acquire()
+
+            try:
+                if provider == LLMProvider.ANTHROPIC:
+                    events = self._stream_anthropic(
+                        prompt, model, system_prompt, temperature, max_tokens, **kwargs
+                    )
+                elif provider == LLMProvider.OPENAI:
+                    events = self._stream_openai(
+                        prompt, model, system_prompt, temperature, max_tokens, **kwargs
+                    )
+                else:
+                    raise ValueError(f"Unsupported provider: {provider}")
+
+                async for chunk in _coalesce_content(events):
                     yield chunk
-            else:
-                raise ValueError(f"Unsupported provider: {provider}")
-        except Exception as e:
-            logger.error(f"LLM streaming failed for {provider}/{model}: {str(e)}")
-            raise
+            except Exception as e:
+                logger.error(f"LLM streaming failed for {provider}/{model}: {str(e)}")
+                raise
 
     async def _stream_anthropic(
         self,
@@ -343,7 +787,8 @@ class LLMService:
         input_tokens: int,
         output_tokens: int,
         provider: str,
-        model: str
+        model: str,
+        batch: bool = False
     ) -> float:
         """
         Estimate cost for LLM usage.
@@ -353,46 +798,55 @@ class LLMService:
             output_tokens: Number of output tokens
             provider: LLM provider
             model: Model name
+            batch: Whether the tokens went through the batch API (discounted)
 
         Returns:
             Estimated cost in USD
         """
+        key = (provider, model)
+        if key not in self._pricing_cache:
+            self._pricing_cache[key] = self._pricing(provider, model)
+
+        pricing = self._pricing_cache[key]
+        if pricing is None:
+            logger.warning(f"Unknown provider {provider}, returning 0 cost")
+            return 0.0
+        input_cost, output_cost = pricing
+
         # Convert to millions
         input_m = input_tokens / 1_000_000
         output_m = output_tokens / 1_000_000
 
+        total_cost = (input_m * input_cost) + (output_m * output_cost)
+        if batch:
+            total_cost *= BATCH_PRICE_FACTOR
+        return round(total_cost, 6)
+
+    def _pricing(self, provider: str, model: str) -> Optional[Tuple[float, float]]:
+        """Per-1M-token (input, output) prices for a model, or None for an unknown provider."""
         if provider == "anthropic":
-            if "claude-3-5-sonnet" in model or "claude-3.5-sonnet" in model:
-                input_cost = settings.anthropic_claude_35_sonnet_input_cost
-                output_cost = settings.anthropic_claude_35_sonnet_output_cost
+            if "haiku" in model:
+                return settings.anthropic_claude_35_haiku_input_cost, settings.anthropic_claude_35_haiku_output_cost
+            elif "claude-3-5-sonnet" in model or "claude-3.5-sonnet" in model:
+                return settings.anthropic_claude_35_sonnet_input_cost, settings.anthropic_claude_35_sonnet_output_cost
             else:
                 # Default to Claude 3.5 Sonnet pricing
-                input_cost = settings.anthropic_claude_35_sonnet_input_cost
-                output_cost = settings.anthropic_claude_35_sonnet_output_cost
+                return settings.anthropic_claude_35_sonnet_input_cost, settings.anthropic_claude_35_sonnet_output_cost
 
         elif provider == "openai":
             if "gpt-4o-mini" in model:
-                input_cost = settings.openai_gpt4o_mini_input_cost
-                output_cost = settings.openai_gpt4o_mini_output_cost
+                return settings.openai_gpt4o_mini_input_cost, settings.openai_gpt4o_mini_output_cost
             elif "gpt-4o" in model:
-                input_cost = settings.openai_gpt4o_input_cost
-                output_cost = settings.openai_gpt4o_output_cost
+                return settings.openai_gpt4o_input_cost, settings.openai_gpt4o_output_cost
             elif "gpt-4" in model and "turbo" in model:
-                input_cost = settings.openai_gpt4_turbo_input_cost
-                output_cost = settings.openai_gpt4_turbo_output_cost
+                return settings.openai_gpt4_turbo_input_cost, settings.openai_gpt4_turbo_output_cost
             elif "gpt-3.5" in model:
-                input_cost = settings.openai_gpt35_turbo_input_cost
-                output_cost = settings.openai_gpt35_turbo_output_cost
+                return settings.openai_gpt35_turbo_input_cost, settings.openai_gpt35_turbo_output_cost
             else:
                 # Default to GPT-4o-mini pricing (conservative estimate)
-                input_cost = settings.openai_gpt4o_mini_input_cost
-                output_cost = settings.openai_gpt4o_mini_output_cost
-        else:
-            logger.warning(f"Unknown provider {provider}, returning 0 cost")
-            return 0.0
+                return settings.openai_gpt4o_mini_input_cost, settings.openai_gpt4o_mini_output_cost
 
-        total_cost = (input_m * input_cost) + (output_m * output_cost)
-        return round(total_cost, 6)
+        return None
 
 
 # Global instance
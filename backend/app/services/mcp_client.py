@@ -1,7 +1,12 @@
 import asyncio
 import logging
+import mimetypes
 import os
-from typing import Optional, Dict, Any, List
+import re
+import secrets
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+import httpx
 
 from mcp.client.stdio import stdio_client, StdioServerParameters
 from mcp.client.session import ClientSession
@@ -11,6 +16,25 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Page ID in a Confluence page URL (".../pages/12345/..." or "?pageId=12345")
+PAGE_ID_PATTERN = re.compile(r"/pages/(\d+)|[?&]pageId=(\d+)")
+
+# Tool output that means the MCP server still needs setup_confluence
+CONFIG_ERROR_MARKERS = ("No valid configuration found", "setup_confluence")
+
+# Bytes of an attachment read from disk per upload chunk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def _read_chunks(file_path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield a file's contents in chunks, reading each one in a worker thread."""
+    f = await asyncio.to_thread(open, file_path, "rb")
+    try:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
 
 class ConfluenceMCPClient:
     """Client for interacting with Confluence via MCP."""
@@ -28,6 +52,136 @@ class ConfluenceMCPClient:
         if settings.confluence_api_token:
             self.env["CONFLUENCE_API_TOKEN"] = settings.confluence_api_token
 
+        # REST API base URL, normalized once: the configured URL may or may
+        # not already end in /wiki
+        self.api_base = None
+        if settings.confluence_url:
+            wiki_base = settings.confluence_url.rstrip("/")
+            if not wiki_base.endswith("/wiki"):
+                wiki_base += "/wiki"
+            self.api_base = f"{wiki_base}/rest/api"
+
+        # REST client shared by all calls, created on first use
+        self._http: Optional[httpx.AsyncClient] = None
+
+        # Long-lived MCP session, owned by a background task (see _get_session)
+        self._session: Optional[ClientSession] = None
+        self._session_task: Optional[asyncio.Task] = None
+        self._session_closed: Optional[asyncio.Event] = None
+        self._session_lock = asyncio.Lock()
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get or create the pooled Confluence REST client."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                auth=(settings.confluence_email, settings.confluence_api_token),
+                http2=True,
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=settings.confluence_max_connections,
+                    max_keepalive_connections=settings.confluence_max_keepalive_connections,
+                    keepalive_expiry=30.0
+                )
+            )
+        return self._http
+
+    async def _get_session(self) -> ClientSession:
+        """
+        Get the shared MCP session, starting the server subprocess on first use.
+
+        The stdio transport and session stay open across calls, so each page
+        no longer pays for a subprocess start, initialize() and list_tools().
+        """
+        if self._session is not None:
+            return self._session
+
+        async with self._session_lock:
+            if self._session is None:
+                ready = asyncio.get_running_loop().create_future()
+                self._session_closed = asyncio.Event()
+                self._session_task = asyncio.create_task(
+                    self._run_session(ready, self._session_closed)
+                )
+                self._session = await ready
+        return self._session
+
+    async def _run_session(self, ready: asyncio.Future, closed: asyncio.Event):
+        """
+        Hold the MCP server connection open until `closed` is set.
+
+        anyio requires the stdio and session contexts to be entered and exited
+        in the same task, so they live here rather than in the caller.
+        """
+        server_params = StdioServerParameters(
+            command=self.command,
+            args=self.args,
+            env=self.env
+        )
+
+        try:
+            async with stdio_client(server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+
+                    # List tools once to debug/verify availability
+                    tools = await session.list_tools()
+                    tool_names = [t.name for t in tools.tools]
+                    logger.debug(f"Available Confluence tools: {tool_names}")
+
+                    # Configure up front so the first create_page doesn't fail
+                    # and need a retry; create_page still falls back to this
+                    # if the server reports it is unconfigured
+                    if "setup_confluence" in tool_names:
+                        await self._configure(session)
+
+                    ready.set_result(session)
+                    await closed.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"Confluence MCP session ended: {e}")
+
+    async def _configure(self, session: ClientSession) -> bool:
+        """Send the Confluence credentials to the MCP server via setup_confluence."""
+        setup_result = await session.call_tool(
+            "setup_confluence",
+            arguments={
+                "action": "setup",
+                "confluenceBaseUrl": settings.confluence_url,
+                "confluenceEmail": settings.confluence_email,
+                "confluenceApiToken": settings.confluence_api_token
+            }
+        )
+        if setup_result.isError:
+            logger.error(f"Failed to configure Confluence MCP server: {setup_result.content}")
+            return False
+        return True
+
+    async def _close_session(self):
+        """Shut down the MCP session and its server subprocess, if running."""
+        task, closed = self._session_task, self._session_closed
+        self._session = None
+        self._session_task = None
+
+        if task is not None:
+            closed.set()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def __aenter__(self) -> "ConfluenceMCPClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the MCP session and the Confluence REST client."""
+        await self._close_session()
+
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
     async def create_page(
         self, 
         title: str, 
@@ -62,165 +216,122 @@ class ConfluenceMCPClient:
         logger.info(f"Attempting to create Confluence page: {title} in space {space_key}")
 
         try:
-            server_params = StdioServerParameters(
-                command=self.command,
-                args=self.args,
-                env=self.env
+            session = await self._get_session()
+
+            # Convert content to Storage Format (XML)
+            # Basic conversion: escape HTML and wrap in paragraphs
+            # Note: A proper markdown-to-storage-format converter would be better
+            safe_content = content.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br/>")
+            storage_content = f"<p>{safe_content}</p>"
+
+            if tags:
+                tag_str = ", ".join(tags)
+                storage_content += f"<p><strong>Tags:</strong> {tag_str}</p>"
+
+            # Helper to call create page
+            async def _call_create_page():
+                return await session.call_tool(
+                    "create_page",
+                    arguments={
+                        "title": title,
+                        "spaceKey": space_key,
+                        "content": storage_content,
+                    }
+                )
+
+            result: CallToolResult = await _call_create_page()
+
+            # Check for configuration error in result content (even if isError is False)
+            result_text = "".join(
+                block.text for block in result.content if isinstance(block, TextContent)
             )
-            
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    
-                    # List tools to debug/verify availability
-                    tools = await session.list_tools()
-                    tool_names = [t.name for t in tools.tools]
-                    logger.debug(f"Available Confluence tools: {tool_names}")
-                    
-                    # Check if setup is needed
-                    if "setup_confluence" in tool_names:
-                         pass
+            config_error = any(marker in result_text for marker in CONFIG_ERROR_MARKERS)
 
-                    # Convert content to Storage Format (XML)
-                    # Basic conversion: escape HTML and wrap in paragraphs
-                    # Note: A proper markdown-to-storage-format converter would be better
-                    safe_content = content.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br/>")
-                    storage_content = f"<p>{safe_content}</p>"
-                    
-                    if tags:
-                        tag_str = ", ".join(tags)
-                        storage_content += f"<p><strong>Tags:</strong> {tag_str}</p>"
-
-                    # Helper to call create page
-                    async def _call_create_page():
-                        return await session.call_tool(
-                            "create_page",
-                            arguments={
-                                "title": title,
-                                "spaceKey": space_key,
-                                "content": storage_content,
-                            }
-                        )
-
-                    result: CallToolResult = await _call_create_page()
-
-                    # Check for configuration error in result content (even if isError is False)
-                    config_error = False
-                    result_text = ""
-                    for content_block in result.content:
-                        if isinstance(content_block, TextContent):
-                            result_text += content_block.text
-                    
-                    if result.isError or "No valid configuration found" in result_text or "setup_confluence" in result_text:
-                        if "No valid configuration found" in result_text or "setup_confluence" in result_text:
-                            config_error = True
-
-                    # Handle configuration error
-                    if config_error:
-                        logger.info("Confluence MCP server not configured. Attempting to configure...")
-                        setup_result = await session.call_tool(
-                            "setup_confluence",
-                            arguments={
-                                "action": "setup",
-                                "confluenceBaseUrl": settings.confluence_url,
-                                "confluenceEmail": settings.confluence_email,
-                                "confluenceApiToken": settings.confluence_api_token
-                            }
-                        )
-                        if setup_result.isError:
-                            logger.error(f"Failed to configure Confluence MCP server: {setup_result.content}")
-                            return None
-                        
-                        # Retry creation
-                        logger.info("Configuration successful. Retrying page creation...")
-                        result = await _call_create_page()
-
-                    if result.isError:
-                        logger.error(f"Error creating Confluence page: {result.content}")
-                        return None
-
-                    # Extract URL from result
-                    page_url = None
-                    for content_block in result.content:
-                        if isinstance(content_block, TextContent):
-                            logger.info(f"Confluence page created: {content_block.text}")
-                            page_url = content_block.text
-                            break
-                    
-                    if not page_url:
-                        page_url = "Page created (URL unknown)"
-
-                    # Upload attachment if requested
-                    if file_path:
-                        # We need the Page ID to upload attachments.
-                        # Since create_page tool might not return ID, we try to fetch it.
-                        logger.info("Retrieving Page ID for attachment upload...")
-                        # Wait a bit for indexing?
-                        await asyncio.sleep(3) 
-                        page_id = await self.get_page_id(title, space_key)
-                        
-                        if page_id:
-                            logger.info(f"Found Page ID: {page_id}. Uploading attachment...")
-                            await self.upload_attachment(page_id, file_path)
-                        else:
-                            logger.warning("Could not retrieve Page ID. Attachment upload skipped.")
+            # Handle configuration error
+            if config_error:
+                logger.info("Confluence MCP server not configured. Attempting to configure...")
+                if not await self._configure(session):
+                    return None
+
+                # Retry creation
+                logger.info("Configuration successful. Retrying page creation...")
+                result = await _call_create_page()
 
-                    return page_url
+            if result.isError:
+                logger.error(f"Error creating Confluence page: {result.content}")
+                return None
 
-                    return "Page created (URL unknown)"
+            # Extract URL from result
+            page_url = None
+            for content_block in result.content:
+                if isinstance(content_block, TextContent):
+                    logger.info(f"Confluence page created: {content_block.text}")
+                    page_url = content_block.text
+                    break
+
+            if not page_url:
+                page_url = "Page created (URL unknown)"
+
+            # Upload attachment if requested
+            if file_path:
+                # We need the Page ID to upload attachments. Take it from the
+                # returned page URL when present, otherwise look it up.
+                match = PAGE_ID_PATTERN.search(page_url)
+                if match:
+                    page_id = match.group(1) or match.group(2)
+                else:
+                    logger.info("Retrieving Page ID for attachment upload...")
+                    page_id = await self.get_page_id(title, space_key)
+
+                if page_id:
+                    logger.info(f"Found Page ID: {page_id}. Uploading attachment...")
+                    await self.upload_attachment(page_id, file_path)
+                else:
+                    logger.warning("Could not retrieve Page ID. Attachment upload skipped.")
+
+            return page_url
 
         except Exception as e:
             logger.error(f"Failed to create Confluence page: {e}")
+            # Start a fresh session next time in case this one broke
+            await self._close_session()
             return None
 
     async def get_page_id(self, title: str, space_key: Optional[str] = None) -> Optional[str]:
         """
         Retrieve the Page ID for a given title using Confluence REST API.
+
+        Uses the content listing endpoint filtered by title and space, which
+        reads pages directly rather than through the (lagging) CQL search
+        index; retries with backoff cover any remaining delay.
         """
-        import httpx
-        import urllib.parse
-        
         if space_key is None:
             space_key = settings.confluence_space_key
-            
-        # Escape double quotes in title for CQL
-        safe_title = title.replace('"', '\\"')
-        
-        cql = f'title = "{safe_title}" AND space = "{space_key}"'
-        encoded_cql = urllib.parse.quote(cql)
-        
-        url = f"{settings.confluence_url}/wiki/rest/api/content/search?cql={encoded_cql}&limit=1"
-        
-        # Remove /wiki if it's already in the base URL to avoid duplication
-        if "/wiki/wiki" in url:
-             url = url.replace("/wiki/wiki", "/wiki")
-             
-        auth = (settings.confluence_email, settings.confluence_api_token)
-        
+
+        url = f"{self.api_base}/content"
+        params = {"title": title, "spaceKey": space_key, "limit": 1}
+
+        client = self._get_http_client()
+
         for attempt in range(5):
             try:
                 if attempt > 0:
                     await asyncio.sleep(2 * attempt)
                     
-                logger.debug(f"Searching for page ID via REST API: {url} (Attempt {attempt+1})")
-                
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(
-                        url,
-                        auth=auth,
-                        timeout=30.0
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if "results" in data and len(data["results"]) > 0:
-                            page_id = data["results"][0]["id"]
-                            logger.info(f"Found Page ID: {page_id} for title '{title}'")
-                            return page_id
-                        else:
-                            logger.debug(f"No results found for title '{title}'")
+                logger.debug(f"Looking up page ID via REST API: '{title}' in {space_key} (Attempt {attempt+1})")
+
+                response = await client.get(url, params=params)
+
+                if response.status_code == 200:
+                    data = response.json()
+                    if "results" in data and len(data["results"]) > 0:
+                        page_id = data["results"][0]["id"]
+                        logger.info(f"Found Page ID: {page_id} for title '{title}'")
+                        return page_id
                     else:
-                        logger.error(f"Search failed. Status: {response.status_code}, Body: {response.text}")
+                        logger.debug(f"No results found for title '{title}'")
+                else:
+                    logger.error(f"Search failed. Status: {response.status_code}, Body: {response.text}")
                         
             except Exception as e:
                 logger.error(f"Exception retrieving page ID (attempt {attempt+1}): {e}")
@@ -231,42 +342,50 @@ class ConfluenceMCPClient:
         """
         Upload an attachment to a Confluence page using the REST API.
         """
-        import httpx
-        
-        if not os.path.exists(file_path):
+        # Stat in a worker thread; slow or network filesystems shouldn't stall the loop
+        try:
+            size = await asyncio.to_thread(os.path.getsize, file_path)
+        except OSError:
             logger.error(f"File not found: {file_path}")
             return False
             
-        url = f"{settings.confluence_url}/wiki/rest/api/content/{page_id}/child/attachment"
-        
-        # Remove /wiki if it's already in the base URL (handling user config variations)
-        if "/wiki/wiki" in url:
-             url = url.replace("/wiki/wiki", "/wiki")
-        
-        auth = (settings.confluence_email, settings.confluence_api_token)
-        headers = {"X-Atlassian-Token": "nocheck"}
-        
+        url = f"{self.api_base}/content/{page_id}/child/attachment"
+
         filename = os.path.basename(file_path)
-        
+
+        # Stream the multipart body by hand so disk reads happen off the event
+        # loop, a chunk at a time, overlapped with sending
+        boundary = secrets.token_hex(16)
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        quoted_name = filename.replace("\\", "\\\\").replace('"', "%22")
+        preamble = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{quoted_name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        epilogue = f"\r\n--{boundary}--\r\n".encode()
+
+        async def body() -> AsyncIterator[bytes]:
+            yield preamble
+            async for chunk in _read_chunks(file_path):
+                yield chunk
+            yield epilogue
+
         try:
-            async with httpx.AsyncClient() as client:
-                with open(file_path, "rb") as f:
-                    files = {"file": (filename, f)}
-                    response = await client.post(
-                        url, 
-                        auth=auth, 
-                        headers=headers, 
-                        files=files,
-                        timeout=30.0
-                    )
-                    
-                if response.status_code == 200:
-                    logger.info(f"Successfully uploaded attachment: {filename}")
-                    return True
-                else:
-                    logger.error(f"Failed to upload attachment. Status: {response.status_code}, Body: {response.text}")
-                    return False
-                    
+            headers = {
+                "X-Atlassian-Token": "nocheck",
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+                "Content-Length": str(len(preamble) + size + len(epilogue)),
+            }
+            response = await self._get_http_client().post(url, headers=headers, content=body())
+
+            if response.status_code == 200:
+                logger.info(f"Successfully uploaded attachment: {filename}")
+                return True
+            else:
+                logger.error(f"Failed to upload attachment. Status: {response.status_code}, Body: {response.text}")
+                return False
+
         except Exception as e:
             logger.error(f"Exception uploading attachment: {e}")
             return False
@@ -275,8 +394,6 @@ class ConfluenceMCPClient:
         """
         Delete a Confluence page by title.
         """
-        import httpx
-        
         if space_key is None:
             space_key = settings.confluence_space_key
 
@@ -288,32 +405,21 @@ class ConfluenceMCPClient:
             logger.warning(f"Page not found for deletion: {title}")
             return False
             
-        url = f"{settings.confluence_url}/wiki/rest/api/content/{page_id}"
-        
-        # Remove /wiki if it's already in the base URL
-        if "/wiki/wiki" in url:
-             url = url.replace("/wiki/wiki", "/wiki")
-        
-        auth = (settings.confluence_email, settings.confluence_api_token)
+        url = f"{self.api_base}/content/{page_id}"
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    url, 
-                    auth=auth, 
-                    timeout=30.0
-                )
-                
-                if response.status_code == 204:
-                    logger.info(f"Successfully deleted page: {title} (ID: {page_id})")
-                    return True
-                elif response.status_code == 404:
-                    logger.warning(f"Page already deleted or not found: {title}")
-                    return True
-                else:
-                    logger.error(f"Failed to delete page. Status: {response.status_code}, Body: {response.text}")
-                    return False
-                    
+            response = await self._get_http_client().delete(url)
+
+            if response.status_code == 204:
+                logger.info(f"Successfully deleted page: {title} (ID: {page_id})")
+                return True
+            elif response.status_code == 404:
+                logger.warning(f"Page already deleted or not found: {title}")
+                return True
+            else:
+                logger.error(f"Failed to delete page. Status: {response.status_code}, Body: {response.text}")
+                return False
+
         except Exception as e:
             logger.error(f"Exception deleting page: {e}")
             return False
@@ -326,3 +432,9 @@ def get_confluence_client() -> ConfluenceMCPClient:
     if _confluence_client is None:
         _confluence_client = ConfluenceMCPClient()
     return _confluence_client
+
+
+async def close_confluence_client():
+    """Close the Confluence client's MCP session and REST connections, if it was created."""
+    if _confluence_client is not None:
+        await _confluence_client.aclose()
@@ -1,14 +1,27 @@
 from typing import List, Dict, Any, Optional
+import calendar
 import logging
 import time
+from datetime import date, datetime, time as dt_time
+from sqlalchemy import select
 
+from app.core.config import settings
 from app.core.pinecone_client import pinecone_client
 from app.services.embeddings import get_embedding_generator
-from app.core.database import SessionLocal
-from app.core.database import Document
+from app.core.database import AsyncSessionLocal, Document, chunked
 
 logger = logging.getLogger(__name__)
 
+# Document columns included in result metadata
+_DOCUMENT_COLUMNS = (
+    Document.id,
+    Document.filename,
+    Document.source_type,
+    Document.industry,
+    Document.author,
+    Document.document_date,
+)
+
 
 class RetrievalService:
     """Handle RAG retrieval from knowledge base."""
@@ -33,65 +46,87 @@ class RetrievalService:
         Returns:
             Query results with chunks and metadata
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
-            # Generate query embedding
-            query_embedding = await self.embedding_generator.embed(query_text)
+            # Generate query embedding. Whitespace is collapsed first so repeat
+            # queries that differ only in spacing share an embedding cache entry;
+            # the tokenizer splits on whitespace, so the embedding is unchanged.
+            query_embedding = await self.embedding_generator.embed(" ".join(query_text.split()))
 
             # Build Pinecone filters if provided
             pinecone_filter = None
             if filters:
                 pinecone_filter = self._build_pinecone_filter(filters)
 
-            # Query Pinecone
+            # Query Pinecone, over-fetching candidates when reranking
             pinecone_response = await pinecone_client.query(
                 vector=query_embedding,
-                top_k=top_k,
+                top_k=top_k * settings.rerank_fetch_multiplier if settings.rerank_enabled else top_k,
                 filter=pinecone_filter,
                 include_metadata=True
             )
+            pinecone_matches = pinecone_response.get("matches", [])
+            if settings.rerank_enabled:
+                pinecone_matches = await self._rerank(query_text, pinecone_matches, top_k)
+
+            # Read document IDs from metadata (written as an int at ingest; Pinecone
+            # returns numbers as floats), else from the chunk ID (doc_{doc_id}_chunk_{chunk_idx})
+            matches = []
+            for match in pinecone_matches:
+                document_id = (match.get("metadata") or {}).get("document_id")
+                if document_id is not None:
+                    matches.append((int(document_id), match))
+                    continue
+                try:
+                    matches.append((int(match["id"].split("_")[1]), match))
+                except (IndexError, ValueError):
+                    logger.warning(f"Invalid chunk ID format: {match['id']}")
+
+            # Document fields are stored in the vector metadata at ingest; only
+            # vectors written before document_date was added need the database
+            documents = await self._fetch_documents(list({
+                doc_id for doc_id, match in matches
+                if "document_date" not in (match.get("metadata") or {})
+            }))
 
             # Process results
             results = []
-            db = SessionLocal()
-            try:
-                for match in pinecone_response.get("matches", []):
-                    chunk_id = match["id"]
-                    score = match["score"]
-                    metadata = match.get("metadata", {})
-
-                    # Extract document ID from chunk ID (format: doc_{doc_id}_chunk_{chunk_idx})
-                    try:
-                        doc_id = int(chunk_id.split("_")[1])
-                    except (IndexError, ValueError):
-                        logger.warning(f"Invalid chunk ID format: {chunk_id}")
-                        continue
-
-                    # Fetch document from database
-                    document = db.query(Document).filter(Document.id == doc_id).first()
+            for doc_id, match in matches:
+                metadata = match.get("metadata") or {}
+                if "document_date" in metadata:
+                    document_metadata = {
+                        "filename": metadata.get("filename"),
+                        "source_type": metadata.get("source_type"),
+                        "industry": metadata.get("industry"),
+                        "author": metadata.get("author"),
+                        "document_date": metadata["document_date"] or None,
+                    }
+                else:
+                    document = documents.get(doc_id)
                     if not document:
                         continue
+                    document_metadata = {
+                        "filename": document.filename,
+                        "source_type": document.source_type,
+                        "industry": document.industry,
+                        "author": document.author,
+                        "document_date": document.document_date.isoformat() if document.document_date else None,
+                    }
 
-                    result = {
-                        "document_id": doc_id,
-                        "chunk_id": chunk_id,
-                        "content": metadata.get("text", ""),
-                        "score": float(score),
-                        "metadata": {
-                            "filename": document.filename,
-                            "source_type": document.source_type,
-                            "industry": document.industry,
-                            "author": document.author,
-                            "document_date": document.document_date.isoformat() if document.document_date else None,
-                            "chunk_index": metadata.get("chunk_index", 0),
-                        }
+                result = {
+                    "document_id": doc_id,
+                    "chunk_id": match["id"],
+                    "content": metadata.get("text", ""),
+                    "score": float(match["score"]),
+                    "metadata": {
+                        **document_metadata,
+                        "chunk_index": metadata.get("chunk_index", 0),
                     }
-                    results.append(result)
-            finally:
-                db.close()
+                }
+                results.append(result)
 
-            processing_time = (time.time() - start_time) * 1000  # Convert to ms
+            processing_time = (time.perf_counter() - start_time) * 1000  # Convert to ms
 
             response = {
                 "query": query_text,
@@ -107,6 +142,55 @@ class RetrievalService:
             logger.error(f"Error in query: {e}")
             raise
 
+    async def _rerank(
+        self,
+        query_text: str,
+        matches: List[Dict[str, Any]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Reorder matches by cross-encoder relevance and keep the best top_k.
+
+        Each match keeps its vector similarity as its score; only the order changes.
+
+        Args:
+            query_text: Query string
+            matches: Pinecone matches, with metadata
+            top_k: Number of matches to keep
+
+        Returns:
+            The top_k matches, most relevant first
+        """
+        if not matches:
+            return matches
+
+        scores = await self.embedding_generator.rerank(
+            query_text,
+            [(match.get("metadata") or {}).get("text", "") for match in matches]
+        )
+        order = sorted(range(len(matches)), key=lambda i: scores[i], reverse=True)
+        return [matches[i] for i in order[:top_k]]
+
+    async def _fetch_documents(self, document_ids: List[int]) -> Dict[int, Any]:
+        """
+        Fetch the metadata columns of documents, keyed by id.
+
+        Args:
+            document_ids: Document IDs to fetch
+
+        Returns:
+            Dict mapping document id to a row of _DOCUMENT_COLUMNS
+        """
+        if not document_ids:
+            return {}
+
+        async with AsyncSessionLocal() as db:
+            documents = {}
+            for batch in chunked(document_ids):
+                result = await db.execute(select(*_DOCUMENT_COLUMNS).where(Document.id.in_(batch)))
+                documents.update((doc.id, doc) for doc in result.all())
+            return documents
+
     def _build_pinecone_filter(self, filters: Dict[str, Any]) -> Dict[str, Any]:
         """
         Build Pinecone filter from user filters.
@@ -124,15 +208,48 @@ class RetrievalService:
             "industry": "industry",
             "author": "author",
             "source_type": "source_type",
-            "document_id": "document_id"
+            "document_id": "document_id",
+            "chunk_index": "chunk_index",
         }
 
         for key, value in filters.items():
             if key in filter_mapping:
-                pinecone_filter[filter_mapping[key]] = value
+                # A list matches any of its values
+                operator = "$in" if isinstance(value, list) else "$eq"
+                pinecone_filter[filter_mapping[key]] = {operator: value}
+
+        # Document date range, against the numeric timestamp written at ingest
+        date_range = {}
+        if filters.get("date_from"):
+            date_range["$gte"] = self._to_timestamp(filters["date_from"])
+        if filters.get("date_to"):
+            date_range["$lte"] = self._to_timestamp(filters["date_to"])
+        if date_range:
+            pinecone_filter["document_timestamp"] = date_range
 
         return pinecone_filter if pinecone_filter else None
 
+    @staticmethod
+    def _to_timestamp(value: Any) -> int:
+        """
+        Convert an ISO date string, date, datetime or epoch number to UTC epoch seconds.
+
+        Raises:
+            ValueError: If the value is not a recognizable date
+        """
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return int(value)
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"Invalid date filter {value!r}; expected an ISO 8601 date") from None
+        elif isinstance(value, date) and not isinstance(value, datetime):
+            value = datetime.combine(value, dt_time.min)
+        elif not isinstance(value, datetime):
+            raise ValueError(f"Invalid date filter {value!r}; expected an ISO 8601 date")
+        return calendar.timegm(value.utctimetuple())
+
 
 # Global retrieval service instance
 def get_retrieval_service() -> RetrievalService:
@@ -1,9 +1,14 @@
 """Template service for managing content generation templates."""
 
-from typing import List, Dict, Any, Optional
+import copy
+from typing import Iterator, List, Dict, Any, Optional
+from contextlib import contextmanager
 import logging
 from sqlalchemy import desc
+from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.database import SessionLocal, ContentTemplate
 
 logger = logging.getLogger(__name__)
@@ -56,13 +61,15 @@ DEFAULT_TEMPLATES = {
                     "name": "Conclusion",
                     "prompt": "Summarize key takeaways and provide clear next steps or recommendations for the reader.",
                     "max_words": 400,
-                    "required": True
+                    "required": True,
+                    "complexity": "simple"
                 },
                 {
                     "name": "References",
                     "prompt": "List all sources and references cited in the whitepaper.",
                     "max_words": 200,
-                    "required": True
+                    "required": True,
+                    "complexity": "simple"
                 }
             ],
             "style": "formal",
@@ -116,7 +123,8 @@ DEFAULT_TEMPLATES = {
                     "name": "Conclusion & Call-to-Action",
                     "prompt": "Summarize key points and provide a clear call-to-action or next steps for readers.",
                     "max_words": 300,
-                    "required": True
+                    "required": True,
+                    "complexity": "simple"
                 }
             ],
             "style": "professional",
@@ -158,13 +166,15 @@ DEFAULT_TEMPLATES = {
                     "name": "Key Takeaways",
                     "prompt": "Highlight the key takeaways in a clear, scannable format (bullet points or numbered list).",
                     "max_words": 200,
-                    "required": True
+                    "required": True,
+                    "complexity": "simple"
                 },
                 {
                     "name": "Conclusion & Engagement",
                     "prompt": "Wrap up with a brief conclusion and encourage reader engagement (comments, sharing, or related actions).",
                     "max_words": 150,
-                    "required": True
+                    "required": True,
+                    "complexity": "simple"
                 }
             ],
             "style": "conversational",
@@ -176,12 +186,27 @@ DEFAULT_TEMPLATES = {
 }
 
 
+@contextmanager
+def _session(db: Optional[Session]) -> Iterator[Session]:
+    """Use the caller's session, or open one and close it afterwards."""
+    if db is not None:
+        yield db
+        return
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 class TemplateService:
     """Service for managing content generation templates."""
 
     def __init__(self):
         """Initialize template service."""
-        pass
+        # Templates by ("id", template_id) and ("default", content_type); cleared on every write
+        self._cache = TTLCache(maxsize=64, ttl=settings.template_cache_ttl)
 
     def initialize_default_templates(self) -> None:
         """
@@ -190,14 +215,16 @@ class TemplateService:
         """
         db = SessionLocal()
         try:
-            for content_type, template_data in DEFAULT_TEMPLATES.items():
-                # Check if default template already exists
-                existing = db.query(ContentTemplate).filter(
-                    ContentTemplate.content_type == content_type,
+            # Content types that already have a default template, in one query
+            existing = {
+                content_type for (content_type,) in db.query(ContentTemplate.content_type).filter(
+                    ContentTemplate.content_type.in_(DEFAULT_TEMPLATES.keys()),
                     ContentTemplate.is_default == True
-                ).first()
+                ).all()
+            }
 
-                if not existing:
+            for content_type, template_data in DEFAULT_TEMPLATES.items():
+                if content_type not in existing:
                     template = ContentTemplate(
                         name=template_data["name"],
                         description=template_data["description"],
@@ -210,6 +237,7 @@ class TemplateService:
                     logger.info(f"Created default template for {content_type}")
 
             db.commit()
+            self._cache.clear()
             logger.info("Default templates initialized")
 
         except Exception as e:
@@ -218,42 +246,47 @@ class TemplateService:
         finally:
             db.close()
 
-    def get_template(self, template_id: int) -> Optional[Dict[str, Any]]:
+    def get_template(self, template_id: int, db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
         """
         Get a template by ID.
 
         Args:
             template_id: Template ID
+            db: Optional session to use (default: open a new one)
 
         Returns:
             Template data or None if not found
         """
-        db = SessionLocal()
-        try:
-            template = db.query(ContentTemplate).filter(
-                ContentTemplate.id == template_id
-            ).first()
+        cached = self._cache.get(("id", template_id))
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        with _session(db) as db:
+            template = db.get(ContentTemplate, template_id)
 
             if not template:
                 return None
 
-            return self._template_to_dict(template)
+            result = self._template_to_dict(template)
+            self._cache.set(("id", template_id), copy.deepcopy(result))
+            return result
 
-        finally:
-            db.close()
-
-    def get_default_template(self, content_type: str) -> Optional[Dict[str, Any]]:
+    def get_default_template(self, content_type: str, db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
         """
         Get the default template for a content type.
 
         Args:
             content_type: Content type (whitepaper, article, blog)
+            db: Optional session to use (default: open a new one)
 
         Returns:
             Template data or None if not found
         """
-        db = SessionLocal()
-        try:
+        cached = self._cache.get(("default", content_type))
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        with _session(db) as db:
             template = db.query(ContentTemplate).filter(
                 ContentTemplate.content_type == content_type,
                 ContentTemplate.is_default == True
@@ -262,15 +295,15 @@ class TemplateService:
             if not template:
                 return None
 
-            return self._template_to_dict(template)
-
-        finally:
-            db.close()
+            result = self._template_to_dict(template)
+            self._cache.set(("default", content_type), copy.deepcopy(result))
+            return result
 
     def list_templates(
         self,
         content_type: Optional[str] = None,
-        include_private: bool = False
+        include_private: bool = False,
+        db: Optional[Session] = None
     ) -> List[Dict[str, Any]]:
         """
         List all templates.
@@ -278,12 +311,12 @@ class TemplateService:
         Args:
             content_type: Optional filter by content type
             include_private: Whether to include private templates
+            db: Optional session to use (default: open a new one)
 
         Returns:
             List of templates
         """
-        db = SessionLocal()
-        try:
+        with _session(db) as db:
             query = db.query(ContentTemplate)
 
             if content_type:
@@ -300,9 +333,6 @@ class TemplateService:
 
             return [self._template_to_dict(t) for t in templates]
 
-        finally:
-            db.close()
-
     def create_template(
         self,
         name: str,
@@ -310,7 +340,8 @@ class TemplateService:
         template_structure: Dict[str, Any],
         description: Optional[str] = None,
         is_public: bool = True,
-        created_by: Optional[str] = None
+        created_by: Optional[str] = None,
+        db: Optional[Session] = None
     ) -> Dict[str, Any]:
         """
         Create a new custom template.
@@ -322,35 +353,35 @@ class TemplateService:
             description: Optional description
             is_public: Whether template is public
             created_by: User ID who created it (for future)
+            db: Optional session to use (default: open a new one)
 
         Returns:
             Created template data
         """
-        db = SessionLocal()
-        try:
-            template = ContentTemplate(
-                name=name,
-                description=description,
-                content_type=content_type,
-                template_structure=template_structure,
-                is_default=False,
-                is_public=is_public,
-                created_by=created_by
-            )
-
-            db.add(template)
-            db.commit()
-            db.refresh(template)
-
-            logger.info(f"Created template: {name} (ID: {template.id})")
-            return self._template_to_dict(template)
-
-        except Exception as e:
-            logger.error(f"Failed to create template: {e}")
-            db.rollback()
-            raise
-        finally:
-            db.close()
+        with _session(db) as db:
+            try:
+                template = ContentTemplate(
+                    name=name,
+                    description=description,
+                    content_type=content_type,
+                    template_structure=template_structure,
+                    is_default=False,
+                    is_public=is_public,
+                    created_by=created_by
+                )
+
+                db.add(template)
+                db.commit()
+                db.refresh(template)
+                self._cache.clear()
+
+                logger.info(f"Created template: {name} (ID: {template.id})")
+                return self._template_to_dict(template)
+
+            except Exception as e:
+                logger.error(f"Failed to create template: {e}")
+                db.rollback()
+                raise
 
     def update_template(
         self,
@@ -358,7 +389,8 @@ class TemplateService:
         name: Optional[str] = None,
         description: Optional[str] = None,
         template_structure: Optional[Dict[str, Any]] = None,
-        is_public: Optional[bool] = None
+        is_public: Optional[bool] = None,
+        db: Optional[Session] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Update an existing template.
@@ -369,81 +401,77 @@ class TemplateService:
             description: New description (optional)
             template_structure: New structure (optional)
             is_public: New public status (optional)
+            db: Optional session to use (default: open a new one)
 
         Returns:
             Updated template data or None if not found
         """
-        db = SessionLocal()
-        try:
-            template = db.query(ContentTemplate).filter(
-                ContentTemplate.id == template_id
-            ).first()
-
-            if not template:
-                return None
-
-            # Don't allow updating default templates
-            if template.is_default:
-                raise ValueError("Cannot update default templates")
-
-            # Update fields
-            if name is not None:
-                template.name = name
-            if description is not None:
-                template.description = description
-            if template_structure is not None:
-                template.template_structure = template_structure
-            if is_public is not None:
-                template.is_public = is_public
-
-            db.commit()
-            db.refresh(template)
-
-            logger.info(f"Updated template: {template_id}")
-            return self._template_to_dict(template)
-
-        except Exception as e:
-            logger.error(f"Failed to update template: {e}")
-            db.rollback()
-            raise
-        finally:
-            db.close()
-
-    def delete_template(self, template_id: int) -> bool:
+        with _session(db) as db:
+            try:
+                template = db.get(ContentTemplate, template_id)
+
+                if not template:
+                    return None
+
+                # Don't allow updating default templates
+                if template.is_default:
+                    raise ValueError("Cannot update default templates")
+
+                # Update fields
+                if name is not None:
+                    template.name = name
+                if description is not None:
+                    template.description = description
+                if template_structure is not None:
+                    template.template_structure = template_structure
+                if is_public is not None:
+                    template.is_public = is_public
+
+                db.commit()
+                db.refresh(template)
+                self._cache.clear()
+
+                logger.info(f"Updated template: {template_id}")
+                return self._template_to_dict(template)
+
+            except Exception as e:
+                logger.error(f"Failed to update template: {e}")
+                db.rollback()
+                raise
+
+    def delete_template(self, template_id: int, db: Optional[Session] = None) -> bool:
         """
         Delete a template.
 
         Args:
             template_id: Template ID
+            db: Optional session to use (default: open a new one)
 
         Returns:
             True if deleted, False if not found
         """
-        db = SessionLocal()
-        try:
-            template = db.query(ContentTemplate).filter(
-                ContentTemplate.id == template_id
-            ).first()
+        with _session(db) as db:
+            try:
+                template = db.get(ContentTemplate, template_id)
 
-            if not template:
-                return False
+                if not template:
+                    return False
 
-            # Don't allow deleting default templates
-            if template.is_default:
-                raise ValueError("Cannot delete default templates")
+                # Don't allow deleting default templates
+                if template.is_default:
+                    raise ValueError("Cannot delete default templates")
 
-            db.delete(template)
-            db.commit()
+                db.delete(template)
+                db.commit()
+                self._cache.clear()
 
-            logger.info(f"Deleted template: {template_id}")
-            return True
+                logger.info(f"Deleted template: {template_id}")
+                return True
 
-        except Exception as e:
-            logger.error(f"Failed to delete template: {e}")
-            db.rollback()
-            raise
-        finally:
-            db.close()
+            except Exception as e:
+                logger.error(f"Failed to delete template: {e}")
+                db.rollback()
+                raise
 
     def _template_to_dict(self, template: ContentTemplate) -> Dict[str, Any]:
         """Convert template model to dict."""
@@ -456,8 +484,8 @@ class TemplateService:
             "is_default": template.is_default,
             "is_public": template.is_public,
             "created_by": template.created_by,
-            "created_at": template.created_at.isoformat(),
-            "updated_at": template.updated_at.isoformat(),
+            "created_at": template.created_at,
+            "updated_at": template.updated_at,
         }
 
 
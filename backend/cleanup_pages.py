@@ -2,7 +2,6 @@ import asyncio
 import os
 import logging
 import httpx
-import urllib.parse
 from dotenv import load_dotenv
 
 # Configure logging
@@ -12,6 +11,28 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), "../.env"))
 
+# Deletes in flight at once
+DELETE_CONCURRENCY = 5
+# Attempts per delete on rate-limit/5xx responses
+MAX_ATTEMPTS = 4
+
+
+async def delete_page(client: httpx.AsyncClient, delete_url: str, page_title: str, page_id: str):
+    """Delete one page, backing off exponentially on 429/5xx responses."""
+    logger.info(f"Deleting page: {page_title} (ID: {page_id})...")
+    for attempt in range(MAX_ATTEMPTS):
+        del_response = await client.delete(delete_url)
+        if del_response.status_code != 429 and del_response.status_code < 500:
+            break
+        if attempt < MAX_ATTEMPTS - 1:
+            await asyncio.sleep(2 ** attempt)
+
+    if del_response.status_code == 204:
+        logger.info(f"Successfully deleted: {page_title} (ID: {page_id})")
+    else:
+        logger.error(f"Failed to delete {page_title} (ID: {page_id}): {del_response.status_code}")
+
+
 async def cleanup_page(title_part: str):
     # Configuration
     confluence_url = os.environ.get("CONFLUENCE_URL")
@@ -24,25 +45,29 @@ async def cleanup_page(title_part: str):
         return
 
     auth = (email, api_token)
+    # REST API base, whether or not CONFLUENCE_URL already ends in /wiki
+    api_base = confluence_url.rstrip("/").removesuffix("/wiki") + "/wiki/rest/api"
     
-    auth = (email, api_token)
-    
-    # Construct CQL
+    # Construct CQL, escaping quotes and backslashes in the title
     if title_part:
-        cql = f'title ~ "{title_part}" AND space = "{space_key}"'
+        escaped_title = title_part.replace("\\", "\\\\").replace('"', '\\"')
+        cql = f'title ~ "{escaped_title}" AND space = "{space_key}"'
         logger.info(f"Searching for pages matching '{title_part}' in space '{space_key}'...")
     else:
         cql = f'space = "{space_key}" order by created desc'
         logger.info(f"Listing recent pages in space '{space_key}'...")
-        
-    encoded_cql = urllib.parse.quote(cql)
-    
-    search_url = f"{confluence_url}/wiki/rest/api/content/search?cql={encoded_cql}&limit=20"
-    if "/wiki/wiki" in search_url:
-        search_url = search_url.replace("/wiki/wiki", "/wiki")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(search_url, auth=auth)
+    # One pooled client for the search and all deletes
+    async with httpx.AsyncClient(
+        auth=auth,
+        http2=True,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+        timeout=30,
+    ) as client:
+        response = await client.get(
+            f"{api_base}/content/search",
+            params={"cql": cql, "limit": 20}
+        )
         
         if response.status_code != 200:
             logger.error(f"Search failed: {response.status_code} {response.text}")
@@ -59,22 +84,17 @@ async def cleanup_page(title_part: str):
         for page in results:
             logger.info(f" - ID: {page['id']}, Title: {page['title']}")
 
-        # Delete pages
-        for page in results:
+        # Delete pages concurrently
+        sem = asyncio.Semaphore(DELETE_CONCURRENCY)
+
+        async def delete_one(page):
             page_id = page['id']
-            page_title = page['title']
-            
-            delete_url = f"{confluence_url}/wiki/rest/api/content/{page_id}"
-            if "/wiki/wiki" in delete_url:
-                delete_url = delete_url.replace("/wiki/wiki", "/wiki")
-                
-            logger.info(f"Deleting page: {page_title} (ID: {page_id})...")
-            del_response = await client.delete(delete_url, auth=auth)
-            
-            if del_response.status_code == 204:
-                logger.info("Successfully deleted.")
-            else:
-                logger.error(f"Failed to delete: {del_response.status_code}")
+            delete_url = f"{api_base}/content/{page_id}"
+
+            async with sem:
+                await delete_page(client, delete_url, page['title'], page_id)
+
+        await asyncio.gather(*(delete_one(page) for page in results))
 
 if __name__ == "__main__":
     import sys
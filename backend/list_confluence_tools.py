@@ -1,35 +1,26 @@
 import asyncio
-import os
-from mcp.client.stdio import stdio_client, StdioServerParameters
-from mcp.client.session import ClientSession
+from mcp_session import mcp_session, aclose, COMMAND, ARGS
 
-async def main():
-    command = "npx"
-    args = ["-y", "@aiondadotcom/mcp-confluence-server"]
-    env = os.environ.copy()
-    
-    print(f"Connecting to MCP server: {command} {' '.join(args)}")
-    
-    server_params = StdioServerParameters(
-        command=command,
-        args=args,
-        env=env
-    )
+async def run():
+    print(f"Connecting to MCP server: {COMMAND} {' '.join(ARGS)}")
     
     try:
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                
-                tools = await session.list_tools()
-                print("\nAvailable Tools:")
-                for tool in tools.tools:
-                    print(f"- {tool.name}: {tool.description}")
-                    print(f"  Schema: {tool.inputSchema}")
-                    print("-" * 40)
-                    
+        async with mcp_session() as session:
+            tools = await session.list_tools()
+            print("\nAvailable Tools:")
+            for tool in tools.tools:
+                print(f"- {tool.name}: {tool.description}")
+                print(f"  Schema: {tool.inputSchema}")
+                print("-" * 40)
+
     except Exception as e:
         print(f"Error: {e}")
 
+async def main():
+    try:
+        await run()
+    finally:
+        await aclose()
+
 if __name__ == "__main__":
     asyncio.run(main())
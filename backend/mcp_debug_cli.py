@@ -0,0 +1,37 @@
+"""Run several Confluence MCP debug scripts in one process and one MCP session.
+
+Usage: python mcp_debug_cli.py tools search confluence create-page
+"""
+import argparse
+import asyncio
+import importlib
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables before the scripts read them at import
+load_dotenv(os.path.join(os.path.dirname(__file__), "../.env"))
+
+from mcp_session import aclose
+
+# Command -> (script module, coroutine function); scripts are imported only when run
+COMMANDS = {
+    "confluence": ("debug_confluence", "run"),
+    "search": ("debug_search", "debug_search"),
+    "tools": ("list_confluence_tools", "run"),
+    "create-page": ("test_create_page", "run"),
+}
+
+
+async def main(commands):
+    try:
+        for command in commands:
+            module, function = COMMANDS[command]
+            await getattr(importlib.import_module(module), function)()
+    finally:
+        await aclose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("commands", nargs="+", choices=COMMANDS, help="Scripts to run, in order")
+    asyncio.run(main(parser.parse_args().commands))
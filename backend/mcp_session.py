@@ -0,0 +1,64 @@
+import json
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import anyio
+from mcp.client.stdio import stdio_client, StdioServerParameters
+from mcp.client.session import ClientSession
+
+# Confluence MCP server, spawned once per process. Overridable like the app's
+# confluence_mcp_command/args settings, e.g. to run a locally installed server
+# instead of having npx resolve the package on every run.
+COMMAND = os.environ.get("CONFLUENCE_MCP_COMMAND", "npx")
+ARGS = json.loads(os.environ.get("CONFLUENCE_MCP_ARGS", '["-y", "@aiondadotcom/mcp-confluence-server"]'))
+# Seconds to wait for the server's initialize() response before giving up
+INITIALIZE_TIMEOUT = float(os.environ.get("CONFLUENCE_MCP_INIT_TIMEOUT", "10"))
+
+_session: Optional[ClientSession] = None
+_stack: Optional[AsyncExitStack] = None
+
+
+@asynccontextmanager
+async def mcp_session() -> AsyncIterator[ClientSession]:
+    """
+    Yield an initialized session with the Confluence MCP server.
+
+    The server subprocess and session are started on first use and kept
+    open, so later calls reuse them. Call aclose() from the same task
+    before the event loop exits.
+    """
+    global _session, _stack
+    if _session is None:
+        stack = AsyncExitStack()
+        server_params = StdioServerParameters(
+            command=COMMAND,
+            args=ARGS,
+            env=os.environ.copy()
+        )
+        try:
+            read, write = await stack.enter_async_context(stdio_client(server_params))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            try:
+                with anyio.fail_after(INITIALIZE_TIMEOUT):
+                    await session.initialize()
+            except TimeoutError:
+                raise TimeoutError(
+                    f"MCP server did not initialize within {INITIALIZE_TIMEOUT:g}s; the npx download "
+                    f"may have stalled. Run '{COMMAND} {' '.join(ARGS)}' once manually to warm the cache, "
+                    f"or raise CONFLUENCE_MCP_INIT_TIMEOUT."
+                ) from None
+        except BaseException:
+            await stack.aclose()
+            raise
+        _session, _stack = session, stack
+
+    yield _session
+
+
+async def aclose() -> None:
+    """Close the cached session and stop the MCP server subprocess."""
+    global _session, _stack
+    if _stack is not None:
+        stack, _session, _stack = _stack, None, None
+        await stack.aclose()
@@ -0,0 +1,20 @@
+-- Migration: Store JINA response headers as JSONB and extract rate-limit fields
+-- Date: 2024-12-02
+--
+-- Summary queries only need a couple of numeric header values. Extracting them
+-- into a stored generated column lets aggregates read a fixed-width integer
+-- instead of parsing the JSON blob for every row.
+
+ALTER TABLE api_usage_audit
+    ALTER COLUMN jina_response_headers TYPE JSONB
+    USING jina_response_headers::jsonb;
+
+ALTER TABLE api_usage_audit
+    ADD COLUMN IF NOT EXISTS jina_rate_limit_remaining INTEGER
+    GENERATED ALWAYS AS (
+        CASE WHEN (jina_response_headers->>'x-ratelimit-remaining') ~ '^[0-9]+$'
+             THEN (jina_response_headers->>'x-ratelimit-remaining')::int
+        END
+    ) STORED;
+
+COMMENT ON COLUMN api_usage_audit.jina_rate_limit_remaining IS 'x-ratelimit-remaining extracted from jina_response_headers';
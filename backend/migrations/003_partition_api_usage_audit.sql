@@ -0,0 +1,97 @@
+-- Migration: Range-partition api_usage_audit by month on created_at
+-- Date: 2024-12-09
+--
+-- Usage summaries and cost estimates are scoped by created_at, so with monthly
+-- partitions the planner only scans the months inside the requested window.
+-- Expiring old data becomes DETACH/DROP PARTITION instead of a bulk DELETE.
+--
+-- Postgres requires the partition key in every unique constraint, so the
+-- primary key becomes (id, created_at) and request_id is unique per created_at.
+
+BEGIN;
+
+-- LLM usage columns exist on the ORM model but not in migration 001; add them
+-- so databases built from the SQL migrations have every column copied below
+ALTER TABLE api_usage_audit
+    ADD COLUMN IF NOT EXISTS llm_provider VARCHAR,
+    ADD COLUMN IF NOT EXISTS llm_model VARCHAR,
+    ADD COLUMN IF NOT EXISTS llm_input_tokens INTEGER,
+    ADD COLUMN IF NOT EXISTS llm_output_tokens INTEGER,
+    ADD COLUMN IF NOT EXISTS llm_total_tokens INTEGER,
+    ADD COLUMN IF NOT EXISTS llm_cost_estimate DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS generated_content_id INTEGER;
+
+ALTER TABLE api_usage_audit RENAME TO api_usage_audit_unpartitioned;
+
+CREATE TABLE api_usage_audit (
+    LIKE api_usage_audit_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING COMMENTS,
+    PRIMARY KEY (id, created_at),
+    UNIQUE (request_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER TABLE api_usage_audit ALTER COLUMN created_at SET NOT NULL;
+ALTER SEQUENCE api_usage_audit_id_seq OWNED BY api_usage_audit.id;
+
+CREATE INDEX IF NOT EXISTS idx_api_usage_audit_p_service ON api_usage_audit(service);
+CREATE INDEX IF NOT EXISTS idx_api_usage_audit_p_operation ON api_usage_audit(operation);
+CREATE INDEX IF NOT EXISTS idx_api_usage_audit_p_document_id ON api_usage_audit(document_id);
+CREATE INDEX IF NOT EXISTS idx_api_usage_audit_p_generated_content_id ON api_usage_audit(generated_content_id);
+CREATE INDEX IF NOT EXISTS idx_api_usage_audit_p_user_id ON api_usage_audit(user_id);
+CREATE INDEX IF NOT EXISTS idx_api_usage_audit_p_created_at ON api_usage_audit(created_at);
+
+-- Catch-all for rows outside any monthly partition (e.g. clock skew)
+CREATE TABLE IF NOT EXISTS api_usage_audit_default
+    PARTITION OF api_usage_audit DEFAULT;
+
+-- Create the monthly partition containing `month`; safe to call repeatedly.
+-- Schedule nightly (cron / pg_cron) with now() + interval '1 month'.
+CREATE OR REPLACE FUNCTION create_api_usage_audit_partition(month DATE)
+RETURNS VOID AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::date;
+    end_date DATE := (date_trunc('month', month) + interval '1 month')::date;
+    partition_name TEXT := format('api_usage_audit_y%sm%s',
+                                  to_char(start_date, 'YYYY'),
+                                  to_char(start_date, 'MM'));
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF api_usage_audit FOR VALUES FROM (%L) TO (%L)',
+        partition_name, start_date, end_date
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions for every month that already has data, plus current and next month
+SELECT create_api_usage_audit_partition(m::date)
+FROM generate_series(
+    date_trunc('month', LEAST(COALESCE((SELECT MIN(created_at) FROM api_usage_audit_unpartitioned), now()), now())),
+    date_trunc('month', now() + interval '1 month'),
+    interval '1 month'
+) AS m;
+
+INSERT INTO api_usage_audit (
+    id, service, operation, request_id, endpoint,
+    jina_input_chars, jina_output_chars, jina_estimated_tokens, jina_response_headers,
+    pinecone_operation, pinecone_vector_count, pinecone_dimension, pinecone_namespace,
+    pinecone_read_units, pinecone_write_units,
+    llm_provider, llm_model, llm_input_tokens, llm_output_tokens, llm_total_tokens, llm_cost_estimate,
+    document_id, generated_content_id, user_id,
+    status, error_message, duration_ms, created_at
+)
+SELECT
+    id, service, operation, request_id, endpoint,
+    jina_input_chars, jina_output_chars, jina_estimated_tokens, jina_response_headers,
+    pinecone_operation, pinecone_vector_count, pinecone_dimension, pinecone_namespace,
+    pinecone_read_units, pinecone_write_units,
+    llm_provider, llm_model, llm_input_tokens, llm_output_tokens, llm_total_tokens, llm_cost_estimate,
+    document_id, generated_content_id, user_id,
+    status, error_message, duration_ms, COALESCE(created_at, now())
+FROM api_usage_audit_unpartitioned;
+
+DROP TABLE api_usage_audit_unpartitioned;
+
+COMMIT;
+
+-- Expire a month in O(1):
+--   ALTER TABLE api_usage_audit DETACH PARTITION api_usage_audit_y2025m01;
+--   DROP TABLE api_usage_audit_y2025m01;
@@ -0,0 +1,8 @@
+-- Migration: Composite index for listing generated content by type
+-- Date: 2024-12-16
+--
+-- list_generated_content filters on content_type and orders by created_at
+-- DESC. With both in one index the page is read in order instead of sorted.
+
+CREATE INDEX IF NOT EXISTS ix_generated_content_type_created
+    ON generated_content (content_type, created_at DESC);
@@ -0,0 +1,12 @@
+-- Migration: Store generated content HTML gzip-compressed
+-- Date: 2024-12-16
+--
+-- New rows keep their HTML only in content_html_gz (gzip, roughly 5x smaller
+-- for generated HTML) and leave content_html NULL. Existing rows keep their
+-- plain content_html and are read as before.
+
+ALTER TABLE generated_content
+    ADD COLUMN IF NOT EXISTS content_html_gz BYTEA;
+
+ALTER TABLE generated_content
+    ALTER COLUMN content_html DROP NOT NULL;
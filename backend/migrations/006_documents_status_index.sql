@@ -0,0 +1,8 @@
+-- Migration: Composite index for selecting completed documents by id
+-- Date: 2024-12-18
+--
+-- Document suggestion and ranking fetch `WHERE id IN (...) AND status =
+-- 'completed'` after every vector search.
+
+CREATE INDEX IF NOT EXISTS ix_documents_status_id
+    ON documents (status, id);
@@ -0,0 +1,8 @@
+-- Migration: Index for prefetching recently updated completed documents
+-- Date: 2024-12-18
+--
+-- Document suggestion prefetches `WHERE status = 'completed' ORDER BY
+-- updated_at DESC LIMIT 50` alongside every vector search.
+
+CREATE INDEX IF NOT EXISTS ix_documents_status_updated
+    ON documents (status, updated_at DESC);
@@ -5,7 +5,10 @@ import os
 # Add the backend directory to the path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from app.core.database import Base, engine, SessionLocal
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import NoSuchTableError
+
+from app.core.database import engine, create_missing_tables
 from app.core.config import settings
 
 def run_migration():
@@ -17,20 +20,23 @@ def run_migration():
     print(f"\nDatabase URL: {settings.database_url}")
 
     try:
-        print("\nCreating tables...")
-        Base.metadata.create_all(bind=engine)
-        print("✓ All tables created successfully")
+        # Create tables, verify the audit table and test the connection on one pooled connection
+        with engine.begin() as conn:
+            print("\nCreating tables...")
+            created = create_missing_tables(conn)
+            print(f"✓ All tables created successfully ({len(created)} new)")
 
-        # Verify the audit table exists
-        from sqlalchemy import inspect
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
+            # Reading the columns also verifies the table exists
+            inspector = inspect(conn)
+            try:
+                columns = inspector.get_columns('api_usage_audit')
+            except NoSuchTableError:
+                print("\n✗ Table 'api_usage_audit' not found")
+                return False
 
-        if 'api_usage_audit' in tables:
             print("\n✓ Table 'api_usage_audit' verified")
 
             # Get column info
-            columns = inspector.get_columns('api_usage_audit')
             print(f"\nTable structure ({len(columns)} columns):")
             for col in columns:
                 print(f"  - {col['name']}: {col['type']}")
@@ -40,19 +46,11 @@ def run_migration():
             print(f"\nIndexes ({len(indexes)} total):")
             for idx in indexes:
                 print(f"  - {idx['name']}")
-        else:
-            print("\n✗ Table 'api_usage_audit' not found")
-            return False
 
-        # Test database connection
-        print("\nTesting database connection...")
-        db = SessionLocal()
-        try:
-            result = db.execute("SELECT COUNT(*) FROM api_usage_audit")
-            count = result.scalar()
+            # Test database connection
+            print("\nTesting database connection...")
+            count = conn.execute(text("SELECT COUNT(*) FROM api_usage_audit")).scalar()
             print(f"✓ Connection successful - Table has {count} records")
-        finally:
-            db.close()
 
         print("\n" + "=" * 60)
         print("✓ Database migration complete!")
@@ -0,0 +1,92 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from app.services.audit_service import AuditService
+
+@pytest.fixture
+def clock():
+    state = SimpleNamespace(now=1000.0)
+    with patch("app.services.audit_service.time.monotonic", side_effect=lambda: state.now):
+        yield state
+
+@pytest.fixture
+def written():
+    # Record each insert call instead of writing to the database
+    calls = []
+    with patch.object(AuditService, "_insert_rows", side_effect=lambda bind, rows: calls.append(list(rows))):
+        yield calls
+
+def _row(request_id, **extra):
+    return {"request_id": request_id, "service": "jina", "operation": "scrape", **extra}
+
+# Flush triggers (called outside an event loop, so batches are written inline)
+
+def test_rows_are_queued_until_batch_size(clock, written):
+    service = AuditService()
+    with patch("app.services.audit_service.settings.audit_flush_batch_size", 3), \
+         patch("app.services.audit_service.settings.audit_flush_interval", 60):
+        service._buffer_row(MagicMock(), _row("a"))
+        service._buffer_row(MagicMock(), _row("b"))
+        assert written == []
+
+        service._buffer_row(MagicMock(), _row("c"))
+
+    assert written == [[_row("a"), _row("b"), _row("c")]]
+    assert service._pending == []
+
+def test_rows_are_flushed_once_oldest_exceeds_interval(clock, written):
+    service = AuditService()
+    with patch("app.services.audit_service.settings.audit_flush_batch_size", 100), \
+         patch("app.services.audit_service.settings.audit_flush_interval", 5):
+        service._buffer_row(MagicMock(), _row("a"))
+        clock.now += 4.9
+        service._buffer_row(MagicMock(), _row("b"))
+        assert written == []
+
+        clock.now += 0.1
+        service._buffer_row(MagicMock(), _row("c"))
+
+    assert written == [[_row("a"), _row("b"), _row("c")]]
+
+def test_batch_size_one_writes_immediately(clock, written):
+    service = AuditService()
+    with patch("app.services.audit_service.settings.audit_flush_batch_size", 1):
+        service._buffer_row(MagicMock(), _row("a"))
+    assert written == [[_row("a")]]
+
+def test_flush_writes_queued_rows(clock, written):
+    service = AuditService()
+    with patch("app.services.audit_service.settings.audit_flush_batch_size", 100), \
+         patch("app.services.audit_service.settings.audit_flush_interval", 60):
+        service._buffer_row(MagicMock(), _row("a"))
+        service.flush(bind=MagicMock())
+        service.flush(bind=MagicMock())  # Nothing left to write
+
+    assert written == [[_row("a")]]
+
+# Batch writes
+
+def test_rows_are_grouped_by_column_set(written):
+    rows = [_row("a"), _row("b", document_id=1), _row("c")]
+    AuditService()._write_rows(MagicMock(), rows)
+    assert written == [[_row("a"), _row("c")], [_row("b", document_id=1)]]
+
+def test_failed_batch_is_retried_row_by_row():
+    inserted = []
+
+    def insert(bind, rows):
+        if any(row["request_id"] == "bad" for row in rows):
+            raise ValueError("constraint violation")
+        inserted.extend(row["request_id"] for row in rows)
+
+    with patch.object(AuditService, "_insert_rows", side_effect=insert) as insert_rows:
+        AuditService()._write_rows(MagicMock(), [_row("a"), _row("bad"), _row("c")])
+
+    # Only the row that fails on its own is lost
+    assert inserted == ["a", "c"]
+    assert insert_rows.call_count == 4
+
+def test_single_row_failure_is_not_retried():
+    with patch.object(AuditService, "_insert_rows", side_effect=ValueError("down")) as insert_rows:
+        AuditService()._write_rows(MagicMock(), [_row("a")])
+    assert insert_rows.call_count == 1
@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import patch
+from app.core.cache import TTLCache, make_key
+
+@pytest.fixture
+def clock():
+    # Fake monotonic clock the cache reads expiry times from
+    now = [1000.0]
+    with patch("app.core.cache.time.monotonic", side_effect=lambda: now[0]):
+        yield now
+
+def test_get_returns_value_until_ttl_expires(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+
+    clock[0] += 59.9
+    assert cache.get("a") == 1
+
+    clock[0] += 0.1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_expired_entry_returns_default(clock):
+    cache = TTLCache(ttl=1)
+    cache.set("a", 1)
+    clock[0] += 5
+    assert cache.get("a", "missing") == "missing"
+
+def test_set_refreshes_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+    clock[0] += 8
+    cache.set("a", 2)
+    clock[0] += 8
+    assert cache.get("a") == 2
+
+def test_evicts_least_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+def test_delete_and_clear(clock):
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.delete("a")
+    cache.delete("missing")  # No error for absent keys
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get("b") is None
+
+def test_stats_count_hits_and_misses(clock):
+    cache = TTLCache(maxsize=5, ttl=10)
+    assert cache.get_stats()["hit_rate"] == 0.0
+
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+    clock[0] += 10
+    cache.get("a")  # Expired entries count as misses
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+    assert stats["size"] == 0
+    assert stats["max_size"] == 5
+
+def test_make_key_is_stable_and_distinguishes_parts():
+    assert make_key("topic", (1, 2)) == make_key("topic", (1, 2))
+    assert make_key("topic", (1, 2)) != make_key("topic", (2, 1))
+    assert make_key("a", "b") != make_key("ab")
@@ -0,0 +1,63 @@
+import random
+import pytest
+from app.services.chunking import TextChunker
+
+def _baseline_chunks(text, chunk_size, chunk_overlap):
+    # The original fixed-size loop: slice each window, then strip it
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        if end < len(text):
+            space_pos = text.rfind(' ', end - 50, end)
+            if space_pos != -1 and space_pos > start:
+                end = space_pos
+
+        chunk_text = text[start:end].strip()
+        if chunk_text:
+            chunks.append((chunk_text, len(chunks), start, end))
+
+        start = end - chunk_overlap
+    return chunks
+
+def _chunks(text, chunk_size, chunk_overlap):
+    chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return [
+        (chunk.content, chunk.chunk_index, chunk.start_char, chunk.end_char)
+        for chunk in chunker.chunk_text(text, method="fixed")
+    ]
+
+def _random_text(rng, length):
+    # Words separated by runs of mixed whitespace, including at both ends
+    alphabet = "abcdefghij" * 5 + " " * 8 + "\n\t"
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "short text",
+    "  short text with surrounding whitespace \n",
+    "x" * 1000,
+    "   " + "x" * 1000 + "\n\n",
+    " ".join(["word"] * 300),
+    "  \n" + " ".join(["word"] * 300) + "  \t\n",
+    ("sentence one. " * 40) + "\n\n" + ("sentence two! " * 40),
+    " " * 150 + "x" * 10 + " " * 150,
+])
+def test_fixed_size_matches_baseline(text):
+    assert _chunks(text, 200, 20) == _baseline_chunks(text, 200, 20)
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(100, 10), (200, 50), (1000, 200)])
+def test_fixed_size_matches_baseline_on_random_text(chunk_size, chunk_overlap):
+    rng = random.Random(chunk_size)
+    for _ in range(20):
+        text = _random_text(rng, rng.randint(0, 3 * chunk_size))
+        assert _chunks(text, chunk_size, chunk_overlap) == _baseline_chunks(text, chunk_size, chunk_overlap)
+
+def test_text_shorter_than_chunk_size_is_one_chunk():
+    assert _chunks("  hello world  ", 1000, 200) == [("hello world", 0, 0, 1000)]
+
+def test_text_without_spaces_splits_at_chunk_size():
+    chunks = _chunks("x" * 250, 100, 10)
+    assert [(start, end) for _, _, start, end in chunks] == [(0, 100), (90, 190), (180, 280)]
+    assert chunks[-1][0] == "x" * 70
@@ -3,33 +3,49 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from app.services.document_service import DocumentService
 from app.models.schemas import SourceType
+from app.services.chunking import Chunk
+
+@pytest.fixture
+def mock_db():
+    # Mock database query to return None (no existing document)
+    db = MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = None
+    return db
+
+@pytest.fixture
+def mock_confluence_client():
+    return AsyncMock()
+
+@pytest.fixture
+def mock_pinecone_client():
+    client = AsyncMock()
+    client.fetch_vectors_by_filter.return_value = []
+    client.upsert_vectors.return_value = None
+    return client
+
+@pytest.fixture
+def mock_embedding_generator():
+    generator = AsyncMock()
+    generator.embed_batch.return_value = [[0.1] * 384] # Mock embedding vector
+    return generator
+
+@pytest.fixture
+def mock_chunker():
+    chunker = MagicMock()
+    chunker.chunk_text.return_value = [Chunk(content="Chunk 1", chunk_index=0)]
+    return chunker
 
 @pytest.mark.asyncio
-async def test_process_pdf_calls_confluence_client():
+async def test_process_pdf_calls_confluence_client(
+    mock_db, mock_confluence_client, mock_pinecone_client, mock_embedding_generator, mock_chunker
+):
     # Mock dependencies
-    mock_db = MagicMock()
     mock_pdf_processor = MagicMock()
     mock_pdf_processor.extract_text_from_file.return_value = {
         "text": "Sample content",
         "content_hash": "hash123",
         "metadata": {}
     }
-    
-    # Mock Confluence client
-    mock_confluence_client = AsyncMock()
-    
-    # Mock Pinecone client
-    mock_pinecone_client = AsyncMock()
-    mock_pinecone_client.fetch_vectors_by_filter.return_value = []
-    mock_pinecone_client.upsert_vectors.return_value = None
-    
-    # Mock Embedding Generator
-    mock_embedding_generator = AsyncMock()
-    mock_embedding_generator.embed_batch.return_value = [[0.1] * 384] # Mock embedding vector
-
-    # Mock Chunker
-    mock_chunker = MagicMock()
-    mock_chunker.chunk_text.return_value = [{"content": "Chunk 1"}]
 
     with patch("app.services.document_service.get_pdf_processor", return_value=mock_pdf_processor), \
          patch("app.services.document_service.get_confluence_client", return_value=mock_confluence_client), \
@@ -42,9 +58,6 @@ async def test_process_pdf_calls_confluence_client():
         service.storage_dir = MagicMock()
         service.pdf_processor.save_as_markdown = MagicMock()
         
-        # Mock database query to return None (no existing document)
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
         # Call method
         await service.process_pdf(
             db=mock_db,
@@ -62,31 +75,16 @@ async def test_process_pdf_calls_confluence_client():
         assert "Tester" in call_args["tags"]
 
 @pytest.mark.asyncio
-async def test_process_url_calls_confluence_client():
+async def test_process_url_calls_confluence_client(
+    mock_db, mock_confluence_client, mock_pinecone_client, mock_embedding_generator, mock_chunker
+):
     # Mock dependencies
-    mock_db = MagicMock()
     mock_jina_scraper = AsyncMock()
     mock_jina_scraper.scrape_url.return_value = {
         "text": "Web content",
         "content_hash": "webhash123"
     }
-    
-    # Mock Confluence client
-    mock_confluence_client = AsyncMock()
-    
-    # Mock Pinecone client
-    mock_pinecone_client = AsyncMock()
-    mock_pinecone_client.fetch_vectors_by_filter.return_value = []
-    mock_pinecone_client.upsert_vectors.return_value = None
-    
-    # Mock Embedding Generator
-    mock_embedding_generator = AsyncMock()
-    mock_embedding_generator.embed_batch.return_value = [[0.1] * 384]
 
-    # Mock Chunker
-    mock_chunker = MagicMock()
-    mock_chunker.chunk_text.return_value = [{"content": "Chunk 1"}]
-    
     with patch("app.services.document_service.get_jina_scraper", return_value=mock_jina_scraper), \
          patch("app.services.document_service.get_confluence_client", return_value=mock_confluence_client), \
          patch("app.services.document_service.get_embedding_generator", return_value=mock_embedding_generator), \
@@ -97,9 +95,6 @@ async def test_process_url_calls_confluence_client():
         # Bypass file system ops
         service.storage_dir = MagicMock()
         
-        # Mock database query to return None (no existing document)
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
         # Call method
         await service.process_url(
             db=mock_db,
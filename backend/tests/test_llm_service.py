@@ -0,0 +1,208 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from app.services.llm_service import (
+    AsyncRateLimiter, LLMService, STREAM_FLUSH_CHARS, STREAM_FLUSH_INTERVAL, _coalesce_content, _is_retryable
+)
+
+class FakeAPIStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+class FakeRateLimitError(FakeAPIStatusError):
+    def __init__(self):
+        super().__init__(429)
+
+class FakeAPIConnectionError(Exception):
+    pass
+
+def _fake_sdk():
+    return SimpleNamespace(
+        RateLimitError=FakeRateLimitError,
+        APIConnectionError=FakeAPIConnectionError,
+        APIStatusError=FakeAPIStatusError,
+    )
+
+@pytest.fixture
+def fake_sdks():
+    # _is_retryable imports the SDKs by name, so fake modules stand in for both
+    with patch.dict("sys.modules", {"anthropic": _fake_sdk(), "openai": _fake_sdk()}):
+        yield
+
+@pytest.fixture
+def clock():
+    # Fake monotonic clock that asyncio.sleep advances instead of waiting
+    state = SimpleNamespace(now=1000.0, sleeps=[])
+
+    async def fake_sleep(delay):
+        state.sleeps.append(delay)
+        state.now += delay
+
+    with patch("app.services.llm_service.time.monotonic", side_effect=lambda: state.now), \
+         patch("asyncio.sleep", fake_sleep):
+        yield state
+
+# Rate limiter
+
+@pytest.mark.asyncio
+async def test_rate_limiter_allows_burst_up_to_max_rate(clock):
+    limiter = AsyncRateLimiter(max_rate=3, time_period=60)
+    for _ in range(3):
+        await limiter.acquire()
+    assert clock.sleeps == []
+
+@pytest.mark.asyncio
+async def test_rate_limiter_waits_for_next_token(clock):
+    limiter = AsyncRateLimiter(max_rate=2, time_period=60)
+    await limiter.acquire()
+    await limiter.acquire()
+
+    # Bucket is empty; one token refills every 30s
+    await limiter.acquire()
+    assert clock.sleeps == [pytest.approx(30.0)]
+
+@pytest.mark.asyncio
+async def test_rate_limiter_refills_over_time_up_to_max_rate(clock):
+    limiter = AsyncRateLimiter(max_rate=2, time_period=60)
+    await limiter.acquire()
+    await limiter.acquire()
+
+    # A long idle period refills the bucket, but never beyond max_rate
+    clock.now += 600
+    await limiter.acquire()
+    await limiter.acquire()
+    assert clock.sleeps == []
+
+    await limiter.acquire()
+    assert clock.sleeps == [pytest.approx(30.0)]
+
+@pytest.mark.asyncio
+async def test_rate_limiter_partial_refill_shortens_wait(clock):
+    limiter = AsyncRateLimiter(max_rate=1, time_period=60)
+    await limiter.acquire()
+
+    clock.now += 45
+    async with limiter:
+        pass
+    assert clock.sleeps == [pytest.approx(15.0)]
+
+# Retries
+
+@pytest.mark.parametrize("error", [
+    FakeRateLimitError(),
+    FakeAPIConnectionError("reset"),
+    FakeAPIStatusError(500),
+    FakeAPIStatusError(503),
+    asyncio.TimeoutError(),
+])
+def test_transient_errors_are_retryable(fake_sdks, error):
+    assert _is_retryable(error)
+
+@pytest.mark.parametrize("error", [
+    FakeAPIStatusError(400),
+    FakeAPIStatusError(401),
+    ValueError("bad request"),
+])
+def test_client_errors_are_not_retryable(fake_sdks, error):
+    assert not _is_retryable(error)
+
+@pytest.mark.asyncio
+async def test_generate_retries_transient_errors_with_capped_backoff(fake_sdks, clock):
+    service = LLMService()
+    result = {"content": "ok", "model": "m", "usage": {"input_tokens": 1, "output_tokens": 1}}
+
+    with patch.object(service, "_generate_anthropic", AsyncMock(
+        side_effect=[FakeRateLimitError(), FakeAPIStatusError(502), result]
+    )) as generate, \
+         patch("app.services.llm_service.settings.llm_max_attempts", 3), \
+         patch("app.services.llm_service.random.uniform", side_effect=lambda low, high: high):
+        assert await service._generate_with_retries("prompt", "anthropic", "m", None, 0.7, 100) == result
+
+    assert generate.await_count == 3
+    # Full jitter is drawn up to 2**attempt seconds
+    assert clock.sleeps == [2.0, 4.0]
+
+@pytest.mark.asyncio
+async def test_generate_does_not_retry_client_errors(fake_sdks, clock):
+    service = LLMService()
+
+    with patch.object(service, "_generate_anthropic", AsyncMock(
+        side_effect=FakeAPIStatusError(400)
+    )) as generate:
+        with pytest.raises(FakeAPIStatusError):
+            await service._generate_with_retries("prompt", "anthropic", "m", None, 0.7, 100)
+
+    assert generate.await_count == 1
+    assert clock.sleeps == []
+
+@pytest.mark.asyncio
+async def test_generate_gives_up_after_max_attempts(fake_sdks, clock):
+    service = LLMService()
+
+    with patch.object(service, "_generate_anthropic", AsyncMock(
+        side_effect=FakeAPIConnectionError("reset")
+    )) as generate, \
+         patch("app.services.llm_service.settings.llm_max_attempts", 2):
+        with pytest.raises(FakeAPIConnectionError):
+            await service._generate_with_retries("prompt", "anthropic", "m", None, 0.7, 100)
+
+    assert generate.await_count == 2
+    assert len(clock.sleeps) == 1
+
+# Stream coalescing
+
+async def _events(items, clock=None):
+    # Yield (delay, event) pairs, advancing the fake clock before each event
+    for delay, event in items:
+        if clock is not None:
+            clock.now += delay
+        yield event
+
+async def _collect(events):
+    return [event async for event in events]
+
+def _content(text):
+    return {"type": "content", "content": text}
+
+@pytest.mark.asyncio
+async def test_coalesce_passes_first_chunk_through_and_flushes_on_size(clock):
+    half = "x" * (STREAM_FLUSH_CHARS // 2)
+    events = _events([(0, _content("first")), (0, _content(half)), (0, _content(half)), (0, _content("tail"))])
+
+    result = await _collect(_coalesce_content(events))
+
+    # No time passes, so only the size limit triggers the second flush
+    assert result == [_content("first"), _content(half + half), _content("tail")]
+
+@pytest.mark.asyncio
+async def test_coalesce_flushes_on_interval(clock):
+    events = _events([
+        (0, _content("a")),
+        (0.01, _content("b")),
+        (0.01, _content("c")),
+        (STREAM_FLUSH_INTERVAL, _content("d")),
+        (0.01, _content("e")),
+    ], clock)
+
+    result = await _collect(_coalesce_content(events))
+
+    assert result == [_content("a"), _content("bcd"), _content("e")]
+
+@pytest.mark.asyncio
+async def test_coalesce_flushes_at_end_of_stream(clock):
+    events = _events([(0, _content("a")), (0, _content("b")), (0, _content("c"))])
+
+    result = await _collect(_coalesce_content(events))
+
+    assert result == [_content("a"), _content("bc")]
+
+@pytest.mark.asyncio
+async def test_coalesce_flushes_before_other_events(clock):
+    done = {"type": "done", "usage": {}}
+    events = _events([(0, _content("a")), (0, _content("b")), (0, done)])
+
+    result = await _collect(_coalesce_content(events))
+
+    assert result == [_content("a"), _content("b"), done]